@@ -1,193 +1,231 @@
 import os
-import re
 import sys
-import requests
 import threading
+import queue
 import subprocess
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtGui import QIcon, QColor, QPixmap, QPainter
 from PyQt5.QtCore import Qt, pyqtSlot, QDateTime, QThread
-from PyQt5.QtWidgets import QMessageBox, QProgressDialog, QPushButton, QMainWindow, QListWidget, QDialog, QFileDialog
-from bs4 import BeautifulSoup
-from pySmartDL import SmartDL
+from PyQt5.QtWidgets import QMessageBox, QPushButton, QMainWindow, QListView, QDialog, QFileDialog
 from functools import partial
-import pickle
 import shutil
-import time
-import psutil
-import configparser
-from tqdm import tqdm
-import ctypes
-
-# Path to 7-Zip executable (7z.exe)
-seven_zip_path = 'C:\\Program Files\\7-Zip\\7z.exe'
-
-# Path to the 7z archive and the output folder
-archive_path = ''
-output_folder = 'output_folder'
-
-# Use 7-Zip to extract the archive
-subprocess.call([seven_zip_path, 'x', archive_path, f'-o{output_folder}'])
-
-icon_path = "resources/icons/icon.ico"
-ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("VoidLauncher")
-ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(icon_path)
-
-class Config:
-    config_file = "config.ini"
-
-    @classmethod
-    def get_config_path(cls):
-        exe_dir = os.path.dirname(sys.executable)
-        return os.path.join(exe_dir, cls.config_file)
-
-    @classmethod
-    def ensure_config_file_exists(cls):
-        exe_dir = os.path.dirname(sys.executable)
-        config_path = cls.get_config_path()
-        if not os.path.exists(config_path):
-            # Create the config file with default values
-            config = configparser.ConfigParser()
-            config["Paths"] = {"game_destination_folder": os.path.join(exe_dir, "game")}
-            config["Settings"] = {
-                "disable_initial_dialog": "False",
-                "last_refresh_time": "" 
-            }
-            
-            with open(config_path, "w") as configfile:
-                config.write(configfile)
-                
-    @classmethod
-    def get_last_refresh_time(cls):
-        cls.ensure_config_file_exists() 
-        config = configparser.ConfigParser()
-        config.read(cls.get_config_path())
-        return config.get("Settings", "last_refresh_time")
-
-    @classmethod
-    def set_last_refresh_time(cls, value):
-        cls.ensure_config_file_exists()
-        config = configparser.ConfigParser()
-        config.read(cls.get_config_path())
-        config.set("Settings", "last_refresh_time", value)
-
-        with open(cls.get_config_path(), "w") as configfile:
-            config.write(configfile)
-    @classmethod
-    def get_game_destination_folder(cls):
-        cls.ensure_config_file_exists()
-        config = configparser.ConfigParser()
-        config.read(cls.get_config_path())
-        return config.get("Paths", "game_destination_folder")
-    
-    @classmethod
-    def set_game_destination_folder(cls, new_folder):
-        cls.ensure_config_file_exists() 
-        config = configparser.ConfigParser()
-        config.read(cls.get_config_path())
-        config.set("Paths", "game_destination_folder", new_folder)
-
-        with open(cls.get_config_path(), "w") as configfile:
-            config.write(configfile)
-
-    @classmethod
-    def get_disable_initial_dialog(cls):
-        cls.ensure_config_file_exists() 
-        config = configparser.ConfigParser()
-        config.read(cls.get_config_path())
-        return config.getboolean("Settings", "disable_initial_dialog")
-
-    @classmethod
-    def set_disable_initial_dialog(cls, value):
-        cls.ensure_config_file_exists()
-        config = configparser.ConfigParser()
-        config.read(cls.get_config_path())
-        config.set("Settings", "disable_initial_dialog", str(value))
-
-        with open(cls.get_config_path(), "w") as configfile:
-            config.write(configfile)
-
-    @classmethod
-    def get_archived_installs_folder(cls):
-        exe_dir = os.path.dirname(sys.executable)
-        return os.path.join(exe_dir, "archives")
+import bisect
+import collections
+from voidcore import (
+    Config, DownloadQueue, ExtractionError, InstallStore, Installer, verify_archives, LibraryIndex,
+    Telemetry, MirrorCache, MirrorServer, UPSTREAM_URL, GameProcess, GameLauncher, CatalogFetcher, delta_source
+)
+# The launcher logic lives in voidcore, this file is the Qt front end for it
+
+class ConfigNotifier(QtCore.QObject):
+    # Turns Config changes into a signal, so widgets are updated in the GUI thread
+    changed = QtCore.pyqtSignal(str, str, str)
+
+    def __init__(self):
+        super().__init__()
+        Config.add_listener(self.changed.emit)
+
+class GameSupervisor(QtCore.QObject):
+    # GameProcess with its callbacks turned into signals, they arrive in the GUI thread queued
+    started = QtCore.pyqtSignal(str, int)
+    exited = QtCore.pyqtSignal(str, int, float)
+
+    def __init__(self, log_folder="game logs"):
+        super().__init__()
+        self.game_process = GameProcess(log_folder, on_started=self.started.emit, on_exited=self.exited.emit)
+
+    def running(self):
+        return self.game_process.running()
+
+    def launch(self, version, game_path):
+        return self.game_process.launch(version, game_path)
+
+    def take_lines(self, limit=1000):
+        return self.game_process.take_lines(limit)
 
 class DownloadWorker(QtCore.QObject):
-    update_download_progress = QtCore.pyqtSignal(int)
     download_error = QtCore.pyqtSignal(str)
     download_completed = QtCore.pyqtSignal()
-    extract_file = QtCore.pyqtSignal()
     update_extract_progress = QtCore.pyqtSignal(int)
-    extraction_completed = QtCore.pyqtSignal()
+    extraction_completed = QtCore.pyqtSignal(str)
+    extraction_error = QtCore.pyqtSignal(str)
+    queue_changed = QtCore.pyqtSignal()
+    job_progress = QtCore.pyqtSignal(object)
+    verification_finished = QtCore.pyqtSignal(list)
+    install_store_report = QtCore.pyqtSignal(str)
 
     def __init__(self):        
         self.archived_installs_path = Config.get_archived_installs_folder()
         self.game_destination_path = Config.get_game_destination_folder()
         self.output_folder = ""
-        self.cancelled = False
+        # Finished downloads are extracted one after the other while the queue keeps downloading
+        self.extraction_queue = queue.Queue()
+        self.extraction_thread = None
+        # Jobs finish on their own download threads, starting and retiring the extractor happens under this lock
+        self.extraction_lock = threading.Lock()
+        self.download_queue = DownloadQueue(
+            self.archived_installs_path,
+            max_concurrent=Config.get_max_concurrent_downloads(),
+            bandwidth_limit=Config.get_bandwidth_limit() * 1024,
+            on_change=self.report_queue_change,
+            on_progress=self.report_job_progress,
+            on_finished=self.job_finished
+        )
+        self.reported_progress = {}
+        self.telemetry = Telemetry()
         super().__init__()
 
-    def start_download(self, url):
-        self.cancelled = False
-        os.makedirs(self.archived_installs_path, exist_ok=True)
-        filename = url.split("/")[-1]
-        local_file_path = os.path.join(self.archived_installs_path, filename)
-        obj = SmartDL(url, local_file_path, progress_bar=False)
-        obj.start(blocking=False)
-
-        while obj.get_status() == "downloading":
-            progress = int(obj.get_progress() * 100)
-            self.update_download_progress.emit(progress)
-            if self.cancelled:
-                print(self.cancelled)
-                obj.stop
-                return
-            
-        if obj.isSuccessful():
+    def queue_download(self, version, url, expected_sha256=None, delta_url=None):
+        return self.download_queue.add(version, url, expected_sha256, delta_url)
+
+    def report_queue_change(self):
+        self.queue_changed.emit()
+
+    def report_job_progress(self, job):
+        # Only repaint when the percentage or the speed moved
+        progress = (job.progress, int(job.speed))
+        if self.reported_progress.get(job) != progress:
+            self.reported_progress[job] = progress
+            self.job_progress.emit(job)
+
+    def job_finished(self, job):
+        self.reported_progress.pop(job, None)
+        if job.state == "Completed":
+            self.telemetry.record("download", version=job.version, bytes=job.transferred_bytes, seconds=job.active_seconds)
             self.download_completed.emit()
-            self.extract_file.emit()
+            self.queue_extraction(job)
         else:
-            self.download_error.emit("Download failed")
-    def extract_and_move_thread(self):
-        extraction_thread = threading.Thread(target=self.start_extraction_and_move)
-        extraction_thread.start()
+            self.download_error.emit(f'"{job.version}": {job.error}')
 
-    def start_extraction_and_move(self):
+    def verify_archives_thread(self, expected_sha256s):
+        threading.Thread(target=self.verify_archives, args=(expected_sha256s,), daemon=True).start()
+
+    def verify_archives(self, expected_sha256s):
+        self.verification_finished.emit(verify_archives(self.archived_installs_path, expected_sha256s))
+
+    def queue_extraction(self, job):
+        with self.extraction_lock:
+            self.extraction_queue.put(job)
+            if self.extraction_thread is None or not self.extraction_thread.is_alive():
+                self.extraction_thread = threading.Thread(target=self.run_extractions, daemon=True)
+                self.extraction_thread.start()
+
+    def run_extractions(self):
+        while True:
+            try:
+                job = self.extraction_queue.get(timeout=5)
+            except queue.Empty:
+                # A job queued while the timeout ran out is still picked up, after this the next job starts a new thread
+                with self.extraction_lock:
+                    if self.extraction_queue.empty():
+                        self.extraction_thread = None
+                        return
+                continue
+            self.extract_and_move(job)
+
+    def extract_and_move(self, job):
+        self.output_folder = self.game_destination_path
+        installer = Installer(self.output_folder, Config.get_install_store_mode(), self.telemetry)
         try:
-            if not os.path.exists(self.archived_installs_path) or not os.path.exists(self.game_destination_path):
-                os.makedirs(self.game_destination_path)  # Create the destination path if it doesn't exist
-
-            seven_zip_path = 'C:\\Program Files\\7-Zip\\7z.exe'
-
-            for root, _, files in os.walk(self.archived_installs_path):
-                for file in files:
-                    if file.endswith(".7z"):
-                        print("found 7z file")
-                        source_file = os.path.join(root, file)
-                        self.output_folder = self.game_destination_path  # Use game_destination_path as the output folder
-                        print(self.output_folder)
-
-                        if os.path.exists(seven_zip_path):
-                            subprocess.call([seven_zip_path, 'x', source_file, '-o' + self.output_folder, '-y'])
-                        else:
-                            print("7-Zip not found. Please install 7-Zip to extract 7z archives.")
-                            return
-
-                        os.remove(source_file)
-                        print(f"Extracted and deleted: {source_file}")
-                        self.extraction_completed.emit()
-        except Exception as e:
+            installer.install(job.version, job.destination, job.expected_sha256, job.sha256)
+        except (ExtractionError, OSError, shutil.ReadError) as e:
             print(f"Extraction error: {str(e)}")
+            if job.fallback:
+                # The delta did not work out, fetch the whole archive instead of giving up
+                if os.path.exists(job.destination):
+                    os.remove(job.destination)
+                self.queue_download(job.version, job.fallback[0], job.expected_sha256)
+                return
+            self.extraction_error.emit(f'"{job.version}": {e}')
+            return
+        self.extraction_completed.emit(job.version)
 
-class CustomListWidget(QListWidget):
+    def install_store_thread(self, action):
+        threading.Thread(target=self.run_install_store_action, args=(action,), daemon=True).start()
+
+    def run_install_store_action(self, action):
+        store = InstallStore(self.game_destination_path, Config.get_install_store_mode())
+        if action == "collect":
+            removed_files, removed_bytes = store.garbage_collect()
+            message = f"Removed {removed_files} unused files, {removed_bytes / 1024 / 1024:.1f} MB freed."
+        else:
+            report = store.space_report()
+            message = f"Installed builds as full copies: {report['logical_bytes'] / 1024 ** 3:.2f} GB\n"
+            if report["saved_bytes"] is None:
+                # Reflinks share blocks, not inodes, there is nothing here to count them by
+                message += (
+                    "Reflinked builds share blocks inside the file system, which does not report them per file. "
+                    "Its own tools (e.g. 'btrfs filesystem du') show how much they save."
+                )
+            else:
+                message += (
+                    f"Actually used on disk: {report['actual_bytes'] / 1024 ** 3:.2f} GB\n"
+                    f"Saved by deduplication: {report['saved_bytes'] / 1024 ** 3:.2f} GB"
+                )
+        self.install_store_report.emit(message)
+
+class NameListModel(QtCore.QAbstractListModel):
+    # Only ever changed from the GUI thread, workers reach it through queued signals
     def __init__(self):
         super().__init__()
+        self.names = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.names[index.row()]
+        return None
+
+    def name_at(self, row):
+        return self.names[row] if 0 <= row < len(self.names) else ""
+
+    @pyqtSlot(list)
+    def set_names(self, names):
+        self.beginResetModel()
+        self.names = list(names)
+        self.endResetModel()
+
+    @pyqtSlot(int, list)
+    def insert_names(self, row, names):
+        if not names:
+            return
+        row = min(max(row, 0), len(self.names))
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(names) - 1)
+        self.names[row:row] = names
+        self.endInsertRows()
+
+    @pyqtSlot(list)
+    def remove_names(self, names):
+        for name in names:
+            if name in self.names:
+                row = self.names.index(name)
+                self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+                del self.names[row]
+                self.endRemoveRows()
+
+class CustomListView(QListView):
+    def __init__(self, model):
+        super().__init__()
+        self.setModel(model)
+        # Every row has the same height, so the view never measures rows it does not show
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+
+    def current_text(self):
+        return self.model().name_at(self.currentIndex().row())
+
+    def selected_texts(self):
+        rows = sorted(index.row() for index in self.selectionModel().selectedRows())
+        return [self.model().name_at(row) for row in rows]
 
     def keyPressEvent(self, event):
         if event.key() in (Qt.Key_Up, Qt.Key_Down):
-            selected_item = self.currentItem()
+            selected_item = self.current_text()
             if selected_item:
-                print(f"Selected item: {selected_item.text()}")
+                print(f"Selected item: {selected_item}")
 
         super().keyPressEvent(event)
 
@@ -216,26 +254,197 @@ class InitialDialog(QDialog):
         # Store the configuration
         self.config = config
 
+class SnapshotDialog(QDialog):
+    def __init__(self, game_launcher, game_name, parent=None):
+        super().__init__(parent)
+        self.game_launcher = game_launcher
+        self.game_name = game_name
+        self.store = game_launcher.snapshot_store(game_name)
+        self.setWindowTitle(f"Save Snapshots - {game_name}")
+        self.resize(600, 400)
+
+        self.snapshot_table = QtWidgets.QTableWidget(0, 3)
+        self.snapshot_table.setHorizontalHeaderLabels(["Snapshot", "Files", "Size"])
+        self.snapshot_table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.snapshot_table.verticalHeader().setVisible(False)
+        self.snapshot_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.snapshot_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.details_text = QtWidgets.QPlainTextEdit()
+        self.details_text.setReadOnly(True)
+
+        self.diff_button = QPushButton("Compare With Previous")
+        self.restore_button = QPushButton("Restore")
+        self.diff_button.clicked.connect(self.show_diff)
+        self.restore_button.clicked.connect(self.restore_snapshot)
+
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addWidget(self.diff_button)
+        button_layout.addWidget(self.restore_button)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.snapshot_table)
+        layout.addWidget(self.details_text)
+        layout.addLayout(button_layout)
+
+        self.snapshots = []
+        self.refresh()
+
+    def refresh(self):
+        # Newest on top
+        self.snapshots = list(reversed(self.store.list()))
+        self.snapshot_table.setRowCount(len(self.snapshots))
+        for row, snapshot in enumerate(self.snapshots):
+            created = QDateTime.fromSecsSinceEpoch(int(snapshot["created"])).toString("yyyy-MM-dd hh:mm:ss")
+            self.snapshot_table.setItem(row, 0, QtWidgets.QTableWidgetItem(created))
+            self.snapshot_table.setItem(row, 1, QtWidgets.QTableWidgetItem(str(snapshot["files"])))
+            self.snapshot_table.setItem(row, 2, QtWidgets.QTableWidgetItem(f"{snapshot['size'] / 1024 / 1024:.1f} MB"))
+        self.details_text.setPlainText(f"{len(self.snapshots)} snapshots, {self.store.disk_usage() / 1024 / 1024:.1f} MB on disk")
+
+    def selected_row(self):
+        rows = self.snapshot_table.selectionModel().selectedRows()
+        return rows[0].row() if rows else None
+
+    def show_diff(self):
+        row = self.selected_row()
+        if row is None or row + 1 >= len(self.snapshots):
+            self.details_text.setPlainText("Select a snapshot that has an older one to compare with.")
+            return
+        diff = self.store.diff(self.snapshots[row + 1]["id"], self.snapshots[row]["id"])
+        lines = [f"+ {path}" for path in diff["added"]] + [f"- {path}" for path in diff["removed"]] + [f"~ {path}" for path in diff["changed"]]
+        self.details_text.setPlainText("\n".join(lines) or "No changes.")
+
+    def restore_snapshot(self):
+        row = self.selected_row()
+        if row is None:
+            return
+        result = QMessageBox.question(self, "Restore Snapshot", "Replace the saves of this version with the selected snapshot?", QMessageBox.Ok | QMessageBox.Cancel)
+        if result != QMessageBox.Ok:
+            return
+        try:
+            self.game_launcher.restore(self.game_name, self.snapshots[row]["id"])
+            self.details_text.setPlainText("Snapshot restored.")
+        except Exception as e:
+            QMessageBox.critical(self, "Restore Snapshot", f"Restore failed: {str(e)}", QMessageBox.Ok)
+
+class DescriptionCache(QtCore.QObject):
+    # Parsed and laid out descriptions of the last few versions, so arrowing through the list swaps a document
+    # into the browser instead of parsing the HTML again. The neighbours of the selection are built while idle.
+    def __init__(self, load_description, browser, capacity=64, prefetch_distance=3, parent=None):
+        # Give it a parent created after the browser, so the documents outlive the browser showing one of them
+        super().__init__(parent)
+        self.load_description = load_description
+        self.browser = browser
+        self.capacity = capacity
+        self.prefetch_distance = prefetch_distance
+        self.documents = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.pending = collections.deque()
+        # A zero interval timer only fires when the event queue is empty, one document per tick keeps input first
+        self.prefetch_timer = QtCore.QTimer(self)
+        self.prefetch_timer.setInterval(0)
+        self.prefetch_timer.timeout.connect(self.prefetch_next)
+
+    def build(self, version):
+        description = self.load_description(version)
+        document = QtGui.QTextDocument(self)
+        document.setDefaultFont(self.browser.font())
+        document.setHtml(description or "Description not found")
+        # Laid out at the width it is shown at, so setDocument has nothing left to do but paint
+        document.setTextWidth(self.browser.viewport().width())
+        document.size()
+        # A missing description may still arrive with the next refresh, only real ones are kept
+        return document, description is not None
+
+    def document(self, version):
+        document = self.documents.get(version)
+        if document is not None:
+            self.hits += 1
+            self.documents.move_to_end(version)
+            return document
+        self.misses += 1
+        document, cacheable = self.build(version)
+        if cacheable:
+            self.store(version, document)
+        return document
+
+    def store(self, version, document):
+        self.documents[version] = document
+        while len(self.documents) > self.capacity:
+            _, evicted = self.documents.popitem(last=False)
+            self.discard(evicted)
+
+    def discard(self, document):
+        # The one on screen is deleted by show once something else replaced it
+        if document is not self.browser.document():
+            document.deleteLater()
+
+    def show(self, version):
+        document = self.document(version)
+        previous = self.browser.document()
+        # The browser deletes its own first document itself, ours are only deleted once dropped from the cache
+        orphaned = previous is not document and previous.parent() is self and not any(previous is cached for cached in self.documents.values())
+        self.browser.setDocument(document)
+        if orphaned:
+            previous.deleteLater()
+
+    def prefetch_around(self, names, row):
+        # Nearest first, the next few key presses in either direction should all be hits
+        self.pending.clear()
+        for distance in range(1, self.prefetch_distance + 1):
+            for neighbour in (row + distance, row - distance):
+                if 0 <= neighbour < len(names) and names[neighbour] not in self.documents:
+                    self.pending.append(names[neighbour])
+        if self.pending:
+            self.prefetch_timer.start()
+
+    def prefetch_next(self):
+        if not self.pending:
+            self.prefetch_timer.stop()
+            return
+        version = self.pending.popleft()
+        if version in self.documents:
+            return
+        document, cacheable = self.build(version)
+        if cacheable:
+            self.store(version, document)
+            self.prefetched += 1
+        else:
+            document.deleteLater()
+
+    def invalidate(self, versions=None):
+        # None drops everything, e.g. when the whole catalog was reloaded
+        self.pending.clear()
+        for version in list(self.documents) if versions is None else versions:
+            document = self.documents.pop(version, None)
+            if document is not None:
+                self.discard(document)
+
+    def stats_text(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits * 100 / lookups if lookups else 0
+        return (f"Description cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate), "
+                f"{self.prefetched} prefetched, {len(self.documents)}/{self.capacity} documents")
+
 class VoidLauncher(QMainWindow):
 
+    library_update_delay = 750
+    game_log_interval = 250
+    game_log_view_lines = 2000
+    library_names_ready = QtCore.pyqtSignal(list, list)
+
     def __init__(self, download_worker, game_fetch_worker):
         super().__init__()  
         self.resize(1280, 720)
         app_icon = QIcon("resources/icons/icon.ico")  # Replace "path_to_your_icon.ico" with the actual path to your icon file        
         self.setWindowTitle("Void Launcher")
-        app.setWindowIcon(app_icon)
-        self.selected_game_names = ["VotV-Win64-Shipping.exe"]
+        QtWidgets.QApplication.instance().setWindowIcon(app_icon)
         self.selected_game_name = ""
         self.script_directory = os.path.dirname(sys.argv[0])
         self.download_worker = download_worker
         self.game_fetch_worker = game_fetch_worker
         self.archived_installs_path = Config.get_archived_installs_folder()
         self.game_destination_path = Config.get_game_destination_folder()
-        self.version_name_map = self.game_fetch_worker.get_version_name_map
-        self.version_description_map = self.game_fetch_worker.get_version_description_map
-        self.version_download_link_map = self.game_fetch_worker.version_download_link_map        
-        self.final_descriptions_map = self.game_fetch_worker.get_final_descriptions_map
-        self.version_names = self.game_fetch_worker.get_version_names
         self.current_exe_path = ""
         self.current_description = ""
         self.current_download_link = ""
@@ -244,29 +453,67 @@ class VoidLauncher(QMainWindow):
         self.game_path = ""             
         self.game_process = None
         self.config = Config()
+        self.telemetry = Telemetry()
+        self.game_launcher = GameLauncher(self.script_directory, telemetry=self.telemetry, retention=self.config.get_snapshot_retention())
+        self.game_launcher.save_profiles.recover()
+        self.launch_prep_seconds = 0.0
+        self.mirror_server = None
+        self.mirror_stop_thread = None
+        self.game_supervisor = GameSupervisor(self.game_launcher.log_folder)
+        self.game_supervisor.started.connect(self.game_started)
+        self.game_supervisor.exited.connect(self.game_exited)
         dialog_text = "Playing many older builds of Voices of the Void WILL reset your stats and\nachievements!\n\nIf you already have a version of Voices of the Void installed then make sure\nto add it to the library and launch through this program at least once!\n\nThis will back up your data and stop it from getting permanently deleted."
         if not self.config.get_disable_initial_dialog():
             initial_dialog = InitialDialog(self.config, dialog_text)
             result = initial_dialog.exec_()
         self.init_ui()
+        # The window is on screen before any worker thread starts or the catalog is read
+        self.show()
+        QtCore.QTimer.singleShot(0, self.init_workers)
+
+    def init_workers(self):
         self.init_download_worker()
         self.init_game_fetch_worker()
-        self.show()
+        self.update_mirror_server()
+
+    def update_mirror_server(self):
+        # (Re)started whenever serving is switched on or the port changes
+        if self.mirror_server is not None:
+            server, self.mirror_server = self.mirror_server, None
+            # shutdown waits for the serve loop to notice, not worth blocking the window for when serving is switched off
+            self.mirror_stop_thread = threading.Thread(target=server.stop, daemon=True)
+            self.mirror_stop_thread.start()
+        if not self.config.get_mirror_serve():
+            return
+        if self.mirror_stop_thread is not None:
+            # The old server has to let go of the port before it can be bound again
+            self.mirror_stop_thread.join()
+            self.mirror_stop_thread = None
+        try:
+            self.mirror_server = MirrorServer(MirrorCache(self.config.get_mirror_folder()), port=self.config.get_mirror_port())
+            self.mirror_server.start()
+        except OSError as e:
+            print(f"Could not start the mirror server: {e}")
+            QMessageBox.warning(self, "LAN Mirror", f"Could not serve the mirror on port {self.config.get_mirror_port()}: {e}", QMessageBox.Ok)
 
     def init_download_worker(self):
         self.download_thread = QtCore.QThread()
         self.download_worker.moveToThread(self.download_thread)
-        self.download_worker.update_download_progress.connect(self.update_download_progress)
+        self.download_worker.queue_changed.connect(self.refresh_download_queue)
+        self.download_worker.job_progress.connect(self.update_job_progress)
         self.download_worker.download_error.connect(self.download_error)
         self.download_worker.download_completed.connect(self.download_finished)
-        self.download_worker.extract_file.connect(self.extract_file)
         self.download_worker.extraction_completed.connect(self.extraction_finished)
+        self.download_worker.extraction_error.connect(self.extraction_error)
+        self.download_worker.verification_finished.connect(self.verification_finished)
+        self.download_worker.install_store_report.connect(self.install_store_report)
         self.download_thread.start()
 
     def init_game_fetch_worker(self):
         self.fetch_thread = QtCore.QThread()
         self.game_fetch_worker.moveToThread(self.fetch_thread)
         self.game_fetch_worker.game_fetch_worker_fetch_game_exe.connect(self.game_fetch_worker_fetch_game_exe)
+        self.game_fetch_worker.update_fetch_progress.connect(self.reload_data.setText)
         download_function = partial(self.game_fetch_worker.fetch_game_versions)
         threading.Thread(target=download_function).start()
         self.fetch_thread.start()
@@ -281,6 +528,7 @@ class VoidLauncher(QMainWindow):
         self.setupDownloadsTab()
         self.setupSettingsTab()
         self.setupInfoTab()
+        self.setupStatsTab()
         self.setupHtmlContent()
         self.setupStyles()
         self.connectActions()
@@ -321,7 +569,7 @@ class VoidLauncher(QMainWindow):
                 background: #555;
             }
 
-            QListWidget {
+            QListView {
                 background-color: #1C1C1C;
                 color: white;
                 selection-background-color: #8E2DC5;
@@ -350,19 +598,19 @@ class VoidLauncher(QMainWindow):
                 background-color: #1C1C1C;
             }
 
-            QListWidget::item {
+            QListView::item {
                 padding: 5px;
                 border: 1px solid #666;
                 border-radius: 5px;
                 margin: 5px;
             }
 
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #8E2DC5;
                 color: white;
             }
 
-            QListWidget::item:focus {
+            QListView::item:focus {
                 border: none; 
             }
         """
@@ -370,6 +618,7 @@ class VoidLauncher(QMainWindow):
         self.versions_list.setStyleSheet(dark_mode_stylesheet)
         self.description_text.setStyleSheet(dark_mode_stylesheet)
         self.game_name_list.setStyleSheet(dark_mode_stylesheet)
+        self.game_log_view.setStyleSheet(dark_mode_stylesheet)
         self.download_button.setStyleSheet(dark_mode_stylesheet)
         self.reload_data.setStyleSheet(dark_mode_stylesheet)
 
@@ -392,7 +641,7 @@ class VoidLauncher(QMainWindow):
         self.layout.addWidget(self.tab_widget, 1, 0, 1, 2)
         self.tab_widget.setContentsMargins(0, 0, 0, 0)
         self.tab_widget.setStyleSheet("QTabWidget::pane { border: 0; }")
-        self.tab_names = ["Library", "Downloads", "Info", "Settings"]
+        self.tab_names = ["Library", "Downloads", "Info", "Settings", "Stats"]
         self.tabs = []
 
         for name in self.tab_names:
@@ -402,9 +651,31 @@ class VoidLauncher(QMainWindow):
 
     def setupLibraryTab(self):
         self.tab0_layout = QtWidgets.QVBoxLayout(self.tabs[0])
-        self.game_name_list = CustomListWidget()
+        self.library_index = LibraryIndex()
+        self.library_model = NameListModel()
+        self.library_names_ready.connect(self.apply_library_scan)
+        # Installs appearing or disappearing on disk update the list by themselves
+        self.library_watcher = QtCore.QFileSystemWatcher(self)
+        self.library_watcher.directoryChanged.connect(self.schedule_library_update)
+        self.library_update_timer = QtCore.QTimer(self)
+        self.library_update_timer.setSingleShot(True)
+        self.library_update_timer.setInterval(self.library_update_delay)
+        self.library_update_timer.timeout.connect(lambda: self.fetch_game_exe(self.game_destination_path))
+        self.game_name_list = CustomListView(self.library_model)
         self.game_name_list.setFocusPolicy(Qt.NoFocus)
-        self.tab0_layout.addWidget(self.game_name_list)
+        self.game_log_view = QtWidgets.QPlainTextEdit()
+        self.game_log_view.setReadOnly(True)
+        self.game_log_view.setMaximumBlockCount(self.game_log_view_lines)
+        self.game_log_view.setPlaceholderText("Game output shows up here while a version is running.")
+        self.game_log_timer = QtCore.QTimer(self)
+        self.game_log_timer.setInterval(self.game_log_interval)
+        self.game_log_timer.timeout.connect(self.flush_game_log)
+        self.library_splitter = QtWidgets.QSplitter(Qt.Vertical)
+        self.library_splitter.addWidget(self.game_name_list)
+        self.library_splitter.addWidget(self.game_log_view)
+        self.library_splitter.setStretchFactor(0, 3)
+        self.library_splitter.setStretchFactor(1, 1)
+        self.tab0_layout.addWidget(self.library_splitter)
         
         button_layout = QtWidgets.QHBoxLayout()
         
@@ -423,6 +694,11 @@ class VoidLauncher(QMainWindow):
         self.game_backup_path_button.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
         button_layout.addWidget(self.game_backup_path_button, alignment=Qt.AlignCenter)                   
         
+        self.snapshots_button = QPushButton("Save Snapshots")
+        self.snapshots_button.setMaximumWidth(400)
+        self.snapshots_button.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        button_layout.addWidget(self.snapshots_button, alignment=Qt.AlignCenter)                   
+        
         self.refesh_library = QPushButton("Refresh Library")
         self.refesh_library.setMaximumWidth(400)
         self.refesh_library.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
@@ -441,20 +717,30 @@ class VoidLauncher(QMainWindow):
         self.tab1_layout = QtWidgets.QVBoxLayout(self.tabs[1])
         self.download_button = QtWidgets.QPushButton("Download")
         
-        self.reload_data = self.game_fetch_worker.get_reload_data()
-        self.versions_list = self.game_fetch_worker.get_versions_list()
+        self.reload_data = QtWidgets.QPushButton("Refresh Versions List | Last Refreshed: " + Config.get_last_refresh_time())
+        # The model stays in the GUI thread, the fetch thread only talks to it through queued signals
+        self.versions_model = NameListModel()
+        self.game_fetch_worker.versions_reset.connect(self.versions_model.set_names)
+        self.game_fetch_worker.versions_inserted.connect(self.versions_model.insert_names)
+        self.game_fetch_worker.versions_removed.connect(self.versions_model.remove_names)
+        self.versions_list = CustomListView(self.versions_model)
         self.versions_list.setStyleSheet("""
             font-size: 18px;
-            QListWidget::item:selected {
+            QListView::item:selected {
                 border: 1px solid transparent;
                 background-color: #8E2DC5;
                 color: white;
             }
         """)
         self.versions_list.setFocusPolicy(Qt.NoFocus)
-        self.description_text = self.game_fetch_worker.get_description_text()
+        # Ctrl/Shift click queues several versions at once
+        self.versions_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.description_text = QtWidgets.QTextBrowser()
         self.description_text.setOpenExternalLinks(True)
         self.description_text.setOpenLinks(True)
+        self.description_cache = DescriptionCache(self.game_fetch_worker.get_description, self.description_text, parent=self)
+        self.game_fetch_worker.versions_reset.connect(lambda names: self.description_cache.invalidate())
+        self.game_fetch_worker.descriptions_changed.connect(self.descriptions_changed)
         self.splitter = QtWidgets.QSplitter(QtCore.Qt.Horizontal)
         self.tab1_layout.addWidget(self.splitter)
         self.splitter.addWidget(self.versions_list)
@@ -462,6 +748,27 @@ class VoidLauncher(QMainWindow):
         self.tab1_layout.addWidget(self.reload_data)
         self.tab1_layout.addWidget(self.download_button)
 
+        self.download_queue_table = QtWidgets.QTableWidget(0, 4)
+        self.download_queue_table.setHorizontalHeaderLabels(["Version", "Status", "Progress", "Speed"])
+        self.download_queue_table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.download_queue_table.verticalHeader().setVisible(False)
+        self.download_queue_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.download_queue_table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.download_queue_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.download_queue_table.setMaximumHeight(180)
+        self.tab1_layout.addWidget(self.download_queue_table)
+
+        queue_button_layout = QtWidgets.QHBoxLayout()
+        self.pause_download_button = QPushButton("Pause")
+        self.resume_download_button = QPushButton("Resume")
+        self.move_download_up_button = QPushButton("Move Up")
+        self.move_download_down_button = QPushButton("Move Down")
+        self.remove_download_button = QPushButton("Remove")
+        self.verify_archives_button = QPushButton("Verify Downloaded Archives")
+        for button in (self.pause_download_button, self.resume_download_button, self.move_download_up_button, self.move_download_down_button, self.remove_download_button, self.verify_archives_button):
+            queue_button_layout.addWidget(button)
+        self.tab1_layout.addLayout(queue_button_layout)
+
     def setupSettingsTab(self):
         self.tab2_layout = QtWidgets.QVBoxLayout(self.tabs[3])  # Use QVBoxLayout for vertical layout
 
@@ -484,6 +791,122 @@ class VoidLauncher(QMainWindow):
         # Align the items within the horizontal layout to the top
         toggle_layout.setAlignment(QtCore.Qt.AlignTop)
 
+        downloads_layout = QtWidgets.QHBoxLayout()
+        concurrent_label = QtWidgets.QLabel("Concurrent Downloads")
+        concurrent_label.setStyleSheet("color: white;margin-left: 500px;")
+        self.max_concurrent_downloads_input = QtWidgets.QSpinBox()
+        self.max_concurrent_downloads_input.setRange(1, 8)
+        self.max_concurrent_downloads_input.setValue(self.config.get_max_concurrent_downloads())
+        bandwidth_label = QtWidgets.QLabel("Bandwidth Limit (KB/s, 0 = unlimited)")
+        bandwidth_label.setStyleSheet("color: white;")
+        self.bandwidth_limit_input = QtWidgets.QSpinBox()
+        self.bandwidth_limit_input.setRange(0, 1000000)
+        self.bandwidth_limit_input.setSingleStep(512)
+        self.bandwidth_limit_input.setValue(self.config.get_bandwidth_limit())
+        downloads_layout.addWidget(concurrent_label)
+        downloads_layout.addWidget(self.max_concurrent_downloads_input)
+        downloads_layout.addWidget(bandwidth_label)
+        downloads_layout.addWidget(self.bandwidth_limit_input)
+        downloads_layout.addStretch()
+        self.tab2_layout.addLayout(downloads_layout)
+
+        store_layout = QtWidgets.QHBoxLayout()
+        store_label = QtWidgets.QLabel("Deduplicate Installed Builds")
+        store_label.setStyleSheet("color: white;margin-left: 500px;")
+        self.install_store_mode_input = QtWidgets.QComboBox()
+        for text, mode, tooltip in (
+            ("Off", "off", "Every build is a full copy."),
+            ("Hard links", "hardlink", "Builds share one copy of every identical file. A mod or patcher that changes a\n"
+                                       "build's files in place changes them in every build that shares them."),
+            ("Reflinks (copy on write)", "reflink", "Builds share the blocks of identical files, a change to one build stays in it.\n"
+                                                    "Needs btrfs or XFS on Linux.")
+        ):
+            self.install_store_mode_input.addItem(text, mode)
+            self.install_store_mode_input.setItemData(self.install_store_mode_input.count() - 1, tooltip, QtCore.Qt.ToolTipRole)
+        self.install_store_mode_input.setCurrentIndex(max(self.install_store_mode_input.findData(self.config.get_install_store_mode()), 0))
+        self.install_store_report_button = QPushButton("Show Space Savings")
+        self.install_store_collect_button = QPushButton("Clean Up Unused Files")
+        store_layout.addWidget(store_label)
+        store_layout.addWidget(self.install_store_mode_input)
+        store_layout.addWidget(self.install_store_report_button)
+        store_layout.addWidget(self.install_store_collect_button)
+        store_layout.addStretch()
+        self.tab2_layout.addLayout(store_layout)
+
+        mirror_layout = QtWidgets.QHBoxLayout()
+        base_url_label = QtWidgets.QLabel("Download From")
+        base_url_label.setStyleSheet("color: white;margin-left: 500px;")
+        self.base_url_input = QtWidgets.QLineEdit(self.config.get_base_url())
+        self.base_url_input.setPlaceholderText(UPSTREAM_URL)
+        self.base_url_input.setToolTip("invotek.net, or http://<machine>:<port> of a launcher that serves a LAN mirror")
+        self.mirror_serve_toggle = QtWidgets.QCheckBox("Serve LAN Mirror on Port")
+        self.mirror_serve_toggle.setStyleSheet("color: white;")
+        self.mirror_serve_toggle.setChecked(self.config.get_mirror_serve())
+        self.mirror_port_input = QtWidgets.QSpinBox()
+        self.mirror_port_input.setRange(1024, 65535)
+        self.mirror_port_input.setValue(self.config.get_mirror_port())
+        mirror_layout.addWidget(base_url_label)
+        mirror_layout.addWidget(self.base_url_input)
+        mirror_layout.addWidget(self.mirror_serve_toggle)
+        mirror_layout.addWidget(self.mirror_port_input)
+        mirror_layout.addStretch()
+        self.tab2_layout.addLayout(mirror_layout)
+
+        delta_layout = QtWidgets.QHBoxLayout()
+        self.delta_upgrades_toggle = QtWidgets.QCheckBox("Upgrade From Mirror Deltas (trusts the mirror)")
+        self.delta_upgrades_toggle.setStyleSheet("color: white;margin-left: 500px;")
+        self.delta_upgrades_toggle.setToolTip(
+            "Builds a new version by patching an installed one instead of downloading the whole archive.\n"
+            "The catalog SHA256 can not be checked on a patched build, its files are only checked against\n"
+            "a list the mirror sends with the delta. Only turn this on for a mirror you run or trust."
+        )
+        self.delta_upgrades_toggle.setChecked(self.config.get_delta_upgrades())
+        delta_layout.addWidget(self.delta_upgrades_toggle)
+        delta_layout.addStretch()
+        self.tab2_layout.addLayout(delta_layout)
+        self.tab2_layout.addStretch()
+
+    def setupStatsTab(self):
+        self.tab4_layout = QtWidgets.QVBoxLayout(self.tabs[4])
+        self.stats_table = QtWidgets.QTableWidget(0, 7)
+        self.stats_table.setHorizontalHeaderLabels(["Version", "Sessions", "Playtime", "Launch Prep", "Backup", "Extraction", "Download MB/s (oldest to newest)"])
+        self.stats_table.horizontalHeader().setSectionResizeMode(6, QtWidgets.QHeaderView.Stretch)
+        self.stats_table.verticalHeader().setVisible(False)
+        self.stats_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.stats_table.setSortingEnabled(True)
+        stats_label = QtWidgets.QLabel("Times are medians over every recorded session, download and extraction.")
+        stats_label.setStyleSheet("color: white;")
+        self.cache_stats_label = QtWidgets.QLabel()
+        self.cache_stats_label.setStyleSheet("color: white;")
+        self.tab4_layout.addWidget(stats_label)
+        self.tab4_layout.addWidget(self.stats_table)
+        self.tab4_layout.addWidget(self.cache_stats_label)
+        # Read when the tab is opened, the file is only appended to while the launcher runs
+        self.tab_widget.currentChanged.connect(lambda index: index == 4 and self.refresh_stats())
+
+    def refresh_stats(self):
+        def seconds_text(seconds):
+            return "" if seconds is None else f"{seconds:.2f}s"
+
+        summary = self.telemetry.summary()
+        self.stats_table.setSortingEnabled(False)
+        self.stats_table.setRowCount(len(summary))
+        for row, (version, stats) in enumerate(sorted(summary.items())):
+            playtime = int(stats["playtime_seconds"])
+            cells = [
+                version,
+                str(stats["sessions"]),
+                f"{playtime // 3600}h {playtime % 3600 // 60:02d}m",
+                seconds_text(stats["median_launch_prep_seconds"]),
+                seconds_text(stats["median_backup_seconds"]),
+                seconds_text(stats["median_extraction_seconds"]),
+                " ".join(f"{mbps:.1f}" for mbps in stats["download_mbps"][-10:])
+            ]
+            for column, text in enumerate(cells):
+                self.stats_table.setItem(row, column, QtWidgets.QTableWidgetItem(text))
+        self.stats_table.setSortingEnabled(True)
+        self.cache_stats_label.setText(self.description_cache.stats_text())
+
     def setupInfoTab(self):
         self.tab3_layout = QtWidgets.QVBoxLayout(self.tabs[2])
         
@@ -538,8 +961,8 @@ class VoidLauncher(QMainWindow):
     def connectActions(self):
         initial_index = 2 if not self.config.get_disable_initial_dialog() else 0
         self.tab_widget.setCurrentIndex(initial_index)
-        self.versions_list.itemSelectionChanged.connect(self.load_selected_description)
-        self.game_name_list.itemSelectionChanged.connect(self.load_selected_game_exe)
+        self.versions_list.selectionModel().selectionChanged.connect(lambda *args: self.load_selected_description())
+        self.game_name_list.selectionModel().selectionChanged.connect(lambda *args: self.load_selected_game_exe())
         self.download_button.clicked.connect(self.showDownloadDialog)
         self.reload_data.clicked.connect(self.refetch)
         self.launch_button.clicked.connect(self.launch_game)
@@ -548,7 +971,42 @@ class VoidLauncher(QMainWindow):
         self.add_game_install_button.clicked.connect(self.add_game_install)
         self.refesh_library.clicked.connect(lambda: self.fetch_game_exe(self.game_destination_path))
         self.game_backup_path_button.clicked.connect(self.open_game_backup_folder)
+        self.snapshots_button.clicked.connect(self.show_snapshots)
+        self.pause_download_button.clicked.connect(lambda: self.control_selected_download(self.download_worker.download_queue.pause))
+        self.resume_download_button.clicked.connect(lambda: self.control_selected_download(self.download_worker.download_queue.resume))
+        self.move_download_up_button.clicked.connect(lambda: self.control_selected_download(lambda job: self.download_worker.download_queue.move(job, -1)))
+        self.move_download_down_button.clicked.connect(lambda: self.control_selected_download(lambda job: self.download_worker.download_queue.move(job, 1)))
+        self.remove_download_button.clicked.connect(lambda: self.control_selected_download(self.download_worker.download_queue.remove))
+        self.verify_archives_button.clicked.connect(self.verify_archives)
+        self.install_store_mode_input.currentIndexChanged.connect(self.set_install_store_mode)
+        self.install_store_report_button.clicked.connect(lambda: self.download_worker.install_store_thread("report"))
+        self.install_store_collect_button.clicked.connect(lambda: self.download_worker.install_store_thread("collect"))
+        self.max_concurrent_downloads_input.valueChanged.connect(self.set_max_concurrent_downloads)
+        self.bandwidth_limit_input.valueChanged.connect(self.set_bandwidth_limit)
+        self.base_url_input.editingFinished.connect(lambda: self.config.set_base_url(self.base_url_input.text().strip() or UPSTREAM_URL))
+        self.mirror_serve_toggle.toggled.connect(self.config.set_mirror_serve)
+        # Not on valueChanged, typing 65000 would restart the server on port 6500 first
+        self.mirror_port_input.editingFinished.connect(lambda: self.config.set_mirror_port(self.mirror_port_input.value()))
+        self.delta_upgrades_toggle.toggled.connect(self.config.set_delta_upgrades)
+        self.config_notifier = ConfigNotifier()
+        self.config_notifier.changed.connect(self.config_changed)
     
+    pyqtSlot(str, str, str)
+    def config_changed(self, section, option, value):
+        if option == "disable_initial_dialog":
+            self.toggle_startup_button.setChecked(value == "True")
+        elif option == "game_destination_folder":
+            self.game_destination_path = value
+            self.download_worker.game_destination_path = value
+            self.game_fetch_worker.game_destination_path = value
+            self.fetch_game_exe(value)
+        elif option == "max_concurrent_downloads":
+            self.download_worker.download_queue.set_max_concurrent(int(value))
+        elif option == "bandwidth_limit_kbps":
+            self.download_worker.download_queue.set_bandwidth_limit(int(value) * 1024)
+        elif section == "Mirror" and option in ("serve", "port"):
+            self.update_mirror_server()
+
     def toggleStartupDialog(self):
         # Update the configuration based on the checkbox state
         self.config.set_disable_initial_dialog(self.toggle_startup_button.isChecked())
@@ -575,7 +1033,7 @@ class VoidLauncher(QMainWindow):
                     # Create a subfolder with the name of the parent folder
                     destination_folder = os.path.join(self.game_destination_path, parent_name)
                     try:
-                        shutil.copytree(folder_dialog, destination_folder, dirs_exist_ok=True)
+                        shutil.copytree(folder_dialog, destination_folder, dirs_exist_ok=True, copy_function=self.install_copy_function())
                         subprocess.Popen(['explorer', destination_folder], shell=True)
                     except Exception as e:
                         QMessageBox.critical(None, "Error", f"An error occurred: {str(e)}")
@@ -587,12 +1045,33 @@ class VoidLauncher(QMainWindow):
                         # Create a subfolder named "WindowsNoEditor" for "votv.exe"
                         destination_folder = os.path.join(self.game_destination_path, parent_name, "WindowsNoEditor")
                         try:
-                            shutil.copytree(os.path.dirname(votv_exe_path), destination_folder, dirs_exist_ok=True)
+                            shutil.copytree(os.path.dirname(votv_exe_path), destination_folder, dirs_exist_ok=True, copy_function=self.install_copy_function())
                         except Exception as e:
                             QMessageBox.critical(None, "Error", f"An error occurred: {str(e)}")
                     else:
                         QMessageBox.warning(None, "Warning", "No 'votv.exe' found in the selected folder or its subfolders.")
    
+    def install_copy_function(self):
+        mode = self.config.get_install_store_mode()
+        store = InstallStore(self.game_destination_path, mode)
+        if mode == "off" or (mode == "reflink" and not store.supports_reflinks()):
+            return shutil.copy2
+        return store.copy_function
+
+    pyqtSlot(str)
+    def install_store_report(self, message):
+        QMessageBox.information(self, "Install Store", message, QMessageBox.Ok)
+
+    def set_install_store_mode(self, index):
+        mode = self.install_store_mode_input.itemData(index)
+        if mode == "reflink" and not InstallStore(self.game_destination_path, mode).supports_reflinks():
+            QMessageBox.warning(self, "Install Store", "The library folder is on a file system without reflinks (they need btrfs or XFS on Linux). Use hard links or leave deduplication off.", QMessageBox.Ok)
+            self.install_store_mode_input.blockSignals(True)
+            self.install_store_mode_input.setCurrentIndex(max(self.install_store_mode_input.findData(self.config.get_install_store_mode()), 0))
+            self.install_store_mode_input.blockSignals(False)
+            return
+        self.config.set_install_store_mode(mode)
+
     def open_game_backup_folder(self):
         if self.game_destination_path:
             game_backups_path = os.path.join(self.script_directory, "game backups")
@@ -627,56 +1106,92 @@ class VoidLauncher(QMainWindow):
             self.action_button.setDisabled(True)
 
     def showDownloadDialog(self):       
-        if self.selected_version in self.game_fetch_worker.get_version_download_link_map():
-            selected_download_link =  self.game_fetch_worker.get_version_download_link_map()[self.selected_version]
-            print(self.selected_version)
+        download_link_map = self.game_fetch_worker.get_version_download_link_map()
+        selected_versions = [version for version in self.versions_list.selected_texts() if version in download_link_map]
+        if selected_versions:
+            print(selected_versions)
+            version_text = f'"{selected_versions[0]}"' if len(selected_versions) == 1 else f"{len(selected_versions)} versions"
             download_dialog = QMessageBox()
             download_dialog.setWindowTitle("Download Confirmation")
-            download_dialog.setText(f'Would you like to download "{self.selected_version}"?\n\nFiles provided by entechcore at invotek.net')
+            download_dialog.setText(f'Would you like to download {version_text}?\n\nFiles provided by entechcore at invotek.net')
             download_dialog.setStandardButtons(QMessageBox.Ok | QMessageBox.Cancel)
             download_dialog.setDefaultButton(QMessageBox.Ok)
 
             result = download_dialog.exec_()
             if result == QMessageBox.Ok:
-                download_function = partial(self.download_file, selected_download_link)
-                threading.Thread(target=download_function).start()
+                for version in selected_versions:
+                    expected_sha256 = self.game_fetch_worker.version_sha256_map.get(version)
+                    # A patch against an installed neighbour when the mirror can make one
+                    delta_url = delta_source(self.game_fetch_worker.catalog, version, self.game_destination_path)
+                    self.download_worker.queue_download(version, download_link_map[version], expected_sha256, delta_url)
         else:
             print(f"No exact matching version found for '{self.selected_version}'")
 
-    def download_file(self, url):        
-        self.progress_dialog = QProgressDialog(f'Downloading "{self.selected_version}"', 'Cancel', 0, 100, self)
-        self.progress_dialog.setWindowModality(Qt.WindowModal)
-        self.progress_dialog.setAutoClose(True)
-        cancel_buttons = self.progress_dialog.findChildren(QPushButton)
-        self.progress_dialog.canceled.connect(self.cancel_download)
-        if cancel_buttons:
-            cancel_buttons[0].hide()
-        self.progress_dialog.setParent(self)
-        self.progress_dialog.setWindowTitle("Downloading")
-        QtWidgets.qApp.processEvents()
-
-        self.download_worker.start_download(url)
-    
-    pyqtSlot(int)
-    def update_download_progress(self, progress):
-        self.progress_dialog.setValue(progress)        
-
     pyqtSlot()
-    def cancel_download(self):        
-        self.download_worker.cancelled = True 
-        self.progress_dialog.close()
-        msg_box = QMessageBox(self)
-        msg_box.setWindowModality(Qt.ApplicationModal)
-        msg_box.setIcon(QMessageBox.Information)
-        msg_box.setWindowTitle("Download Cancelled!")
-        msg_box.setText(f'"{self.selected_version}" has stopped downloading!')
-        msg_box.addButton(QMessageBox.Ok)        
-        self.progress_dialog.close()
-        msg_box.exec_()
-        
+    def refresh_download_queue(self):
+        jobs = list(self.download_worker.download_queue.jobs)
+        selected_job = self.selected_download_job()
+        self.download_queue_table.setRowCount(len(jobs))
+        for row, job in enumerate(jobs):
+            version_item = QtWidgets.QTableWidgetItem(job.version)
+            version_item.setData(Qt.UserRole, job)
+            self.download_queue_table.setItem(row, 0, version_item)
+            self.download_queue_table.setItem(row, 1, QtWidgets.QTableWidgetItem(job.state))
+            progress_bar = QtWidgets.QProgressBar()
+            self.download_queue_table.setCellWidget(row, 2, progress_bar)
+            self.download_queue_table.setItem(row, 3, QtWidgets.QTableWidgetItem(""))
+            self.update_job_row(row, job)
+            if job is selected_job:
+                self.download_queue_table.selectRow(row)
+
+    pyqtSlot(object)
+    def update_job_progress(self, job):
+        for row in range(self.download_queue_table.rowCount()):
+            if self.download_queue_table.item(row, 0).data(Qt.UserRole) is job:
+                self.update_job_row(row, job)
+                return
+
+    def update_job_row(self, row, job):
+        self.download_queue_table.item(row, 1).setText(job.error if job.state == "Failed" else job.state)
+        self.download_queue_table.cellWidget(row, 2).setValue(job.progress)
+        speed_text = f"{job.speed / 1024 / 1024:.1f} MB/s" if job.state == "Downloading" else ""
+        self.download_queue_table.item(row, 3).setText(speed_text)
+
+    def selected_download_job(self):
+        row = self.download_queue_table.currentRow()
+        item = self.download_queue_table.item(row, 0) if row >= 0 else None
+        return item.data(Qt.UserRole) if item else None
+
+    def control_selected_download(self, action):
+        job = self.selected_download_job()
+        if job:
+            action(job)
+
+    def set_max_concurrent_downloads(self, value):
+        Config.set_max_concurrent_downloads(value)
+
+    def set_bandwidth_limit(self, value):
+        Config.set_bandwidth_limit(value)
+
+    def verify_archives(self):
+        expected_sha256s = {}
+        for version, download_link in self.game_fetch_worker.get_version_download_link_map().items():
+            if version in self.game_fetch_worker.version_sha256_map:
+                expected_sha256s[download_link.split("/")[-1]] = self.game_fetch_worker.version_sha256_map[version]
+        self.verify_archives_button.setEnabled(False)
+        self.download_worker.verify_archives_thread(expected_sha256s)
+
+    pyqtSlot(list)
+    def verification_finished(self, results):
+        self.verify_archives_button.setEnabled(True)
+        if not results:
+            QMessageBox.information(self, "Verify Archives", "There are no downloaded archives to verify.", QMessageBox.Ok)
+            return
+        lines = "\n".join(f"{file}: {status}" for file, status in results)
+        QMessageBox.information(self, "Verify Archives", lines, QMessageBox.Ok)
+
     pyqtSlot(str)
     def download_error(self, error_message):
-        self.progress_dialog.close()
         QMessageBox.critical(self, "Download Error", f"Download error: {error_message}", QMessageBox.Ok)
         print(f"Download Error: {error_message}")
 
@@ -684,190 +1199,141 @@ class VoidLauncher(QMainWindow):
     def download_finished(self):        
         print("Download Completed")
 
-    pyqtSlot()
-    def extract_file(self):                                                               
-        QtWidgets.qApp.processEvents()        
-        #selected_item = self.versions_list.currentItem()
-        #selected_version = selected_item.text()
-        #self.extract_dialog = QProgressDialog(f'"Extracting" {selected_version}', "Cancel", 0, 100, self)
-        #self.extract_dialog.setWindowModality(Qt.WindowModal)        
-        #self.extract_dialog.setAutoClose(True)
-        #cancel_buttons = self.extract_dialog.findChildren(QPushButton)
-        #if cancel_buttons:
-        #    cancel_buttons[0].hide()
-        #self.extract_dialog.setWindowTitle("Extracting")
-        #self.extract_dialog.show()
-
-        self.download_worker.extract_and_move_thread()
+    pyqtSlot(str)
+    def extraction_error(self, error_message):
+        QMessageBox.critical(self, "Extraction Error", f"Extraction error: {error_message}", QMessageBox.Ok)
 
     #pyqtSlot()
     #def update_extract_progress(self, progress):
         #self.extract_dialog.setValue(progress)   
 
-    pyqtSlot()
-    def extraction_finished(self):   
-        selected_item = self.versions_list.currentItem()
-        selected_version = selected_item.text()
-        self.fetch_game_exe(self.game_destination_path)
+    pyqtSlot(str)
+    def extraction_finished(self, selected_version):   
+        # The watcher normally got here first, this only covers folders it cannot watch
+        self.schedule_library_update()
         QMessageBox.information(self, "Download Completed", f'"{selected_version}" has installed successfully.\n\nCheck your library!', QMessageBox.Ok)
         print("Download Completed")
 
     def fetch_game_exe(self, folder_path):
+        # The scan runs off the GUI thread, the library list is filled in one go when it is done
+        threading.Thread(target=self.scan_game_exe, args=(folder_path,), daemon=True).start()
+
+    def scan_game_exe(self, folder_path):
         try:
-            self.game_name_list.clear()
             if not os.path.exists(folder_path):
                 print(f"Directory '{folder_path}' does not exist.")
+                self.library_names_ready.emit([], [])
                 return
-            game_exe = []
 
-            self.search_for_votv_exe(folder_path, game_exe)
+            game_exe = self.library_index.refresh(folder_path)
 
             if not game_exe:
                 print("No 'VotV.exe' found.")
-                return
 
-            for game_path in game_exe:
-                self.game_name_list.addItem(game_path)  # Add each path to the list
+            self.library_names_ready.emit(game_exe, self.library_index.watched_folders())
         except Exception as e:
             print(f"An error occurred in fetch_game_exe: {str(e)}")
-    
-    def search_for_votv_exe(self, path, game_exe):
-        for root, _, files in os.walk(path):
-            for file in files:
-                if file == 'VotV.exe':
-                    game_path = os.path.join(root, file)
-                    parent_folder = os.path.basename(os.path.dirname(root))
-                    game_exe.append(parent_folder)  # Append the full path to 'VotV.exe' to the list
-                    
+
+    def schedule_library_update(self, path=None):
+        # Extraction and copies fire a burst of events, only the last one in a quiet period triggers a refresh
+        self.library_update_timer.start()
+
+    pyqtSlot(list, list)
+    def apply_library_scan(self, names, folders):
+        current = self.library_model.names
+        if not current:
+            self.library_model.set_names(names)
+        else:
+            listed = set(names)
+            self.library_model.remove_names([name for name in current if name not in listed])
+            shown = set(self.library_model.names)
+            for name in names:
+                if name not in shown:
+                    self.library_model.insert_names(bisect.bisect(self.library_model.names, name), [name])
+
+        watched = set(self.library_watcher.directories())
+        wanted = set(folders)
+        if watched - wanted:
+            self.library_watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self.library_watcher.addPaths(list(wanted - watched))
+
     def load_selected_description(self):
-        selected_item = self.versions_list.currentItem()
+        selected_item = self.versions_list.current_text()
         if selected_item:
-            self.selected_version = selected_item.text()
+            self.selected_version = selected_item
+
+            self.description_cache.show(self.selected_version)
+            self.description_cache.prefetch_around(self.versions_model.names, self.versions_list.currentIndex().row())
 
-            description = self.game_fetch_worker.get_final_descriptions_map().get(self.selected_version, "Description not found")
-            self.description_text.setHtml(description)
+    pyqtSlot(list)
+    def descriptions_changed(self, versions):
+        self.description_cache.invalidate(versions)
+        if self.selected_version in versions:
+            self.load_selected_description()
 
     def load_selected_game_exe(self):
-        self.selected_game_name = self.game_name_list.currentItem().text()
-        if self.selected_game_name:
-            game_path_to_search = os.path.join(self.game_destination_path, self.selected_game_name)            
-               
-        def search_for_votv_exe():
-            for root, _, files in os.walk(game_path_to_search):
-                for file in files:
-                    if file == 'VotV.exe':
-                        self.game_exe = file 
-                        self.game_path = os.path.join(root, file)
+        self.selected_game_name = self.game_name_list.current_text()
+        # Never left pointing at the exe of the previous selection
+        self.game_path = ""
+        if not self.selected_game_name:
+            return
+        game_path = self.library_index.lookup(self.selected_game_name)
+        if not game_path or not os.path.isfile(game_path):
+            # Changed since the last refresh, look at this one install again
+            game_path = self.library_index.update_install(self.selected_game_name)
+        if game_path:
+            self.game_exe = os.path.basename(game_path)
+            self.game_path = game_path
         print(self.selected_game_name)
 
-        search_for_votv_exe()  
-   
-    def is_game_running(self):
-        for proc in psutil.process_iter(attrs=['pid', 'name']):
-            try:
-                process_name = proc.info['name'].lower()
-                for name in self.selected_game_names:
-                    if name.lower() in process_name:
-                        return True
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                pass
-        return False
-        
-        
+    def flush_game_log(self):
+        # One append per tick however many lines came in, so a chatty game never repaints per line
+        lines = self.game_supervisor.take_lines()
+        if lines:
+            self.game_log_view.appendPlainText("\n".join(lines))
+
     def launch_game(self):
+        if self.game_supervisor.running():
+            QMessageBox.warning(self, "Launch Game", "The game is already running.", QMessageBox.Ok)
+            return
+        if not self.selected_game_name or not self.game_path:
+            # prepare() would switch the save profiles to a version that can not be started
+            QMessageBox.warning(self, "Launch Game", "Select an installed version in the library first.", QMessageBox.Ok)
+            return
         try:
-            source_backup_folder = os.path.join(self.script_directory, "game backups", self.selected_game_name, "Saved")
-            source_save_folder = os.path.join(os.path.expanduser("~"), "AppData", "Local", "VotV", "Saved")
-
-            if not os.path.exists(source_backup_folder):
-                os.makedirs(source_backup_folder, exist_ok=True)
-
-            if not os.path.exists(source_save_folder):
-                os.makedirs(source_save_folder)
-                
-            self.move_game_data(source_backup_folder, source_save_folder)
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            process = subprocess.Popen(self.game_path, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-            game_pid = process.pid
-            print(f"Game PID: {game_pid}")
-
-            print("Game has started. Now waiting for it to close...")
-            self.hide()
-
-            while True:
-                stdout = process.stdout.readline()
-                stderr = process.stderr.readline()
-                if not stdout and not stderr and process.poll() is not None:
-                    break
-                if stdout:
-                    print(f"Game Output: {stdout.strip()}")
-                if stderr:
-                    print(f"Game Error: {stderr.strip()}")
-
-            self.perform_backup(source_backup_folder, source_save_folder)
-            print("backup done")
-            self.show()
+            self.launch_prep_seconds = self.game_launcher.prepare(self.selected_game_name)
+            self.game_supervisor.launch(self.selected_game_name, self.game_path)
 
         except Exception as e:
             print(f"Error launching the game: {str(e)}")
 
-    def move_game_data(self, source_backup_folder, source_save_folder):
-        backup_folder_path = os.path.join(source_backup_folder, self.selected_game_name)
-
-        if not os.path.exists(backup_folder_path):
-            print(f"No backup data found for '{self.selected_game_name}'.")
+    pyqtSlot(str, int)
+    def game_started(self, version, pid):
+        print("Game has started. Now waiting for it to close...")
+        self.game_log_view.clear()
+        self.game_log_timer.start()
+        # Minimized, not hidden, there is no tray icon and the Library tab shows the game output while it runs
+        self.showMinimized()
+
+    pyqtSlot(str, int, float)
+    def game_exited(self, version, returncode, runtime):
+        self.game_log_timer.stop()
+        self.flush_game_log()
+        self.showNormal()
+        self.activateWindow()
+        # The saves already live in their profile, the copy in "game backups" is only a spare and can run behind
+        self.game_launcher.retention = self.config.get_snapshot_retention()
+        threading.Thread(target=self.game_launcher.finish, args=(version, returncode, runtime, self.launch_prep_seconds), daemon=True).start()
+
+    def show_snapshots(self):
+        if not self.selected_game_name:
+            QMessageBox.warning(self, "Save Snapshots", "Select a version in the library first.", QMessageBox.Ok)
             return
-
-        for item in os.listdir(backup_folder_path):
-            source_item = os.path.join(backup_folder_path, item)
-            destination_item = os.path.join(source_save_folder, item)
-
-            if os.path.getsize(source_item) == 0:
-                print(f"Skipping empty file: {source_item}")
-                continue
-
-            shutil.move(source_item, destination_item)
-
-        print(f"Game data for '{self.selected_game_name}' moved to '{source_save_folder}'.")
-
-    def perform_backup(self, source_backup_folder, source_save_folder):
-        print("starting backup")
-        try:
-            print("trying backup")
-            if os.path.exists(source_backup_folder):
-                os.makedirs(source_backup_folder, exist_ok=True)
-
-            while self.is_game_running():
-                time.sleep(1)
-
-            print("Game has closed. Starting backup...")
-
-            for root, _, files in os.walk(source_save_folder):
-                for item in files:
-                    source_item = os.path.join(root, item)
-
-                    try:
-                        if os.path.getsize(source_item) == 0:
-                            print(f"Skipping empty file: {source_item}")
-                            continue
-
-                        relative_path = os.path.relpath(source_item, source_save_folder)
-                        destination_item = os.path.join(source_backup_folder, relative_path)
-
-                        os.makedirs(os.path.dirname(destination_item), exist_ok=True)
-
-                        shutil.copy2(source_item, destination_item)
-                    except Exception as e:
-                        print(f"Error copying file: {source_item} - {str(e)}")
-
-            print("Backup completed successfully.")
-
-        except Exception as e:
-            print(f"Error during backup: {str(e)}")
+        SnapshotDialog(self.game_launcher, self.selected_game_name, self).exec_()
 
     def refetch(self):
-        if not os.path.exists('cached_data.pk1'):
+        if not self.game_fetch_worker.catalog_store.exists():
             # Show a pop-up dialog indicating that data caching is in progress
             wait_dialog = QMessageBox()
             wait_dialog.setWindowTitle("Wait for data caching")
@@ -877,16 +1343,13 @@ class VoidLauncher(QMainWindow):
 
         download_dialog = QMessageBox()
         download_dialog.setWindowTitle("Are you sure?")
-        download_dialog.setText(f'Finds all available downloads of VotV from invotek.net.\n\nThis may take a while.')
+        download_dialog.setText(f'Checks invotek.net for new downloads of VotV and changed changelogs.')
         download_dialog.setStandardButtons(QMessageBox.Ok | QMessageBox.Cancel)
         download_dialog.setDefaultButton(QMessageBox.Ok)
         result = download_dialog.exec_()
 
         if result == QMessageBox.Ok:
-            self.versions_list.clear()
-            self.description_text.clear()
-            os.remove('cached_data.pk1')
-            fetch_function = partial(self.game_fetch_worker.fetch_game_versions)
+            fetch_function = partial(self.game_fetch_worker.refresh_game_versions)
             threading.Thread(target=fetch_function).start()
             
     pyqtSlot()
@@ -905,242 +1368,50 @@ def load_custom_font():
             if font_info:
                 app = QtWidgets.QApplication.instance()
                 if app:
-                    app.setFont(QtGui.QFont(font_info[0]))
+                    QtWidgets.QApplication.instance().setFont(QtGui.QFont(font_info[0]))
 
 class GameFetchWorker(QtCore.QObject):
+    # CatalogFetcher with its callbacks turned into signals, the Downloads tab widgets belong to the window
 
     game_fetch_worker_fetch_game_exe = QtCore.pyqtSignal(str)
-    game_fetch_worker_load_data = QtCore.pyqtSignal()
     update_fetch_progress = QtCore.pyqtSignal(str)
+    versions_reset = QtCore.pyqtSignal(list)
+    versions_inserted = QtCore.pyqtSignal(int, list)
+    versions_removed = QtCore.pyqtSignal(list)
+    descriptions_changed = QtCore.pyqtSignal(list)
 
     def __init__(self):        
-        self.config = Config()
-        self.version_name_map = {}
-        self.versions_list =  CustomListWidget()
-        self.version_names = []
-        self.version_download_link_map = {}
-        self.version_description_map = {}
-        self.final_descriptions_map = {}
-        self.description_text =  QtWidgets.QTextBrowser()  
-        self.html_content = ""                
-        last_refresh_time = self.config.get_last_refresh_time()
-        initial_button_text = "Refresh Versions List | Last Refreshed: " + last_refresh_time        
-        self.reload_data = QtWidgets.QPushButton(initial_button_text) 
-        self.game_destination_path = Config.get_game_destination_folder()
-        self.html_content_and_style =  """
-            <!DOCTYPE html>
-            <html>
-            <head>
-            <style>
-                body {
-                    background-color: #1C1C1C;
-                    color: white;
-                    font-size: 15px;
-                }
-                p {
-                    font-size: 18px;
-                }
-                body h1 {
-                    font-size: 20px;
-                }
-                body h1 {
-                    font-size: 20px;
-                }
-            </style>
-            </head>
-            <body>
-            """
         super().__init__()
+        self.catalog = CatalogFetcher(
+            on_progress=self.update_fetch_progress.emit,
+            on_versions_reset=self.versions_reset.emit,
+            on_versions_inserted=self.versions_inserted.emit,
+            on_versions_removed=self.versions_removed.emit,
+            on_descriptions_changed=self.descriptions_changed.emit
+        )
+        self.catalog_store = self.catalog.catalog_store
+        self.game_destination_path = Config.get_game_destination_folder()
 
-    def get_version_name_map(self):
-        return self.version_name_map   
-
-    def get_versions_list(self):
-        return self.versions_list   
+    @property
+    def version_download_link_map(self):
+        return self.catalog.version_download_link_map
 
-    def get_version_names(self):
-        return self.version_names   
+    @property
+    def version_sha256_map(self):
+        return self.catalog.version_sha256_map
 
     def get_version_download_link_map(self):
-        return self.version_download_link_map   
-
-    def get_version_description_map(self):
-        return self.version_description_map   
-
-    def get_final_descriptions_map(self):
-        return self.final_descriptions_map
-
-    def get_html_content_and_style(self):
-        return self.html_content_and_style      
-
-    def get_description_text(self):
-        return self.description_text   
-
-    def get_reload_data(self):
-        return self.reload_data   
+        return self.catalog.version_download_link_map
 
     def fetch_game_versions(self):    
-        if not os.path.exists('cached_data.pk1') or not os.access('cached_data.pk1', os.R_OK):
-            url = "https://www.invotek.net/releases"
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-
-                if response.status_code == 200:
-                    html = response.text
-                    soup = BeautifulSoup(html, 'html.parser')
-                    release_containers = soup.find_all('div', class_='release-container')
-                    self.process_release_containers(release_containers)
-            except requests.exceptions.RequestException as e:
-                print(f"Error: {e}")
-            self.fetch_descriptions()       
-        else:
-            self.load_data()
-
-    def process_release_containers(self, release_containers):
-        for release_container in release_containers:
-            h1_tags = release_container.find_all('h1')
-            version_name = " ".join(tag.get_text().strip() for tag in h1_tags).strip()
-            self.version_name_map[version_name] = ""
-            item = QtWidgets.QListWidgetItem(version_name)
-            self.versions_list.addItem(item)
-            self.version_names.append(version_name)
-
-            self.current_description = ""
-            download_link_div = release_container.find('div', class_='download-link')
-            if download_link_div:
-                a_child = download_link_div.find('a')
-                if a_child:
-                    download_link = a_child.get('href')
-                    self.version_download_link_map[version_name] = f"https://www.invotek.net{download_link}"
-
-            p_tags = release_container.find_all(['p', 'a'])
-            descriptions = [self.process_tag(tag) for tag in p_tags]
-            self.current_description = "\n".join(filter(None, descriptions))
-            self.version_description_map[version_name] = self.current_description
-
-    def process_tag(self, tag):
-        result = ""
-        result_2 = "" 
-
-        if tag.name == 'p':
-            text = tag.get_text()
-            if all(keyword not in text for keyword in ['SHA256:', 'Download', 'Website changelog / Discord changelog', 'changelog']):
-                result = text + '\n' 
-            if all(keyword not in text for keyword in ['SHA256:', 'Download', 'Website changelog / Discord changelog', '🕛']):
-                result_2 = text + '\n'
-        elif tag.name == 'a':
-            text = tag.get_text()
-            if all(keyword not in text for keyword in ['SHA256:', 'Download', '🕛']):
-                description_link = tag.get('href')
-                if not description_link.startswith("https"):
-                    description_link = f"https://www.invotek.net{description_link}"
-                result = f"{result_2} {text} {description_link}\n"
-        return result
-    
-    def fetch_descriptions(self):
-        for selected_version, description in self.version_description_map.items():
-            modified_description = f"<p>{description}</p>\n\n"
-            first_link = self.find_first_link(description)
-            self.html_content =  self.html_content_and_style
-            if first_link:
-                if first_link.endswith('.txt'):
-                    link_response = requests.get(first_link)
-                    if link_response.status_code == 200:
-                        text = link_response.text
-
-                        lines = text.split('\n')
-                        modified_lines = []
-
-                        for line in lines:
-                            if '>' in line:
-                                line = line.replace('>', '\n\n>')
-                            if ' -' in line:
-                                line = line.replace(' -', '\n\n -')
-                            modified_lines.append(line)
-                        modified_text = '\n'.join(modified_lines)
-
-                        modified_description += modified_text
-                else:
-                    link_response = requests.get(first_link)
-                    if link_response.status_code == 200:
-                        link_html = link_response.text
-                        link_soup = BeautifulSoup(link_html, 'html.parser')
-                        post_body_section = link_soup.find('section', class_='object_text_widget_widget base_widget user_formatted post_body')
-                        if post_body_section:
-                            self.html_content +=str(post_body_section)
-                            modified_description += self.html_content
-                        else:
-                            body_text = link_soup.body.get_text() if link_soup.body else ""
-                            if body_text.strip():
-                                modified_description += body_text.strip()
-            modified_description = re.sub(r'http[s]?://\S+', '', modified_description)
-            modified_description = re.sub(r'Discord changelog|website changelog|to Discord post', '', modified_description, flags=re.IGNORECASE)
-            modified_description = re.sub(r'https://discord\.com', '', modified_description)
-            self.final_descriptions_map[selected_version] = modified_description      
-            current_time = QDateTime.currentDateTime().toString(Qt.DefaultLocaleLongDate)
-            self.reload_data.setText("Refresh Versions List | Last Refreshed: " + current_time)
-
-            # Set the last refresh time in the configuration
-            Config.set_last_refresh_time(current_time)
-        self.save_data()    
-
-        
-    def save_data(self):
-        if not isinstance(self.version_name_map, dict):
-            raise ValueError("self.version_name_map should be a dictionary")
-
-        if not isinstance(self.final_descriptions_map, dict):
-            raise ValueError("self.final_descriptions_map should be a dictionary")
-
-        data = {
-            'version_name_map': self.version_name_map,
-            'final_descriptions_map': self.final_descriptions_map,
-            'version_download_link_map': self.version_download_link_map
-        }
-
-        # Save data as a pickle file
-        with open('cached_data.pk1', 'wb') as pickle_file:
-            pickle.dump(data, pickle_file, protocol=pickle.HIGHEST_PROTOCOL, fix_imports=False)
-
-        # Save data as a text file
-        with open('cached_data.txt', 'w', encoding='utf-8') as text_file:
-            for key, value in data.items():
-                text_file.write(f"{key}:\n")
-                if isinstance(value, dict):
-                    for subkey, subvalue in value.items():
-                        text_file.write(f"  {subkey}: {subvalue}\n")
-                else:
-                    text_file.write(f"  {value}\n")
-
-        # Print a confirmation message
-        print("Data saved as cached_data.pk1 and cached_data.txt")
-
-
-    def load_data(self):        
         self.game_fetch_worker_fetch_game_exe.emit(self.game_destination_path)
-        if os.path.exists('cached_data.pk1') and os.access('cached_data.pk1', os.R_OK):
-            with open('cached_data.pk1', 'rb') as file:
-                try:
-                    loaded_data = pickle.load(file, encoding='utf-8')
-                    self.version_name_map = loaded_data['version_name_map']
-                    self.final_descriptions_map = loaded_data['final_descriptions_map'] 
-                    self.version_download_link_map = loaded_data['version_download_link_map']
-                    self.versions_list.clear()
-                    for version_name, description in self.final_descriptions_map.items():
-                        version_name = ''.join(c for c in version_name if ord(c) < 128)
-                        description = ''.join(c for c in description if ord(c) < 128)   
-                        item = QtWidgets.QListWidgetItem(version_name)
-                        self.versions_list.addItem(item)
-                except (pickle.UnpicklingError, EOFError, Exception) as e:
-                    print(f"Error loading data from 'cached_data.pk1': {e}. Proceeding to fetch from the website.")
-        else:
-            print("The pickle file 'cached_data.pk1' does not exist or is not readable. Proceeding to fetch from the website.")
+        self.catalog.fetch_game_versions()
 
-    def find_first_link(self, text):
-        import re
-        urls = re.findall(r'(https?://[^\s]+)', text)
-        return urls[0] if urls else None
+    def refresh_game_versions(self):
+        self.catalog.refresh_game_versions()
+
+    def get_description(self, version_name):
+        return self.catalog.get_description(version_name)
 
 class TitleBar(QtWidgets.QDialog):
     def __init__(self, parent):
@@ -1256,13 +1527,20 @@ def QIcon_from_svg(svg_filepath, color='black'):
 
     return QIcon(img)
 
-if __name__ == "__main__":
-    import sys
+def main():
+    if sys.platform == "win32":
+        # Groups the taskbar button under our own icon instead of python.exe
+        import ctypes
+        icon_path = "resources/icons/icon.ico"
+        ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("VoidLauncher")
+        ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(icon_path)
     app = QtWidgets.QApplication(sys.argv)
     load_custom_font()
     download_worker = DownloadWorker()
     game_fetch_worker = GameFetchWorker()
     window = VoidLauncher(download_worker, game_fetch_worker)
-    window.show()
     sys.exit(app.exec_())
 
+if __name__ == "__main__":
+    main()
+
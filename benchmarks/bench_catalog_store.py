@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+from voidcore import CatalogStore
+
+# Roughly the size of a rendered changelog in the real cache
+DESCRIPTION = "<p>" + "Fixed a thing, added a thing, broke a thing. " * 90 + "</p>"
+
+
+def make_catalog(count):
+    version_names = [f"0.8.0_{i:05d}" for i in range(count)]
+    download_links = {name: f"https://www.invotek.net/releases/{name}.7z" for name in version_names}
+    release_texts = {name: f"{name} changelog https://www.invotek.net/changelogs/{name}.txt" for name in version_names}
+    descriptions = {name: f"<h1>{name}</h1>{DESCRIPTION}" for name in version_names}
+    return version_names, download_links, release_texts, descriptions
+
+
+def write_caches(directory, count):
+    version_names, download_links, release_texts, descriptions = make_catalog(count)
+    pickle_path = os.path.join(directory, f"cached_data_{count}.pk1")
+    with open(pickle_path, "wb") as pickle_file:
+        data = {
+            'version_name_map': {name: "" for name in version_names},
+            'final_descriptions_map': descriptions,
+            'version_download_link_map': download_links
+        }
+        pickle.dump(data, pickle_file, protocol=pickle.HIGHEST_PROTOCOL, fix_imports=False)
+
+    store = CatalogStore(os.path.join(directory, f"cached_data_{count}.db"))
+    store.save(version_names, download_links, release_texts, descriptions, {})
+    return pickle_path, store.path, version_names[count // 2]
+
+
+def measure_child(kind, path, selected_version):
+    # Runs in a fresh interpreter so nothing is warm except the OS file cache
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    if kind == "pickle":
+        with open(path, "rb") as file:
+            data = pickle.load(file, encoding='utf-8')
+        names = list(data['final_descriptions_map'])
+        list_ready = time.perf_counter() - start
+        description = data['final_descriptions_map'][selected_version]
+    else:
+        store = CatalogStore(path)
+        names = [name for name, _, _ in store.load_index()]
+        list_ready = time.perf_counter() - start
+        description = store.load_description(selected_version)
+
+    first_description = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert names and description
+    print(json.dumps({
+        "list_ready_ms": list_ready * 1000,
+        "first_description_ms": first_description * 1000,
+        "python_peak_kb": peak / 1024,
+        "rss_delta_kb": (process.memory_info().rss - rss_before) / 1024
+    }))
+
+
+def run_child(kind, path, selected_version):
+    output = subprocess.check_output([sys.executable, __file__, "--child", kind, path, selected_version])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start time and memory of the pickle cache vs the catalog store")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--child", nargs=3, metavar=("KIND", "PATH", "VERSION"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'versions':>8} {'cache':>7} {'list ready':>11} {'1st desc':>10} {'py peak':>10} {'rss delta':>10}")
+        for count in args.counts:
+            pickle_path, store_path, selected_version = write_caches(directory, count)
+            for kind, path in (("pickle", pickle_path), ("sqlite", store_path)):
+                result = run_child(kind, path, selected_version)
+                print(f"{count:>8} {kind:>7} {result['list_ready_ms']:>9.1f}ms {result['first_description_ms']:>8.1f}ms "
+                      f"{result['python_peak_kb']:>8.0f}KB {result['rss_delta_kb']:>8.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voidcore import Installer, DeltaBuilder, file_sha256
+
+
+def make_builds(directory, files, size_mb, changed_percent):
+    # Two builds of the same game: most files identical, some with a few edits, one new file
+    rng = random.Random(42)
+    old_folder = os.path.join(directory, "src_old", "votv_old")
+    new_folder = os.path.join(directory, "src_new", "votv_new")
+    for index in range(files):
+        data = bytearray(rng.randbytes(size_mb * 1024 * 1024 // files))
+        path = os.path.join("WindowsNoEditor", "VotV", "Content", "Paks", f"pak_{index:03d}.pak")
+        for folder in (old_folder, new_folder):
+            os.makedirs(os.path.join(folder, os.path.dirname(path)), exist_ok=True)
+            if folder == new_folder and rng.random() * 100 < changed_percent:
+                for _ in range(8):
+                    offset = rng.randrange(len(data) - 4096)
+                    data[offset:offset + 4096] = rng.randbytes(4096)
+            with open(os.path.join(folder, path), "wb") as file:
+                file.write(data)
+    with open(os.path.join(new_folder, "WindowsNoEditor", "patch_notes.txt"), "w") as file:
+        file.write("Added things - fixed things\n" * 100)
+
+    archives = []
+    for folder in (old_folder, new_folder):
+        archive_path = os.path.join(directory, os.path.basename(folder) + ".zip")
+        with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for root, _, names in os.walk(folder):
+                for name in names:
+                    full_path = os.path.join(root, name)
+                    archive.write(full_path, os.path.relpath(full_path, os.path.dirname(folder)))
+        archives.append(archive_path)
+    return old_folder, new_folder, archives
+
+
+def written_bytes(folder, base_folder):
+    # Bytes that hit the disk, files linked to the installed build cost nothing
+    base_inodes = set()
+    for root, _, names in os.walk(base_folder):
+        base_inodes.update(os.stat(os.path.join(root, name)).st_ino for name in names)
+    total = 0
+    for root, _, names in os.walk(folder):
+        for name in names:
+            file_stat = os.stat(os.path.join(root, name))
+            if file_stat.st_ino not in base_inodes:
+                total += file_stat.st_size
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrading to the next build from the full archive vs from a delta against the installed one")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--files", type=int, default=64)
+    parser.add_argument("--changed-percent", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        old_folder, new_folder, (old_archive, new_archive) = make_builds(directory, args.files, args.size_mb, args.changed_percent)
+        base = {"version": "old", "archive_sha256": file_sha256(old_archive).hexdigest()}
+        target = {"version": "new", "archive_sha256": file_sha256(new_archive).hexdigest()}
+        bundle_path = os.path.join(directory, "votv_new.zip.vldelta")
+        started = time.perf_counter()
+        stats = DeltaBuilder().build(old_folder, new_folder, bundle_path, base, target)
+        print(f"delta built in {time.perf_counter() - started:.2f}s: {stats['copied']} unchanged, {stats['patched']} patched, {stats['full']} new")
+
+        print(f"{'mode':>18} {'transferred MB':>15} {'written MB':>11} {'install':>9}")
+        for mode, store_mode in (("full archive", "off"), ("delta", "off"), ("delta, hardlinks", "hardlink")):
+            library = os.path.join(directory, "library")
+            shutil.rmtree(library, ignore_errors=True)
+            shutil.copy(old_archive, os.path.join(directory, "old.zip"))
+            base_folder = Installer(library).install("old", os.path.join(directory, "old.zip"), base["archive_sha256"])
+
+            source = new_archive if mode == "full archive" else bundle_path
+            download = os.path.join(directory, "download" + os.path.splitext(source)[1])
+            shutil.copy(source, download)
+            transferred = os.path.getsize(download)
+            started = time.perf_counter()
+            install_folder = Installer(library, store_mode).install("new", download, target["archive_sha256"])
+            elapsed = time.perf_counter() - started
+            print(f"{mode:>18} {transferred / 1024 / 1024:>15.1f} {written_bytes(install_folder, base_folder) / 1024 / 1024:>11.1f} {elapsed:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
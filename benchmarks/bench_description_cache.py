@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5 import QtWidgets
+from VoidLauncher import DescriptionCache
+from voidcore import CatalogFetcher
+
+# A rendered changelog as it comes out of CatalogFetcher.render_description
+CHANGELOG = "".join(f"<p>&gt; Added thing {i} - fixed thing {i} - changed thing {i}</p>" for i in range(120))
+
+
+def make_descriptions(count):
+    style = CatalogFetcher().html_content_and_style
+    return {f"0.8.0_{i:05d}": f"{style}<h1>0.8.0_{i:05d}</h1>{CHANGELOG}</body></html>" for i in range(count)}
+
+
+def arrow_through(app, browser, names, show):
+    # One key press per version, down the list and back up, with the idle time between key presses
+    timings = []
+    for version in names + names[::-1]:
+        start = time.perf_counter()
+        show(version)
+        browser.repaint()
+        timings.append(time.perf_counter() - start)
+        app.processEvents()
+    timings.sort()
+    return sum(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Selecting versions one after the other, setHtml every time vs the description cache")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 300])
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv)
+    # The documents on screen belong to the cache, so every run keeps its own browser and cache alive
+    keep_alive = []
+
+    print(f"{'versions':>8} {'mode':>8} {'total':>9} {'median':>9} {'p95':>9} {'hits':>6} {'misses':>7}")
+    for count in args.counts:
+        descriptions = make_descriptions(count)
+        names = list(descriptions)
+        browser = QtWidgets.QTextBrowser()
+        browser.resize(800, 600)
+        browser.show()
+
+        total, median, p95 = arrow_through(app, browser, names, lambda version: browser.setHtml(descriptions[version]))
+        print(f"{count:>8} {'setHtml':>8} {total:>8.2f}s {median * 1000:>7.2f}ms {p95 * 1000:>7.2f}ms")
+
+        cache = DescriptionCache(descriptions.get, browser)
+        keep_alive.append((browser, cache))
+
+        def show(version):
+            cache.show(version)
+            cache.prefetch_around(names, names.index(version))
+
+        total, median, p95 = arrow_through(app, browser, names, show)
+        print(f"{count:>8} {'cache':>8} {total:>8.2f}s {median * 1000:>7.2f}ms {p95 * 1000:>7.2f}ms {cache.hits:>6} {cache.misses:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voidcore import SegmentedDownload, DownloadCancelled
+
+
+class RangeFileHandler(BaseHTTPRequestHandler):
+    # Serves one in-memory archive with Range support and a per-connection bandwidth limit
+    protocol_version = "HTTP/1.1"
+    payload = b""
+    bytes_per_second = 0
+
+    def do_GET(self):
+        total = len(self.payload)
+        start, end = 0, total - 1
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            first, _, last = range_header[len("bytes="):].partition("-")
+            start = int(first)
+            end = min(int(last), total - 1) if last else total - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", '"bench-archive"')
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        block = 256 * 1024
+        try:
+            for offset in range(start, end + 1, block):
+                data = self.payload[offset:min(offset + block, end + 1)]
+                self.wfile.write(data)
+                if self.bytes_per_second:
+                    time.sleep(len(data) / self.bytes_per_second)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Cancelled downloads drop their connections on purpose
+        pass
+
+
+def start_server(size_mb, bytes_per_second):
+    RangeFileHandler.payload = os.urandom(size_mb * 1024 * 1024)
+    RangeFileHandler.bytes_per_second = bytes_per_second
+    server = QuietServer(("127.0.0.1", 0), RangeFileHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, hashlib.sha256(RangeFileHandler.payload).hexdigest()
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def timed_download(url, destination, connections):
+    if os.path.exists(destination):
+        os.remove(destination)
+    start = time.perf_counter()
+    SegmentedDownload(url, destination, connections=connections).run()
+    return time.perf_counter() - start
+
+
+def interrupted_download(url, destination, stop_fraction):
+    # Cancel part way through, then run a fresh download of the same file
+    if os.path.exists(destination):
+        os.remove(destination)
+    download = None
+
+    def stop_early(bytes_written, total_size):
+        if bytes_written >= total_size * stop_fraction:
+            download.cancel()
+
+    download = SegmentedDownload(url, destination, progress_callback=stop_early)
+    try:
+        download.run()
+    except DownloadCancelled:
+        pass
+
+    resumed_from = []
+    resumed = SegmentedDownload(url, destination, progress_callback=lambda written, total: resumed_from.append(written))
+    start = time.perf_counter()
+    resumed.run()
+    return resumed_from[0], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SegmentedDownload against a local range-capable HTTP server")
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--connection-mbps", type=float, default=8.0, help="per connection limit of the server in MB/s, 0 for none")
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    server, expected_sha256 = start_server(args.size_mb, int(args.connection_mbps * 1024 * 1024))
+    url = f"http://127.0.0.1:{server.server_address[1]}/archive.7z"
+
+    with tempfile.TemporaryDirectory() as directory:
+        destination = os.path.join(directory, "archive.7z")
+        print(f"{'connections':>11} {'time':>8} {'MB/s':>8}")
+        for connections in args.connections:
+            elapsed = timed_download(url, destination, connections)
+            if file_sha256(destination) != expected_sha256:
+                raise SystemExit(f"download with {connections} connections is corrupt")
+            print(f"{connections:>11} {elapsed:>7.2f}s {args.size_mb / elapsed:>8.1f}")
+
+        resumed_from, elapsed = interrupted_download(url, destination, 0.5)
+        if file_sha256(destination) != expected_sha256:
+            raise SystemExit("resumed download is corrupt")
+        print(f"resumed at {resumed_from / 1024 / 1024:.0f}MB of {args.size_mb}MB, finished in {elapsed:.2f}s")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
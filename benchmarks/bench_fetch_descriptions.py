@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import threading
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voidcore import CatalogFetcher
+
+CHANGELOG_TEXT = "> Added things - fixed things - changed things\n" * 40
+
+
+class StubChangelogHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.05
+
+    def do_GET(self):
+        # Pretend to be a server on the other side of the internet
+        time.sleep(self.latency)
+        body = CHANGELOG_TEXT.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(latency):
+    StubChangelogHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubChangelogHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_descriptions(base_url, count):
+    return {f"0.8.0_{i:04d}": f"Changelog for build {i} {base_url}/changelogs/{i}.txt" for i in range(count)}
+
+
+def time_render(worker, descriptions, max_workers):
+    start = time.perf_counter()
+    rendered = worker.render_descriptions(descriptions, max_workers=max_workers)
+    elapsed = time.perf_counter() - start
+    assert set(rendered) == set(descriptions)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent changelog fetching against a local stub server")
+    parser.add_argument("--counts", type=int, nargs="+", default=[25, 50, 100, 200])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the stub server waits before answering")
+    parser.add_argument("--workers", type=int, default=CatalogFetcher.description_fetch_workers)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    worker = CatalogFetcher()
+
+    print(f"{'versions':>8} {'sequential':>12} {'concurrent':>12} {'speedup':>8}")
+    for count in args.counts:
+        descriptions = make_descriptions(base_url, count)
+        sequential = time_render(worker, descriptions, 1)
+        concurrent = time_render(worker, descriptions, args.workers)
+        print(f"{count:>8} {sequential:>11.2f}s {concurrent:>11.2f}s {sequential / concurrent:>7.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
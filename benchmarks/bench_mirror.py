@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import hashlib
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_download import QuietServer, file_sha256
+from voidcore import SegmentedDownload, MirrorCache, MirrorServer, mirror_url, UPSTREAM_URL
+
+
+class CountingUpstreamHandler(BaseHTTPRequestHandler):
+    # Stands in for invotek.net: one archive with Range support, a releases page and changelogs,
+    # over a slow link, counting every byte it has to send
+    protocol_version = "HTTP/1.1"
+    archive = b""
+    bytes_per_second = 0
+    bytes_sent = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path.endswith(".7z"):
+            body = self.archive
+        elif self.path == "/releases":
+            body = b"<html><body>" + b"<div class=\"release-container\"><h1>0.8.0</h1></div>" * 500 + b"</body></html>"
+        else:
+            body = b"> Added things - fixed things\n" * 50
+        start, end = 0, len(body) - 1
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            first, _, last = range_header[len("bytes="):].partition("-")
+            start = int(first)
+            end = min(int(last), len(body) - 1) if last else len(body) - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        try:
+            for offset in range(start, end + 1, 256 * 1024):
+                data = body[offset:min(offset + 256 * 1024, end + 1)]
+                self.wfile.write(data)
+                with self.lock:
+                    CountingUpstreamHandler.bytes_sent += len(data)
+                if self.bytes_per_second:
+                    time.sleep(len(data) / self.bytes_per_second)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def download_all(base_url, directory, clients, label):
+    # Every client fetches the releases page, a changelog and the archive through the mirror at the same time
+    CountingUpstreamHandler.bytes_sent = 0
+    archive_url = mirror_url(f"{UPSTREAM_URL}/releases/votv_bench.7z", base_url)
+    results = [None] * clients
+
+    def client(index):
+        started = time.perf_counter()
+        destination = os.path.join(directory, f"{label}_{index}.7z")
+        download = SegmentedDownload(archive_url, destination)
+        download.session.get(mirror_url(f"{UPSTREAM_URL}/releases", base_url), timeout=30).raise_for_status()
+        download.session.get(mirror_url(f"{UPSTREAM_URL}/changelogs/1.txt", base_url), timeout=30).raise_for_status()
+        download.run()
+        results[index] = (time.perf_counter() - started, file_sha256(destination))
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, CountingUpstreamHandler.bytes_sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Several launchers downloading the same build directly vs through a LAN mirror")
+    parser.add_argument("--size-mb", type=int, default=32)
+    parser.add_argument("--upstream-mbps", type=float, default=16.0, help="per connection limit of the fake invotek.net in MB/s")
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+
+    CountingUpstreamHandler.archive = os.urandom(args.size_mb * 1024 * 1024)
+    CountingUpstreamHandler.bytes_per_second = int(args.upstream_mbps * 1024 * 1024)
+    expected_sha256 = hashlib.sha256(CountingUpstreamHandler.archive).hexdigest()
+    upstream = QuietServer(("127.0.0.1", 0), CountingUpstreamHandler)
+    threading.Thread(target=upstream.serve_forever, daemon=True).start()
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as directory:
+        mirror = MirrorServer(MirrorCache(os.path.join(directory, "mirror"), upstream_url), "127.0.0.1", 0)
+        mirror.start()
+        mirror_base_url = f"http://127.0.0.1:{mirror.server_address[1]}"
+
+        print(f"{'mode':>14} {'clients':>8} {'slowest':>9} {'upstream MB':>12}")
+        for label, base_url in (("direct", upstream_url), ("mirror, cold", mirror_base_url), ("mirror, warm", mirror_base_url)):
+            results, upstream_bytes = download_all(base_url, directory, args.clients, label.replace(", ", "_"))
+            if any(sha256 != expected_sha256 for _, sha256 in results):
+                raise SystemExit(f"{label}: a client got a corrupt archive")
+            print(f"{label:>14} {args.clients:>8} {max(elapsed for elapsed, _ in results):>8.2f}s {upstream_bytes / 1024 / 1024:>12.1f}")
+        print(f"mirror stats: {mirror.cache.stats}")
+        mirror.stop()
+
+    upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
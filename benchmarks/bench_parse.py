@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from voidcore import CatalogFetcher, pick_html_parser
+
+
+def make_releases_page(count):
+    # Shaped like invotek.net/releases: page chrome around a long run of release containers
+    containers = []
+    for i in range(count):
+        containers.append(f"""
+            <div class="release-container">
+                <h1>0.8.0_{i:05d}</h1>
+                <p>&#x1F55B; 2023-10-{i % 28 + 1:02d}</p>
+                <p>Build {i} of the game with a few fixes and some new content.</p>
+                <p>SHA256: {i:064x}</p>
+                <div class="download-link"><a href="/releases/votv_0.8.0_{i:05d}.7z">Download</a></div>
+                <p><a href="/changelogs/{i}.txt">Website changelog</a> / <a href="https://discord.com/channels/1/2/{i}">Discord changelog</a></p>
+            </div>""")
+    chrome = "".join(f'<li><a href="/page/{i}">Page {i}</a><span class="tooltip">Navigation entry {i}</span></li>' for i in range(count))
+    script = "<script>var data = [" + ",".join(str(i) for i in range(count)) + "];</script>"
+    return f"<!DOCTYPE html><html><head><title>Releases</title>{script}</head><body><nav><ul>{chrome}</ul></nav><main>{''.join(containers)}</main><footer>{chrome}</footer></body></html>"
+
+
+def legacy_parse(worker, html):
+    # The original implementation: full tree, then several find_all calls per container
+    soup = BeautifulSoup(html, 'html.parser')
+    releases = []
+    for release_container in soup.find_all('div', class_='release-container'):
+        h1_tags = release_container.find_all('h1')
+        version_name = " ".join(tag.get_text().strip() for tag in h1_tags).strip()
+        download_link = None
+        download_link_div = release_container.find('div', class_='download-link')
+        if download_link_div:
+            a_child = download_link_div.find('a')
+            if a_child:
+                download_link = f"https://www.invotek.net{a_child.get('href')}"
+        p_tags = release_container.find_all(['p', 'a'])
+        description = "\n".join(filter(None, [worker.process_tag(tag) for tag in p_tags]))
+        releases.append((version_name, download_link, description))
+    return releases
+
+
+def targeted_parse(worker, html, parser):
+    releases = []
+    for release_container in worker.parse_release_containers(html, parser):
+        release = worker.parse_release_container(release_container)
+        releases.append((release['name'], release['download_link'], release['description']))
+    return releases
+
+
+def best_of(repeat, function, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Releases page parse time, legacy vs targeted parsing")
+    parser.add_argument("--counts", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    worker = CatalogFetcher()
+    parsers = ["html.parser"]
+    if pick_html_parser() != "html.parser":
+        parsers.append(pick_html_parser())
+
+    print(f"{'containers':>10} {'page':>8} {'mode':>22} {'time':>9} {'speedup':>8}")
+    for count in args.counts:
+        html = make_releases_page(count)
+        legacy_time, expected = best_of(args.repeat, legacy_parse, worker, html)
+        print(f"{count:>10} {len(html) // 1024:>6}KB {'legacy html.parser':>22} {legacy_time:>8.3f}s {1:>7.1f}x")
+        for backend in parsers:
+            elapsed, releases = best_of(args.repeat, targeted_parse, worker, html, backend)
+            if releases != expected:
+                raise SystemExit(f"targeted parse with {backend} does not match the legacy output")
+            print(f"{count:>10} {len(html) // 1024:>6}KB {'targeted ' + backend:>22} {elapsed:>8.3f}s {legacy_time / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
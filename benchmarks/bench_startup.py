@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+# None of these may be loaded just to put the window on screen
+HEAVY_MODULES = ["requests", "urllib3", "bs4", "lxml", "psutil", "tqdm", "pySmartDL", "py7zr"]
+
+
+def import_profile():
+    # -X importtime writes "import time: self | cumulative | module" for every import to stderr
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import VoidLauncher"],
+        cwd=REPO, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure_child(directory):
+    # Runs in a fresh interpreter with a throwaway config, catalog and library
+    start = time.perf_counter()
+    os.chdir(directory)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    import VoidLauncher
+    imported = time.perf_counter()
+
+    from PyQt5 import QtWidgets, QtCore
+    VoidLauncher.Config.config_file = os.path.join(directory, "config.ini")
+    config = VoidLauncher.Config.default_config()
+    config.set("Settings", "disable_initial_dialog", "True")
+    config.set("Paths", "game_destination_folder", os.path.join(directory, "game"))
+    with open(VoidLauncher.Config.config_file, "w") as config_file:
+        config.write(config_file)
+
+    app = QtWidgets.QApplication(sys.argv)
+    window = VoidLauncher.VoidLauncher(VoidLauncher.DownloadWorker(), VoidLauncher.GameFetchWorker())
+    shown = time.perf_counter()
+    assert window.isVisible()
+
+    def report():
+        print(json.dumps({
+            "import_ms": (imported - start) * 1000,
+            "first_window_ms": (shown - start) * 1000,
+            "heavy_modules_at_show": [name for name in HEAVY_MODULES if name in loaded_at_show]
+        }), flush=True)
+        # The catalog fetch thread is not daemonic, there is no need to wait for the network
+        os._exit(0)
+
+    loaded_at_show = set(sys.modules)
+    QtCore.QTimer.singleShot(0, report)
+    app.exec_()
+
+
+def run_child():
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--child", directory], cwd=REPO, stderr=subprocess.DEVNULL)
+        wall_ms = (time.perf_counter() - started) * 1000
+    result = json.loads(output.decode().strip().splitlines()[-1])
+    result["process_ms"] = wall_ms
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import cost and time to first window of the launcher")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500, help="fail if the median time to first window from process start is above this")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--child", metavar="DIRECTORY", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_child(args.child)
+        return
+
+    modules = import_profile()
+    total_us = next(cumulative for name, _, cumulative in modules if name == "VoidLauncher")
+    print(f"import VoidLauncher: {total_us / 1000:.1f}ms cumulative")
+    print(f"{'self':>9} {'cumulative':>11}  module")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda module: module[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>7.1f}ms {cumulative_us / 1000:>9.1f}ms  {name}")
+    heavy_on_import = [name for name in HEAVY_MODULES if any(module == name for module, _, _ in modules)]
+    print(f"heavy modules on import: {', '.join(heavy_on_import) or 'none'}")
+
+    results = [run_child() for _ in range(args.runs)]
+    first_window = statistics.median(result["process_ms"] for result in results)
+    print(f"\n{'run':>3} {'import':>9} {'window shown':>13} {'process start to window':>24}")
+    for run, result in enumerate(results, 1):
+        print(f"{run:>3} {result['import_ms']:>7.1f}ms {result['first_window_ms']:>11.1f}ms {result['process_ms']:>22.1f}ms")
+    heavy_at_show = sorted(set(name for result in results for name in result["heavy_modules_at_show"]))
+    print(f"heavy modules loaded when the window was shown: {', '.join(heavy_at_show) or 'none'}")
+
+    print(f"\nmedian process start to first window: {first_window:.1f}ms (budget {args.budget_ms:.0f}ms)")
+    if heavy_on_import or first_window > args.budget_ms:
+        raise SystemExit("startup budget exceeded")
+
+
+if __name__ == "__main__":
+    main()
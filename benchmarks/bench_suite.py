@@ -0,0 +1,420 @@
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import zipfile
+import argparse
+import platform
+import statistics
+import contextlib
+import subprocess
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_download import QuietServer
+from voidcore import (
+    Config, CatalogStore, CatalogFetcher, SegmentedDownload, Installer, LibraryIndex, GameLauncher, Telemetry
+)
+
+SUITES = ("catalog", "library", "backup", "archive")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # A local invotek.net: the releases page, .txt and HTML changelogs with ETags, and range-capable archives
+    protocol_version = "HTTP/1.1"
+    pages = {}
+    archive = b""
+    latency = 0.0
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.path.startswith("/releases/") and self.path.endswith(".zip"):
+            self.send_archive(send_body)
+            return
+        if self.path not in self.pages:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body, content_type = self.pages[self.path]
+        etag = f'"{zlib.crc32(body):08x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_archive(self, send_body):
+        total = len(self.archive)
+        start, end = 0, total - 1
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            first, _, last = range_header[len("bytes="):].partition("-")
+            start = int(first)
+            end = min(int(last), total - 1) if last else total - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+        else:
+            self.send_response(200)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{total:x}"')
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        if not send_body:
+            return
+        try:
+            for offset in range(start, end + 1, 1024 * 1024):
+                self.wfile.write(self.archive[offset:min(offset + 1024 * 1024, end + 1)])
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def version_name(index):
+    return f"0.9.0_{index:05d}"
+
+
+def make_pages(versions, html_every):
+    # Every html_every-th version links an HTML post instead of a .txt changelog, like the older releases do
+    pages = {}
+    containers = []
+    for index in range(versions):
+        if html_every and index % html_every == 0:
+            link = f"/posts/{index}"
+            post = "".join(f"<p>Added thing {i} - fixed thing {i}</p>" for i in range(40))
+            pages[link] = (f'<html><body><section class="object_text_widget_widget base_widget user_formatted post_body">'
+                           f'{post}</section></body></html>'.encode("utf-8"), "text/html")
+        else:
+            link = f"/changelogs/{index}.txt"
+            pages[link] = (("> Added things - fixed things - changed things\n" * 40).encode("utf-8"), "text/plain; charset=utf-8")
+        containers.append(f"""
+            <div class="release-container">
+                <h1>{version_name(index)}</h1>
+                <p>&#x1F55B; 2024-03-{index % 28 + 1:02d}</p>
+                <p>Build {index} of the game with a few fixes and some new content.</p>
+                <p>SHA256: {index:064x}</p>
+                <div class="download-link"><a href="/releases/votv_{version_name(index)}.zip">Download</a></div>
+                <p><a href="{link}">Website changelog</a> / <a href="https://discord.com/channels/1/2/{index}">Discord changelog</a></p>
+            </div>""")
+    chrome = "".join(f'<li><a href="/page/{i}">Page {i}</a></li>' for i in range(100))
+    pages["/releases"] = (f"<!DOCTYPE html><html><head><title>Releases</title></head><body><nav><ul>{chrome}</ul></nav>"
+                          f"<main>{''.join(containers)}</main><footer>{chrome}</footer></body></html>".encode("utf-8"), "text/html")
+    return pages
+
+
+def make_build(folder, files, size_bytes, rng):
+    # Shaped like a packaged build: the exe, a few big paks and a long tail of small engine files
+    game_folder = os.path.join(folder, "WindowsNoEditor")
+    os.makedirs(os.path.join(game_folder, "VotV", "Content", "Paks"), exist_ok=True)
+    with open(os.path.join(game_folder, "VotV.exe"), "wb") as exe_file:
+        exe_file.write(b"MZ" + bytes(4094))
+    paks = max(1, files // 50)
+    for index in range(files):
+        if index < paks:
+            path = os.path.join(game_folder, "VotV", "Content", "Paks", f"pak_{index:03d}.pak")
+            data = rng.randbytes(size_bytes // paks)
+        else:
+            path = os.path.join(game_folder, "Engine", f"folder_{index % 20:02d}", f"file_{index:05d}.ini")
+            data = (f"[Section{index}]\nValue={index}\n" * 20).encode("utf-8")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(data)
+
+
+def make_archive(directory, size_mb):
+    rng = random.Random(1)
+    build_folder = os.path.join(directory, "build_source", "votv_bench")
+    make_build(build_folder, 200, size_mb * 1024 * 1024, rng)
+    archive_path = os.path.join(directory, "votv_bench.zip")
+    with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for root, _, names in os.walk(build_folder):
+            for name in names:
+                path = os.path.join(root, name)
+                archive.write(path, os.path.relpath(path, os.path.dirname(build_folder)))
+    shutil.rmtree(os.path.dirname(build_folder))
+    with open(archive_path, "rb") as archive_file:
+        return archive_file.read()
+
+
+def start_fixture(args, directory):
+    FixtureHandler.pages = make_pages(args.versions, args.html_every)
+    FixtureHandler.archive = make_archive(directory, args.archive_mb) if "archive" in args.suites else b""
+    FixtureHandler.latency = args.latency
+    server = QuietServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def summary(runs, **extra):
+    result = {"median": statistics.median(runs), "min": min(runs), "runs": runs}
+    result.update(extra)
+    return result
+
+
+def timed(repeat, function, setup=None):
+    # setup runs before every timed call and is not counted
+    runs = []
+    for run in range(repeat):
+        state = setup(run) if setup else None
+        started = time.perf_counter()
+        function(state)
+        runs.append(time.perf_counter() - started)
+    return runs
+
+
+def bench_catalog(args, directory):
+    results = {}
+
+    def new_fetcher(run):
+        fetcher = CatalogFetcher(catalog_store=CatalogStore(os.path.join(directory, f"catalog_{run}.db")))
+        fetcher.legacy_cache_file = os.path.join(directory, "no_legacy_cache.pk1")
+        return fetcher
+
+    def cold_fetcher(run):
+        path = os.path.join(directory, f"catalog_{run}.db")
+        if os.path.exists(path):
+            os.remove(path)
+        return new_fetcher(run)
+
+    def fetch_all(fetcher):
+        fetcher.fetch_game_versions()
+        if len(fetcher.version_names) != args.versions or "Added thing 1 " not in (fetcher.get_description(version_name(0)) or ""):
+            raise SystemExit("catalog: the fixture releases page or changelogs were not read")
+
+    # No catalog yet: the releases page and every changelog
+    results["fetch_game_versions_cold"] = summary(timed(args.repeat, fetch_all, cold_fetcher), versions=args.versions)
+    # Catalog on disk: the index is loaded, descriptions stay in the store
+    results["fetch_game_versions_warm"] = summary(timed(args.repeat, lambda fetcher: fetcher.fetch_game_versions(), new_fetcher))
+
+    def loaded_fetcher(run):
+        fetcher = new_fetcher(run)
+        fetcher.load_data()
+        return fetcher
+
+    # Nothing released since: a single 304 for the releases page
+    results["refresh_not_modified"] = summary(timed(args.repeat, lambda fetcher: fetcher.refresh_game_versions(), loaded_fetcher))
+
+    def parsed_fetcher(run):
+        fetcher = loaded_fetcher(run)
+        fetcher.process_release_containers(fetcher.parse_release_containers(FixtureHandler.pages["/releases"][0].decode("utf-8")))
+        return fetcher
+
+    results["fetch_descriptions_all"] = summary(timed(args.repeat, lambda fetcher: fetcher.fetch_descriptions(), parsed_fetcher))
+    # Every changelog revalidated, the server answers 304 for all of them
+    results["fetch_descriptions_revalidate"] = summary(timed(args.repeat, lambda fetcher: fetcher.fetch_descriptions([]), parsed_fetcher))
+
+    fetcher = parsed_fetcher(0)
+    fetcher.fetch_descriptions()
+    results["save_data"] = summary(timed(args.repeat, lambda _: fetcher.save_data()),
+                                   catalog_bytes=os.path.getsize(fetcher.catalog_store.path))
+    results["load_data"] = summary(timed(args.repeat, lambda fetcher: fetcher.load_data(), new_fetcher))
+    return results
+
+
+def bench_library(args, directory):
+    library_folder = os.path.join(directory, "library")
+    rng = random.Random(2)
+    for index in range(args.installs):
+        make_build(os.path.join(library_folder, f"votv_{version_name(index)}"), args.install_files, 64 * 1024, rng)
+    index_path = os.path.join(directory, "library_index.json")
+
+    def cold_index(run):
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        return LibraryIndex(index_path)
+
+    def check(library_index):
+        if len(library_index.refresh(library_folder)) != args.installs:
+            raise SystemExit("library scan: not every install was found")
+
+    return {
+        "library_scan_cold": summary(timed(args.repeat, check, cold_index), installs=args.installs, files_per_install=args.install_files),
+        # The index on disk is still valid, only stats
+        "library_scan_warm": summary(timed(args.repeat, check, lambda run: LibraryIndex(index_path)))
+    }
+
+
+def backup(launcher):
+    # A backup that did not run is fast too, it must not end up in the results
+    stats = launcher.backup("bench")
+    if "copied_files" not in stats:
+        raise SystemExit(f"backup: {stats.get('error', 'nothing was backed up')}")
+    return stats
+
+
+def bench_backup(args, directory):
+    results = {}
+    for save_mb in args.save_mb:
+        save_folder = os.path.join(directory, f"Saved_{save_mb}")
+
+        def fresh_launcher(run):
+            data_folder = os.path.join(directory, f"backups_{save_mb}_{run}")
+            shutil.rmtree(data_folder, ignore_errors=True)
+            return GameLauncher(data_folder, save_folder, Telemetry(os.path.join(directory, "telemetry.jsonl")))
+
+        # A backup only copies the saves of its own version, so the saves are written into the active bench profile
+        fresh_launcher("prepare").prepare("bench")
+        rng = random.Random(3)
+        files = []
+        for index in range(args.save_files):
+            path = os.path.join(save_folder, "SaveGames" if index % 2 else "Config", f"slot_{index:04d}.sav")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as save_file:
+                save_file.write(rng.randbytes(save_mb * 1024 * 1024 // args.save_files))
+            files.append(path)
+
+        launcher = fresh_launcher("incremental")
+        backup(launcher)
+
+        def touch_some(run):
+            # A play session rewrites a handful of saves
+            for path in files[:max(1, len(files) // 20)]:
+                with open(path, "r+b") as save_file:
+                    save_file.write(rng.randbytes(64))
+            return launcher
+
+        results[f"backup_full_{save_mb}mb"] = summary(timed(args.repeat, backup, fresh_launcher),
+                                                       save_mb=save_mb, save_files=args.save_files)
+        results[f"backup_incremental_{save_mb}mb"] = summary(timed(args.repeat, backup, touch_some),
+                                                              save_mb=save_mb, changed_files=max(1, len(files) // 20))
+    return results
+
+
+def bench_archive(args, directory, base_url):
+    url = f"{base_url}/releases/votv_{version_name(0)}.zip"
+    archive_path = os.path.join(directory, "download", "votv_bench.zip")
+    archive_mb = len(FixtureHandler.archive) / 1024 / 1024
+    downloads = []
+
+    def fresh_download(run):
+        shutil.rmtree(os.path.dirname(archive_path), ignore_errors=True)
+        os.makedirs(os.path.dirname(archive_path))
+        download = SegmentedDownload(url, archive_path)
+        downloads.append(download)
+        return download
+
+    download_runs = timed(args.repeat, lambda download: download.run(), fresh_download)
+    known_sha256 = downloads[-1].sha256
+
+    def fresh_archive(run):
+        library_folder = os.path.join(directory, "extract_library")
+        shutil.rmtree(library_folder, ignore_errors=True)
+        copy_path = os.path.join(directory, "extract", "votv_bench.zip")
+        os.makedirs(os.path.dirname(copy_path), exist_ok=True)
+        shutil.copy(archive_path, copy_path)
+        return Installer(library_folder), copy_path
+
+    extraction_runs = timed(args.repeat, lambda state: state[0].install("bench", state[1], known_sha256, known_sha256), fresh_archive)
+    return {
+        "download": summary(download_runs, archive_mb=archive_mb, mb_per_second=archive_mb / statistics.median(download_runs)),
+        "extraction": summary(extraction_runs, archive_mb=archive_mb, mb_per_second=archive_mb / statistics.median(extraction_runs))
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    print(f"\n{'benchmark':>34} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, result in results.items():
+        if name in baseline:
+            before = baseline[name]["median"]
+            change = (result["median"] - before) / before * 100 if before else 0.0
+            print(f"{name:>34} {before * 1000:>8.1f}ms {result['median'] * 1000:>8.1f}ms {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the launcher's hot paths against a local fixture server and writes the results as JSON")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--versions", type=int, default=200, help="release containers on the fixture releases page")
+    parser.add_argument("--html-every", type=int, default=4, help="every n-th version links an HTML changelog, 0 for none")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the fixture waits before every answer")
+    parser.add_argument("--installs", type=int, default=50, help="synthetic installs in the library")
+    parser.add_argument("--install-files", type=int, default=200, help="files per synthetic install")
+    parser.add_argument("--save-mb", type=int, nargs="+", default=[16, 128], help="save folder sizes to back up")
+    parser.add_argument("--save-files", type=int, default=100)
+    parser.add_argument("--archive-mb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="an earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        # config.ini of this run lives in the temp folder, the real one is never touched
+        Config.config_file = os.path.join(directory, "config.ini")
+        server, base_url = start_fixture(args, directory)
+        Config.set_base_url(base_url)
+        for suite in args.suites:
+            suite_folder = os.path.join(directory, suite)
+            os.makedirs(suite_folder)
+            started = time.perf_counter()
+            # The progress prints of the core would drown the table
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                if suite == "catalog":
+                    results.update(bench_catalog(args, suite_folder))
+                elif suite == "library":
+                    results.update(bench_library(args, suite_folder))
+                elif suite == "backup":
+                    results.update(bench_backup(args, suite_folder))
+                else:
+                    results.update(bench_archive(args, suite_folder, base_url))
+            print(f"{suite} done in {time.perf_counter() - started:.1f}s")
+        Config.flush()
+        server.shutdown()
+
+    print(f"\n{'benchmark':>34} {'median':>10} {'min':>10}")
+    for name, result in results.items():
+        print(f"{name:>34} {result['median'] * 1000:>8.1f}ms {result['min'] * 1000:>8.1f}ms")
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "html_parser": CatalogFetcher.html_parser,
+            "args": vars(args)
+        },
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"\nResults written to '{args.output}'")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+# Everything the launcher does that does not need a window. VoidLauncher.py puts Qt on top of it,
+# python -m voidcore drives it from the command line.
+from .config import Config, UPSTREAM_URL, mirror_url
+from .catalog import CatalogStore, CatalogFetcher, pick_html_parser
+from .download import (
+    DELTA_SUFFIX, DownloadError, DownloadCancelled, file_sha256, OrderedHasher, SegmentedDownload, BandwidthLimiter, DownloadJob, DownloadQueue
+)
+from .install import (
+    ExtractionError, DeltaError, ArchiveExtractor, InstallStore, DeltaPatcher, Installer, verify_archives, read_build_marker, marked_builds
+)
+from .library import LibraryIndex
+from .saves import SaveBackup, SnapshotStore, SaveProfiles
+from .game import SessionLog, GameProcess, GameLauncher, default_save_folder
+from .telemetry import Telemetry
+from .delta import DeltaBuilder, build_delta, delta_source
+from .mirror import MirrorCache, MirrorServer
@@ -0,0 +1,578 @@
+import os
+import re
+import time
+import pickle
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .config import Config, UPSTREAM_URL, mirror_url
+
+class CatalogStore:
+    database_file = "cached_data.db"
+
+    def __init__(self, path=None):
+        self.path = path or self.database_file
+
+    def exists(self):
+        return os.path.exists(self.path) and os.access(self.path, os.R_OK)
+
+    def connect(self, create=False):
+        # A new connection per call so the fetch thread and the GUI thread never share one.
+        # Only save creates the file, reads of a catalog that was never saved get None and return nothing.
+        if not create and not self.exists():
+            return None
+        connection = sqlite3.connect(self.path)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS versions (
+                name TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                download_link TEXT,
+                release_text TEXT,
+                description TEXT,
+                sha256 TEXT
+            )
+        """)
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(versions)")]
+        if "sha256" not in columns:
+            # Catalogs written before SHA256 sums were kept
+            connection.execute("ALTER TABLE versions ADD COLUMN sha256 TEXT")
+        connection.execute("CREATE INDEX IF NOT EXISTS versions_position ON versions (position)")
+        connection.execute("CREATE TABLE IF NOT EXISTS validators (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT)")
+        return connection
+
+    def save(self, version_names, download_links, release_texts, descriptions, validators, sha256s=None):
+        # Everything is written in one transaction, so a crash leaves the previous catalog intact.
+        # Versions missing from descriptions keep the description that is already stored.
+        connection = self.connect(create=True)
+        try:
+            with connection:
+                connection.execute("CREATE TEMP TABLE listed (name TEXT PRIMARY KEY)")
+                connection.executemany("INSERT OR IGNORE INTO listed VALUES (?)", ((name,) for name in version_names))
+                connection.execute("DELETE FROM versions WHERE name NOT IN (SELECT name FROM listed)")
+                sha256s = sha256s or {}
+                connection.executemany("""
+                    INSERT INTO versions (name, position, download_link, release_text, description, sha256) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET
+                        position = excluded.position,
+                        download_link = excluded.download_link,
+                        release_text = excluded.release_text,
+                        description = COALESCE(excluded.description, versions.description),
+                        sha256 = COALESCE(excluded.sha256, versions.sha256)
+                """, (
+                    (name, position, download_links.get(name), release_texts.get(name), descriptions.get(name), sha256s.get(name))
+                    for position, name in enumerate(version_names)
+                ))
+                connection.execute("DELETE FROM validators")
+                connection.executemany(
+                    "INSERT INTO validators (url, etag, last_modified) VALUES (?, ?, ?)",
+                    ((url, value.get("etag"), value.get("last_modified")) for url, value in validators.items())
+                )
+        finally:
+            connection.close()
+
+    def load_index(self):
+        # Only what the Downloads list needs: names in page order, their download links and SHA256 sums
+        connection = self.connect()
+        if connection is None:
+            return []
+        try:
+            return connection.execute("SELECT name, download_link, sha256 FROM versions ORDER BY position").fetchall()
+        finally:
+            connection.close()
+
+    def load_description(self, version_name):
+        connection = self.connect()
+        if connection is None:
+            return None
+        try:
+            row = connection.execute("SELECT description FROM versions WHERE name = ?", (version_name,)).fetchone()
+            return row[0] if row else None
+        finally:
+            connection.close()
+
+    def load_release_texts(self):
+        connection = self.connect()
+        if connection is None:
+            return {}
+        try:
+            return dict(connection.execute("SELECT name, release_text FROM versions WHERE release_text IS NOT NULL ORDER BY position"))
+        finally:
+            connection.close()
+
+    def load_validators(self):
+        connection = self.connect()
+        if connection is None:
+            return {}
+        try:
+            rows = connection.execute("SELECT url, etag, last_modified FROM validators")
+            return {url: {"etag": etag, "last_modified": last_modified} for url, etag, last_modified in rows}
+        finally:
+            connection.close()
+
+def pick_html_parser():
+    # lxml parses the releases page several times faster, but it is optional
+    try:
+        import lxml
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+class CatalogFetcher:
+    # Keeps the list of released versions in sync with the releases page and the catalog store.
+    # The callbacks are called from whichever thread runs the fetch, the GUI wraps them in queued signals.
+    # Number of changelogs fetched at the same time during a refresh
+    description_fetch_workers = 8
+    # Picked on the first parse, so importing this module never imports lxml
+    html_parser = None
+    sha256_pattern = re.compile(r'\b[0-9a-fA-F]{64}\b')
+
+    def __init__(self, on_progress=None, on_versions_reset=None, on_versions_inserted=None, on_versions_removed=None, on_descriptions_changed=None, catalog_store=None):
+        self.config = Config()
+        self._session = None
+        self.on_progress = on_progress or (lambda text: None)
+        self.on_versions_reset = on_versions_reset or (lambda names: None)
+        self.on_versions_inserted = on_versions_inserted or (lambda row, names: None)
+        self.on_versions_removed = on_versions_removed or (lambda names: None)
+        self.on_descriptions_changed = on_descriptions_changed or (lambda names: None)
+        self.version_name_map = {}
+        self.version_names = []
+        self.version_download_link_map = {}
+        self.version_sha256_map = {}
+        self.version_description_map = {}
+        self.final_descriptions_map = {}
+        # Stored and compared as invotek.net URLs, http_get sends them to the configured base URL
+        self.releases_url = f"{UPSTREAM_URL}/releases"
+        # ETag / Last-Modified of the releases page and every changelog, keyed by URL
+        self.validators = {}
+        self.catalog_store = catalog_store or CatalogStore()
+        self.legacy_cache_file = 'cached_data.pk1'
+        self.html_content = ""                
+        self.html_content_and_style =  """
+            <!DOCTYPE html>
+            <html>
+            <head>
+            <style>
+                body {
+                    background-color: #1C1C1C;
+                    color: white;
+                    font-size: 15px;
+                }
+                p {
+                    font-size: 18px;
+                }
+                body h1 {
+                    font-size: 20px;
+                }
+                body h1 {
+                    font-size: 20px;
+                }
+            </style>
+            </head>
+            <body>
+            """
+
+    def get_version_name_map(self):
+        return self.version_name_map   
+
+    def get_version_names(self):
+        return self.version_names   
+
+    def get_version_download_link_map(self):
+        return self.version_download_link_map   
+
+    def get_version_description_map(self):
+        return self.version_description_map   
+
+    def get_final_descriptions_map(self):
+        return self.final_descriptions_map
+
+    def get_html_content_and_style(self):
+        return self.html_content_and_style      
+
+
+    def fetch_game_versions(self):    
+        if not self.catalog_store.exists() and os.path.exists(self.legacy_cache_file):
+            self.import_legacy_cache()
+
+        if self.catalog_store.exists():
+            self.load_data()
+        # A catalog without versions (e.g. an older launcher created it while reading) is fetched again
+        if not self.version_names:
+            self.refresh_game_versions()
+
+    def refresh_game_versions(self):
+        import requests
+        try:
+            response = self.http_get(self.releases_url, conditional=True)
+        except requests.exceptions.RequestException as e:
+            print(f"Error: {e}")
+            return
+
+        if response is None:
+            # Nothing was released since the last refresh, keep everything we already have
+            print("Releases page not modified since the last refresh.")
+            self.update_last_refresh_time()
+            return
+
+        if not self.version_description_map and self.catalog_store.exists():
+            # The release texts are only needed to spot changed containers, so load_data skips them
+            self.version_description_map = self.catalog_store.load_release_texts()
+
+        release_containers = self.parse_release_containers(response.text)
+        changed_versions = self.process_release_containers(release_containers)
+        self.fetch_descriptions(changed_versions)
+
+    def http_get(self, url, conditional=False):
+        # Returns None when the server answers 304 Not Modified for a conditional request
+        headers = {}
+        validators = self.validators.get(url, {})
+        if conditional and validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if conditional and validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        response = self.session.get(mirror_url(url), headers=headers, timeout=30)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.validators[url] = {"etag": etag, "last_modified": last_modified}
+        return response
+
+    def parse_release_containers(self, html, parser=None):
+        # Only the release containers are turned into a tree, the rest of the page is skipped
+        from bs4 import BeautifulSoup, SoupStrainer
+        only_release_containers = SoupStrainer('div', class_='release-container')
+        if CatalogFetcher.html_parser is None:
+            CatalogFetcher.html_parser = pick_html_parser()
+        soup = BeautifulSoup(self.slice_release_containers(html), parser or self.html_parser, parse_only=only_release_containers)
+        return soup.find_all('div', class_='release-container', recursive=False)
+
+    def slice_release_containers(self, html):
+        # Cut away the page head, navigation and footer before the parser ever sees them
+        first = html.find('release-container')
+        last = html.rfind('release-container')
+        if first == -1:
+            return html
+        start = html.rfind('<div', 0, first)
+        position = html.rfind('<div', 0, last)
+        if start == -1 or position == -1:
+            return html
+
+        # Walk to the </div> that closes the last container
+        depth = 0
+        while True:
+            next_open = html.find('<div', position)
+            next_close = html.find('</div', position)
+            if next_close == -1:
+                return html[start:]
+            if next_open != -1 and next_open < next_close:
+                depth += 1
+                position = next_open + 4
+            else:
+                depth -= 1
+                position = next_close + 5
+                if depth == 0:
+                    end = html.find('>', position)
+                    return html[start:end + 1 if end != -1 else len(html)]
+
+    def parse_release_container(self, release_container):
+        # Everything we need from a container in a single walk over its tags
+        from bs4 import NavigableString
+        h1_texts = []
+        download_link = None
+        sha256 = None
+        sha256_label_seen = False
+        descriptions = []
+        description_links = []
+
+        for node in release_container.descendants:
+            if isinstance(node, NavigableString):
+                if sha256 is None and (sha256_label_seen or 'SHA256' in node):
+                    sha256_label_seen = True
+                    match = self.sha256_pattern.search(node)
+                    if match:
+                        sha256 = match.group(0).lower()
+                continue
+
+            if node.name == 'h1':
+                h1_texts.append(node.get_text().strip())
+            elif node.name == 'div' and download_link is None and 'download-link' in node.get('class', ()):
+                a_child = node.find('a')
+                if a_child:
+                    download_link = a_child.get('href')
+            elif node.name in ('p', 'a'):
+                description = self.process_tag(node)
+                if description:
+                    descriptions.append(description)
+                    if node.name == 'a':
+                        description_links.append(description.split()[-1])
+
+        return {
+            'name': " ".join(h1_texts).strip(),
+            'download_link': f"{UPSTREAM_URL}{download_link}" if download_link else None,
+            'sha256': sha256,
+            'description': "\n".join(descriptions),
+            'description_links': description_links
+        }
+
+    def process_release_containers(self, release_containers):
+        # Returns the versions that are new or whose release text changed since the last refresh
+        previous_description_map = self.version_description_map
+        self.version_description_map = {}
+        self.version_names = []
+        changed_versions = []
+        new_versions = []
+
+        for index, release_container in enumerate(release_containers):
+            release = self.parse_release_container(release_container)
+            version_name = release['name']
+            self.version_names.append(version_name)
+            if version_name not in self.version_name_map:
+                self.version_name_map[version_name] = ""
+                new_versions.append((index, version_name))
+
+            if release['download_link']:
+                self.version_download_link_map[version_name] = release['download_link']
+            if release['sha256']:
+                self.version_sha256_map[version_name] = release['sha256']
+
+            self.current_description = release['description']
+            self.version_description_map[version_name] = self.current_description
+            if previous_description_map.get(version_name) != self.current_description:
+                changed_versions.append(version_name)
+
+        # Drop versions that are no longer listed on the releases page
+        removed_versions = [name for name in self.version_name_map if name not in self.version_description_map]
+        for version_name in removed_versions:
+            del self.version_name_map[version_name]
+            self.version_download_link_map.pop(version_name, None)
+            self.version_sha256_map.pop(version_name, None)
+            self.final_descriptions_map.pop(version_name, None)
+        if removed_versions:
+            self.on_versions_removed(removed_versions)
+
+        # One row insert per run of consecutive new versions
+        batch_start, batch = None, []
+        for index, version_name in new_versions:
+            if batch and index != batch_start + len(batch):
+                self.on_versions_inserted(batch_start, batch)
+                batch = []
+            if not batch:
+                batch_start = index
+            batch.append(version_name)
+        if batch:
+            self.on_versions_inserted(batch_start, batch)
+
+        return changed_versions
+
+    def process_tag(self, tag):
+        result = ""
+        result_2 = "" 
+
+        if tag.name == 'p':
+            text = tag.get_text()
+            if all(keyword not in text for keyword in ['SHA256:', 'Download', 'Website changelog / Discord changelog', 'changelog']):
+                result = text + '\n' 
+            if all(keyword not in text for keyword in ['SHA256:', 'Download', 'Website changelog / Discord changelog', '🕛']):
+                result_2 = text + '\n'
+        elif tag.name == 'a':
+            text = tag.get_text()
+            if all(keyword not in text for keyword in ['SHA256:', 'Download', '🕛']):
+                description_link = tag.get('href')
+                if not description_link.startswith("https"):
+                    description_link = f"{UPSTREAM_URL}{description_link}"
+                result = f"{result_2} {text} {description_link}\n"
+        return result
+    
+    @property
+    def session(self):
+        # Created on the first request, not when the window is built
+        if self._session is None:
+            self._session = self.create_session()
+        return self._session
+
+    def create_session(self):
+        # One keep-alive pool shared by every changelog request
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.description_fetch_workers, pool_maxsize=self.description_fetch_workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def fetch_descriptions(self, changed_versions=None):
+        # Versions that are not in changed_versions only re-download their changelog if it was modified
+        versions = list(self.version_description_map)
+        total = len(versions)
+        unchanged_versions = set()
+        if changed_versions is not None:
+            unchanged_versions = {version for version in versions if version not in changed_versions and version in self.version_name_map}
+
+        def report_progress(done, version):
+            self.on_progress(f"Fetching changelogs {done}/{total} | {version}")
+
+        rendered_descriptions = self.render_descriptions(self.version_description_map, progress_callback=report_progress, unchanged_versions=unchanged_versions)
+
+        # Keep the same order as the releases page no matter which fetch finished first
+        final_descriptions_map = {}
+        for version in versions:
+            rendered_description = rendered_descriptions[version]
+            if rendered_description is None:
+                # Not modified, the stored description is still current
+                continue
+            final_descriptions_map[version] = rendered_description
+        self.final_descriptions_map = final_descriptions_map
+
+        # Forget validators of changelogs that are not linked anymore
+        linked_urls = {self.find_first_link(description) for description in self.version_description_map.values()}
+        self.validators = {url: value for url, value in self.validators.items() if url == self.releases_url or url in linked_urls}
+
+        self.update_last_refresh_time()
+        self.save_data()    
+        # Only after the save, get_description may read these from the store
+        self.on_descriptions_changed(list(final_descriptions_map))
+
+    def update_last_refresh_time(self):
+        current_time = time.strftime("%A, %B %d, %Y %H:%M:%S")
+        self.on_progress("Refresh Versions List | Last Refreshed: " + current_time)
+
+        # Set the last refresh time in the configuration
+        Config.set_last_refresh_time(current_time)
+
+    def render_descriptions(self, descriptions, max_workers=None, progress_callback=None, unchanged_versions=()):
+        max_workers = max_workers or self.description_fetch_workers
+        rendered_descriptions = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.render_description, description, version in unchanged_versions): version for version, description in descriptions.items()}
+            for done, future in enumerate(as_completed(futures), start=1):
+                version = futures[future]
+                rendered_descriptions[version] = future.result()
+                if progress_callback:
+                    progress_callback(done, version)
+
+        return rendered_descriptions
+
+    def render_description(self, description, conditional=False):
+        # Returns None when conditional is set and the changelog was not modified
+        import requests
+        from bs4 import BeautifulSoup
+        modified_description = f"<p>{description}</p>\n\n"
+        first_link = self.find_first_link(description)
+        if first_link:
+            try:
+                link_response = self.http_get(first_link, conditional=conditional)
+                if link_response is None:
+                    return None
+            except requests.exceptions.RequestException as e:
+                print(f"Error fetching changelog '{first_link}': {e}")
+                if conditional:
+                    # Only a re-check, the stored description is better than the bare release text
+                    return None
+                link_response = None
+
+            if link_response is not None:
+                if first_link.endswith('.txt'):
+                    modified_description += self.format_changelog_text(link_response.text)
+                else:
+                    link_soup = BeautifulSoup(link_response.text, 'html.parser')
+                    post_body_section = link_soup.find('section', class_='object_text_widget_widget base_widget user_formatted post_body')
+                    if post_body_section:
+                        modified_description += self.html_content_and_style + str(post_body_section)
+                    else:
+                        body_text = link_soup.body.get_text() if link_soup.body else ""
+                        if body_text.strip():
+                            modified_description += body_text.strip()
+        modified_description = re.sub(r'http[s]?://\S+', '', modified_description)
+        modified_description = re.sub(r'Discord changelog|website changelog|to Discord post', '', modified_description, flags=re.IGNORECASE)
+        modified_description = re.sub(r'https://discord\.com', '', modified_description)
+        return modified_description
+
+    def format_changelog_text(self, text):
+        lines = text.split('\n')
+        modified_lines = []
+
+        for line in lines:
+            if '>' in line:
+                line = line.replace('>', '\n\n>')
+            if ' -' in line:
+                line = line.replace(' -', '\n\n -')
+            modified_lines.append(line)
+        return '\n'.join(modified_lines)
+
+        
+    def save_data(self):
+        if not isinstance(self.version_name_map, dict):
+            raise ValueError("self.version_name_map should be a dictionary")
+
+        if not isinstance(self.final_descriptions_map, dict):
+            raise ValueError("self.final_descriptions_map should be a dictionary")
+
+        self.catalog_store.save(
+            self.version_names,
+            self.version_download_link_map,
+            self.version_description_map,
+            self.final_descriptions_map,
+            self.validators,
+            self.version_sha256_map
+        )
+
+        # Print a confirmation message
+        print(f"Data saved as {self.catalog_store.path}")
+
+    def load_data(self):        
+        if self.catalog_store.exists():
+            try:
+                # Descriptions stay on disk until a version is selected, see get_description
+                index = self.catalog_store.load_index()
+                self.version_name_map = {version_name: "" for version_name, _, _ in index}
+                self.version_download_link_map = {version_name: download_link for version_name, download_link, _ in index if download_link}
+                self.version_sha256_map = {version_name: sha256 for version_name, _, sha256 in index if sha256}
+                self.version_names = list(self.version_name_map)
+                self.final_descriptions_map = {}
+                self.version_description_map = {}
+                self.validators = self.catalog_store.load_validators()
+                self.on_versions_reset(self.version_names)
+            except sqlite3.Error as e:
+                print(f"Error loading data from '{self.catalog_store.path}': {e}. Proceeding to fetch from the website.")
+        else:
+            print(f"The catalog '{self.catalog_store.path}' does not exist or is not readable. Proceeding to fetch from the website.")
+
+    def get_description(self, version_name):
+        if version_name not in self.final_descriptions_map:
+            description = self.catalog_store.load_description(version_name)
+            if description is None:
+                return None
+            self.final_descriptions_map[version_name] = description
+        return self.final_descriptions_map[version_name]
+
+    def import_legacy_cache(self):
+        # One time move from the old pickle cache to the catalog store
+        try:
+            with open(self.legacy_cache_file, 'rb') as file:
+                loaded_data = pickle.load(file, encoding='utf-8')
+            self.catalog_store.save(
+                list(loaded_data['version_name_map']),
+                loaded_data['version_download_link_map'],
+                loaded_data.get('version_description_map', {}),
+                loaded_data['final_descriptions_map'],
+                loaded_data.get('validators', {})
+            )
+        except (pickle.UnpicklingError, EOFError, Exception) as e:
+            print(f"Error importing '{self.legacy_cache_file}': {e}")
+            return
+
+        for legacy_file in (self.legacy_cache_file, 'cached_data.txt'):
+            if os.path.exists(legacy_file):
+                os.remove(legacy_file)
+        print(f"Imported '{self.legacy_cache_file}' into '{self.catalog_store.path}'")
+
+    def find_first_link(self, text):
+        import re
+        urls = re.findall(r'(https?://[^\s]+)', text)
+        return urls[0] if urls else None
@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from .config import Config, UPSTREAM_URL, mirror_url
+from .catalog import CatalogStore, CatalogFetcher
+from .download import DELTA_SUFFIX, DownloadError, DownloadCancelled, SegmentedDownload, BandwidthLimiter, file_sha256
+from .install import ExtractionError, ArchiveExtractor, Installer, verify_archives
+from .library import LibraryIndex
+from .game import GameProcess, GameLauncher
+from .telemetry import Telemetry
+from .delta import build_delta, delta_source
+from .mirror import MirrorCache, MirrorServer
+
+# Same files as the window: config.ini, cached_data.db, library_index.json, telemetry.jsonl and "game backups".
+# They are kept in the working directory, or in --data-dir (the frozen build keeps config.ini next to its exe).
+
+def data_path(name):
+    return os.path.join(Config.get_data_folder(), name)
+
+def output(args, data, text):
+    if args.json:
+        print(json.dumps(data, indent=2), file=sys.__stdout__)
+    else:
+        print(text)
+
+def load_catalog():
+    catalog = CatalogFetcher(catalog_store=CatalogStore(data_path(CatalogStore.database_file)))
+    catalog.fetch_game_versions()
+    return catalog
+
+def library_folder(args):
+    # The game is started from its own folder, a relative exe path would not survive that
+    return os.path.abspath(args.library or Config.get_game_destination_folder())
+
+def installed_builds(args):
+    folder = library_folder(args)
+    if not os.path.isdir(folder):
+        return {}
+    library_index = LibraryIndex(data_path(LibraryIndex.index_file))
+    library_index.refresh(folder)
+    return {name: library_index.lookup(name) for name in library_index.names()}
+
+def catalog_refresh(args):
+    catalog = CatalogFetcher(on_progress=None if args.json else print, catalog_store=CatalogStore(data_path(CatalogStore.database_file)))
+    catalog.fetch_game_versions()
+    catalog.refresh_game_versions()
+    output(args, {"versions": len(catalog.version_names), "last_refresh": Config.get_last_refresh_time()},
+           f"{len(catalog.version_names)} versions, last refreshed {Config.get_last_refresh_time()}")
+
+def list_versions(args):
+    installed = installed_builds(args)
+    if args.installed:
+        versions = sorted(installed)
+    else:
+        versions = load_catalog().version_names
+    data = [{"version": version, "installed": version in installed, "exe": installed.get(version)} for version in versions]
+    output(args, data, "\n".join(f"{version}{'  [installed]' if version in installed and not args.installed else ''}" for version in versions))
+
+def install(args):
+    catalog = load_catalog()
+    url = catalog.version_download_link_map.get(args.version)
+    if not url:
+        raise SystemExit(f"'{args.version}' is not in the catalog or has no download link")
+    archive_folder = Config.get_archived_installs_folder()
+    os.makedirs(archive_folder, exist_ok=True)
+    destination = os.path.join(archive_folder, url.split("/")[-1])
+    # A patch against an installed neighbour first when the mirror can make one, the full archive otherwise
+    sources = [(mirror_url(url), destination)]
+    delta_url = None if args.no_delta else delta_source(catalog, args.version, library_folder(args))
+    if delta_url:
+        sources.insert(0, (delta_url, destination + DELTA_SUFFIX))
+
+    def report_progress(bytes_written, total_size):
+        if total_size and not args.json:
+            print(f"\r{args.version}: {bytes_written * 100 // total_size}%", end="", flush=True)
+
+    for source_url, source_destination in sources:
+        download = SegmentedDownload(
+            source_url, source_destination,
+            connections=args.connections,
+            progress_callback=report_progress,
+            bandwidth_limiter=BandwidthLimiter(Config.get_bandwidth_limit() * 1024)
+        )
+        try:
+            download.run()
+            if not args.json:
+                print()
+            install_folder = Installer(library_folder(args), Config.get_install_store_mode(), Telemetry(data_path(Telemetry.telemetry_file))).install(
+                args.version, source_destination, catalog.version_sha256_map.get(args.version), download.sha256
+            )
+            break
+        except (DownloadError, DownloadCancelled, ExtractionError, OSError) as e:
+            if source_destination == destination:
+                raise SystemExit(f"Installing '{args.version}' failed: {e}")
+            print(f"No delta for '{args.version}' ({e}), downloading the full archive")
+            if os.path.exists(source_destination):
+                os.remove(source_destination)
+    output(args, {"version": args.version, "folder": install_folder, "delta": source_destination != destination},
+           f"Installed '{args.version}' to '{install_folder}'{' from a delta' if source_destination != destination else ''}")
+
+def delta_build(args):
+    # For serving deltas without the mirror, e.g. from a plain web server at the same path
+    try:
+        sides = []
+        for archive_path, version in ((args.old_archive, args.from_version), (args.new_archive, args.to_version)):
+            sides.append({
+                "version": version or ArchiveExtractor.archive_stem(archive_path),
+                "archive_sha256": file_sha256(archive_path).hexdigest()
+            })
+        stats = build_delta(args.old_archive, args.new_archive, args.output, sides[0], sides[1])
+    except (ExtractionError, OSError) as e:
+        raise SystemExit(f"Building the delta failed: {e}")
+    output(args, stats, f"{stats['bundle_bytes'] / 1024 / 1024:.1f} MB delta for {stats['tree_bytes'] / 1024 / 1024:.1f} MB of files: "
+                        f"{stats['copied']} unchanged, {stats['patched']} patched, {stats['full']} new")
+
+def verify(args):
+    catalog = load_catalog()
+    expected_sha256s = {}
+    for version, download_link in catalog.version_download_link_map.items():
+        if version in catalog.version_sha256_map:
+            expected_sha256s[download_link.split("/")[-1]] = catalog.version_sha256_map[version]
+    results = verify_archives(Config.get_archived_installs_folder(), expected_sha256s)
+    output(args, [{"file": file, "status": status} for file, status in results],
+           "\n".join(f"{file}: {status}" for file, status in results) or "No archives to verify.")
+    if any(status == "MISMATCH" for _, status in results):
+        sys.exit(1)
+
+def backup(args):
+    launcher = GameLauncher(Config.get_data_folder(), save_folder=args.save_folder, telemetry=Telemetry(data_path(Telemetry.telemetry_file)), retention=Config.get_snapshot_retention())
+    stats = launcher.backup(args.version)
+    if "error" in stats:
+        output(args, stats, f"Backing up '{args.version}' failed: {stats['error']}")
+        sys.exit(1)
+    output(args, stats, f"Copied {stats.get('copied_files', 0)} files, skipped {stats.get('skipped_files', 0)} unchanged, "
+                        f"{stats['backup_seconds']:.2f}s backup, {stats['snapshot_seconds']:.2f}s snapshot")
+
+def launch(args):
+    game_path = installed_builds(args).get(args.version)
+    if not game_path:
+        raise SystemExit(f"'{args.version}' is not installed in '{library_folder(args)}'")
+    launcher = GameLauncher(Config.get_data_folder(), save_folder=args.save_folder, telemetry=Telemetry(data_path(Telemetry.telemetry_file)), retention=Config.get_snapshot_retention())
+    launcher.save_profiles.recover()
+    launch_prep_seconds = launcher.prepare(args.version)
+    game_process = GameProcess(launcher.log_folder)
+    game_process.launch(args.version, game_path)
+    returncode, runtime = game_process.wait()
+    stats = launcher.finish(args.version, returncode, runtime, launch_prep_seconds)
+    output(args, {"version": args.version, "returncode": returncode, "runtime_seconds": runtime, "backup": stats},
+           f"'{args.version}' exited with code {returncode} after {runtime:.0f}s, "
+           f"{'saves backed up' if 'error' not in stats else 'backing up the saves failed: ' + stats['error']}")
+    sys.exit(returncode)
+
+def mirror(args):
+    server = MirrorServer(MirrorCache(args.folder or Config.get_mirror_folder(), args.upstream), args.host, args.port or Config.get_mirror_port())
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+    output(args, server.cache.stats, "\n".join(f"{stat}: {value}" for stat, value in server.cache.stats.items()))
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="voidlauncher", description="Void Launcher without the window")
+    parser.add_argument("--json", action="store_true", help="print machine readable output")
+    parser.add_argument("--library", help="library folder, defaults to the one in config.ini")
+    parser.add_argument("--data-dir", help="where config.ini, the catalog and the backups are kept, defaults to the working directory")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    catalog_parser = commands.add_parser("catalog", help="manage the cached version catalog")
+    catalog_commands = catalog_parser.add_subparsers(dest="catalog_command", metavar="action")
+    catalog_commands.required = True
+    catalog_commands.add_parser("refresh", help="fetch the releases page and changed changelogs").set_defaults(function=catalog_refresh)
+
+    list_parser = commands.add_parser("list", help="list the versions in the catalog")
+    list_parser.add_argument("--installed", action="store_true", help="only the builds in the library")
+    list_parser.set_defaults(function=list_versions)
+
+    install_parser = commands.add_parser("install", help="download and extract a version into the library")
+    install_parser.add_argument("version")
+    install_parser.add_argument("--connections", type=int, help="parallel connections for the download")
+    install_parser.add_argument("--no-delta", action="store_true", help="always download the full archive")
+    install_parser.set_defaults(function=install)
+
+    commands.add_parser("verify", help="check the archived installs against the catalog SHA256s").set_defaults(function=verify)
+
+    for name, function, help_text in (("backup", backup, "back up and snapshot the saves of a version"),
+                                      ("launch", launch, "play a version, then back up its saves")):
+        command_parser = commands.add_parser(name, help=help_text)
+        command_parser.add_argument("version")
+        command_parser.add_argument("--save-folder", help="the game's Saved folder, defaults to the one under AppData")
+        command_parser.set_defaults(function=function)
+
+    delta_parser = commands.add_parser("delta", help="binary deltas between two builds")
+    delta_commands = delta_parser.add_subparsers(dest="delta_command", metavar="action")
+    delta_commands.required = True
+    delta_build_parser = delta_commands.add_parser("build", help="build the delta that turns one build into the next")
+    delta_build_parser.add_argument("old_archive")
+    delta_build_parser.add_argument("new_archive")
+    delta_build_parser.add_argument("-o", "--output", required=True, help=f"the bundle to write, usually ending in {DELTA_SUFFIX}")
+    delta_build_parser.add_argument("--from-version")
+    delta_build_parser.add_argument("--to-version")
+    delta_build_parser.set_defaults(function=delta_build)
+
+    mirror_parser = commands.add_parser("mirror", help="serve a caching mirror of invotek.net to the other machines on the LAN")
+    mirror_parser.add_argument("--host", default="0.0.0.0")
+    mirror_parser.add_argument("--port", type=int, help="defaults to the port in config.ini")
+    mirror_parser.add_argument("--folder", help="where the mirrored files are kept")
+    mirror_parser.add_argument("--upstream", default=UPSTREAM_URL)
+    mirror_parser.set_defaults(function=mirror)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.data_dir:
+        Config.data_folder = os.path.abspath(args.data_dir)
+        os.makedirs(Config.data_folder, exist_ok=True)
+    if args.json:
+        # The progress prints of the core go to stderr so stdout stays one JSON document
+        with contextlib.redirect_stdout(sys.stderr):
+            args.function(args)
+    else:
+        args.function(args)
@@ -0,0 +1,260 @@
+import os
+import sys
+import threading
+import configparser
+import atexit
+
+UPSTREAM_URL = "https://www.invotek.net"
+# Spellings of the upstream origin that show up in release pages and changelogs
+UPSTREAM_PREFIXES = ("https://www.invotek.net", "http://www.invotek.net", "https://invotek.net", "http://invotek.net")
+
+class Config:
+    config_file = "config.ini"
+    # Setters only mark the config dirty, the first pending change starts a timer that writes it this many seconds later
+    flush_delay = 0.5
+
+    # Set by the CLI's --data-dir, before anything is loaded
+    data_folder = None
+
+    _parser = None
+    _dirty = False
+    _flush_timer = None
+    _listeners = []
+    _lock = threading.RLock()
+
+    @classmethod
+    def get_data_folder(cls):
+        # Next to VoidLauncher.exe in the frozen build. Run from source that would be the interpreter's folder,
+        # often read only, so it is the working directory instead, where cached_data.db and the other files go too.
+        if cls.data_folder:
+            return cls.data_folder
+        if getattr(sys, "frozen", False):
+            return os.path.dirname(sys.executable)
+        return os.getcwd()
+
+    @classmethod
+    def get_config_path(cls):
+        return os.path.join(cls.get_data_folder(), cls.config_file)
+
+    @classmethod
+    def default_config(cls):
+        config = configparser.ConfigParser()
+        config["Paths"] = {"game_destination_folder": os.path.join(cls.get_data_folder(), "game")}
+        config["Settings"] = {
+            "disable_initial_dialog": "False",
+            "last_refresh_time": "" 
+        }
+        config["Downloads"] = {
+            "max_concurrent_downloads": "2",
+            "bandwidth_limit_kbps": "0",
+            # Ask the mirror for a patch against an installed neighbour before downloading a whole archive.
+            # The patched files are only checked against the manifest the mirror sends, so this trusts the mirror.
+            "delta_upgrades": "False"
+        }
+        config["Library"] = {
+            # off, hardlink or reflink
+            "install_store_mode": "off"
+        }
+        config["Backups"] = {
+            "snapshot_keep_last": "10",
+            "snapshot_keep_daily": "7",
+            "snapshot_keep_weekly": "4"
+        }
+        config["Mirror"] = {
+            # Where releases, changelogs and archives are fetched from, e.g. http://<mirror machine>:8080
+            "base_url": UPSTREAM_URL,
+            "serve": "False",
+            "port": "8080"
+        }
+        return config
+
+    @classmethod
+    def ensure_config_file_exists(cls):
+        config_path = cls.get_config_path()
+        if not os.path.exists(config_path):
+            # Create the config file with default values
+            with open(config_path, "w") as configfile:
+                cls.default_config().write(configfile)
+
+    @classmethod
+    def load(cls):
+        # config.ini is read once, every getter after that is served from memory
+        with cls._lock:
+            if cls._parser is None:
+                cls.ensure_config_file_exists()
+                config = cls.default_config()
+                config.read(cls.get_config_path())
+                cls._parser = config
+            return cls._parser
+
+    @classmethod
+    def get(cls, section, option):
+        with cls._lock:
+            return cls.load().get(section, option)
+
+    @classmethod
+    def getboolean(cls, section, option):
+        with cls._lock:
+            return cls.load().getboolean(section, option)
+
+    @classmethod
+    def getint(cls, section, option):
+        with cls._lock:
+            return cls.load().getint(section, option)
+
+    @classmethod
+    def set(cls, section, option, value):
+        value = str(value)
+        with cls._lock:
+            config = cls.load()
+            if config.has_option(section, option) and config.get(section, option) == value:
+                return
+            if not config.has_section(section):
+                config.add_section(section)
+            config.set(section, option, value)
+            cls._dirty = True
+            if cls._flush_timer is None:
+                cls._flush_timer = threading.Timer(cls.flush_delay, cls.flush)
+                cls._flush_timer.daemon = True
+                cls._flush_timer.start()
+
+        for listener in list(cls._listeners):
+            listener(section, option, value)
+
+    @classmethod
+    def flush(cls):
+        with cls._lock:
+            if cls._flush_timer is not None:
+                cls._flush_timer.cancel()
+                cls._flush_timer = None
+            if not cls._dirty:
+                return
+
+            # Write next to the real file and swap it in, so a crash never leaves half a config
+            config_path = cls.get_config_path()
+            temp_path = config_path + ".tmp"
+            with open(temp_path, "w") as configfile:
+                cls._parser.write(configfile)
+                configfile.flush()
+                os.fsync(configfile.fileno())
+            os.replace(temp_path, config_path)
+            cls._dirty = False
+
+    @classmethod
+    def add_listener(cls, callback):
+        # callback(section, option, value) is called from whichever thread changed the value
+        cls._listeners.append(callback)
+
+    @classmethod
+    def remove_listener(cls, callback):
+        if callback in cls._listeners:
+            cls._listeners.remove(callback)
+                
+    @classmethod
+    def get_last_refresh_time(cls):
+        return cls.get("Settings", "last_refresh_time")
+
+    @classmethod
+    def set_last_refresh_time(cls, value):
+        cls.set("Settings", "last_refresh_time", value)
+
+    @classmethod
+    def get_game_destination_folder(cls):
+        return cls.get("Paths", "game_destination_folder")
+    
+    @classmethod
+    def set_game_destination_folder(cls, new_folder):
+        cls.set("Paths", "game_destination_folder", new_folder)
+
+    @classmethod
+    def get_disable_initial_dialog(cls):
+        return cls.getboolean("Settings", "disable_initial_dialog")
+
+    @classmethod
+    def set_disable_initial_dialog(cls, value):
+        cls.set("Settings", "disable_initial_dialog", value)
+
+    @classmethod
+    def get_max_concurrent_downloads(cls):
+        return cls.getint("Downloads", "max_concurrent_downloads")
+
+    @classmethod
+    def set_max_concurrent_downloads(cls, value):
+        cls.set("Downloads", "max_concurrent_downloads", value)
+
+    @classmethod
+    def get_bandwidth_limit(cls):
+        # In KB/s, 0 means unlimited
+        return cls.getint("Downloads", "bandwidth_limit_kbps")
+
+    @classmethod
+    def set_bandwidth_limit(cls, value):
+        cls.set("Downloads", "bandwidth_limit_kbps", value)
+
+    @classmethod
+    def get_delta_upgrades(cls):
+        return cls.getboolean("Downloads", "delta_upgrades")
+
+    @classmethod
+    def set_delta_upgrades(cls, value):
+        cls.set("Downloads", "delta_upgrades", value)
+
+    @classmethod
+    def get_snapshot_retention(cls):
+        return (
+            cls.getint("Backups", "snapshot_keep_last"),
+            cls.getint("Backups", "snapshot_keep_daily"),
+            cls.getint("Backups", "snapshot_keep_weekly")
+        )
+
+    @classmethod
+    def get_install_store_mode(cls):
+        return cls.get("Library", "install_store_mode")
+
+    @classmethod
+    def set_install_store_mode(cls, value):
+        cls.set("Library", "install_store_mode", value)
+
+    @classmethod
+    def get_archived_installs_folder(cls):
+        return os.path.join(cls.get_data_folder(), "archives")
+
+    @classmethod
+    def get_base_url(cls):
+        return cls.get("Mirror", "base_url").rstrip("/") or UPSTREAM_URL
+
+    @classmethod
+    def set_base_url(cls, value):
+        cls.set("Mirror", "base_url", value)
+
+    @classmethod
+    def get_mirror_serve(cls):
+        return cls.getboolean("Mirror", "serve")
+
+    @classmethod
+    def set_mirror_serve(cls, value):
+        cls.set("Mirror", "serve", value)
+
+    @classmethod
+    def get_mirror_port(cls):
+        return cls.getint("Mirror", "port")
+
+    @classmethod
+    def set_mirror_port(cls, value):
+        cls.set("Mirror", "port", value)
+
+    @classmethod
+    def get_mirror_folder(cls):
+        return os.path.join(cls.get_data_folder(), "mirror")
+
+def mirror_url(url, base_url=None):
+    # Catalog links always name invotek.net, requests go to the configured base URL instead, e.g. a LAN mirror
+    if not url:
+        return url
+    base_url = (base_url or Config.get_base_url()).rstrip("/")
+    for prefix in UPSTREAM_PREFIXES:
+        if url.startswith(prefix) and url[len(prefix):len(prefix) + 1] in ("", "/", "?"):
+            return base_url + url[len(prefix):]
+    return url
+
+atexit.register(Config.flush)
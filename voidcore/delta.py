@@ -0,0 +1,120 @@
+import os
+import io
+import json
+import tarfile
+import tempfile
+import subprocess
+from urllib.parse import urlencode, urlsplit
+
+from .config import Config, UPSTREAM_URL
+from .download import file_sha256
+from .install import DeltaError, ArchiveExtractor, InstallStore, find_zstd, marked_builds, tree_files
+
+class DeltaBuilder:
+    # Writes the bundle DeltaPatcher applies: files the old build already has are copied on the client,
+    # changed files are zstd patches against the old file (--patch-from), new files are compressed whole
+    compression_level = 12
+
+    def __init__(self):
+        self.zstd = find_zstd()
+        if not self.zstd:
+            raise DeltaError("zstd not found, it is needed to build deltas")
+
+    def build(self, old_folder, new_folder, bundle_path, base, target):
+        # base and target are {"version", "archive_sha256"} of the archives the two folders were extracted from
+        old_files = {path: file_sha256(os.path.join(old_folder, path)).hexdigest() for path in tree_files(old_folder)}
+        old_paths_by_sha256 = {}
+        for path, sha256 in old_files.items():
+            old_paths_by_sha256.setdefault(sha256, path)
+        stats = {"files": 0, "copied": 0, "patched": 0, "full": 0, "tree_bytes": 0, "bundle_bytes": 0}
+        files = []
+
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(bundle_path))) as work_folder:
+            for index, path in enumerate(tree_files(new_folder)):
+                new_path = os.path.join(new_folder, path)
+                sha256 = file_sha256(new_path).hexdigest()
+                entry = {"path": path, "size": os.path.getsize(new_path), "sha256": sha256}
+                if old_files.get(path) == sha256 or sha256 in old_paths_by_sha256:
+                    entry["op"] = "copy"
+                    entry["source"] = path if old_files.get(path) == sha256 else old_paths_by_sha256[sha256]
+                else:
+                    entry["op"] = "patch" if path in old_files else "full"
+                    entry["data"] = f"data/{index}"
+                    self.encode(new_path, os.path.join(old_folder, path) if path in old_files else None, os.path.join(work_folder, str(index)))
+                    if entry["op"] == "patch":
+                        entry["source"] = path
+                stats[{"copy": "copied", "patch": "patched", "full": "full"}[entry["op"]]] += 1
+                stats["files"] += 1
+                stats["tree_bytes"] += entry["size"]
+                files.append(entry)
+
+            dirs = []
+            for root, folders, _ in os.walk(new_folder):
+                folders[:] = [folder for folder in folders if folder not in InstallStore.skipped_folders]
+                dirs.extend(os.path.relpath(os.path.join(root, folder), new_folder).replace(os.sep, "/") for folder in folders)
+            manifest = {
+                "format": 1,
+                "from": base,
+                "to": dict(target, install_name=os.path.basename(new_folder.rstrip("/\\"))),
+                "dirs": sorted(dirs),
+                "files": files
+            }
+
+            temp_path = bundle_path + ".tmp"
+            with tarfile.open(temp_path, "w") as bundle:
+                manifest_bytes = json.dumps(manifest).encode("utf-8")
+                manifest_info = tarfile.TarInfo("manifest.json")
+                manifest_info.size = len(manifest_bytes)
+                bundle.addfile(manifest_info, io.BytesIO(manifest_bytes))
+                for entry in files:
+                    if "data" in entry:
+                        bundle.add(os.path.join(work_folder, entry["data"].split("/")[-1]), arcname=entry["data"])
+            os.replace(temp_path, bundle_path)
+        stats["bundle_bytes"] = os.path.getsize(bundle_path)
+        return stats
+
+    def encode(self, new_path, old_path, output_path):
+        command = [self.zstd, "-q", "-f", f"-{self.compression_level}", "-T0", "--long=31"]
+        if old_path:
+            command.append(f"--patch-from={old_path}")
+        result = subprocess.run(command + [new_path, "-o", output_path], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+        if result.returncode != 0:
+            raise DeltaError(f"zstd failed on '{new_path}': {result.stderr.strip()}")
+
+def build_delta(old_archive, new_archive, bundle_path, base, target):
+    # Both archives are checked against their SHA256 before anything is built from them
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(bundle_path))) as work_folder:
+        old_folder = ArchiveExtractor(os.path.join(work_folder, "old")).extract(old_archive, base["archive_sha256"])
+        new_folder = ArchiveExtractor(os.path.join(work_folder, "new")).extract(new_archive, target["archive_sha256"])
+        return DeltaBuilder().build(old_folder, new_folder, bundle_path, base, target)
+
+def delta_source(catalog, version, library_folder, base_url=None):
+    # The mirror URL of a delta from the nearest installed neighbour of version in the catalog. None unless delta
+    # upgrades were turned on (they trust the mirror), without a mirror (invotek.net has no deltas), without a
+    # neighbour extracted from a verified archive or without a catalog SHA256 the bundle has to be for.
+    # Also None without zstd, a bundle that can not be applied would only be downloaded on top of the full archive.
+    base_url = (base_url or Config.get_base_url()).rstrip("/")
+    links = catalog.version_download_link_map
+    to_sha256 = (catalog.version_sha256_map.get(version) or "").lower()
+    if base_url == UPSTREAM_URL or not Config.get_delta_upgrades() or not to_sha256 or not links.get(version):
+        return None
+    if find_zstd() is None:
+        return None
+    names = catalog.version_names
+    if version not in names:
+        return None
+    builds = marked_builds(library_folder)
+    index = names.index(version)
+    for distance in range(1, len(names)):
+        for neighbour in (index - distance, index + distance):
+            if 0 <= neighbour < len(names) and names[neighbour] in builds and links.get(names[neighbour]):
+                _, from_sha256 = builds[names[neighbour]]
+                return base_url + "/voidlauncher/delta?" + urlencode({
+                    "from": urlsplit(links[names[neighbour]]).path,
+                    "from_version": names[neighbour],
+                    "from_sha256": from_sha256,
+                    "to": urlsplit(links[version]).path,
+                    "to_version": version,
+                    "to_sha256": to_sha256
+                })
+    return None
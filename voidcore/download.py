@@ -0,0 +1,526 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from functools import partial
+
+from .config import mirror_url
+
+# Delta bundles are tar files: manifest.json first, then one zstd stream per file the base build does not have
+DELTA_SUFFIX = ".vldelta"
+
+class DownloadError(Exception):
+    pass
+
+class DownloadCancelled(Exception):
+    pass
+
+def file_sha256(path, start=0, end=None, sha256=None):
+    sha256 = sha256 or hashlib.sha256()
+    with open(path, "rb") as file:
+        file.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            block = file.read(1024 * 1024 if remaining is None else min(1024 * 1024, remaining))
+            if not block:
+                break
+            sha256.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return sha256
+
+class OrderedHasher:
+    # SHA256 of a file whose blocks are written out of order by several connections.
+    # Blocks at the front are hashed as they arrive and blocks further ahead wait in memory,
+    # so the archive is never read a second time. Only what did not fit in max_pending_bytes
+    # is read back from disk once the download is done.
+    max_pending_bytes = 64 * 1024 * 1024
+
+    def __init__(self):
+        self.sha256 = hashlib.sha256()
+        self.offset = 0
+        self.pending = {}
+        self.pending_bytes = 0
+        self.lock = threading.Lock()
+
+    def hash_file(self, path, end):
+        with self.lock:
+            if end > self.offset:
+                file_sha256(path, self.offset, end, self.sha256)
+                self.offset = end
+
+    def update(self, offset, data):
+        with self.lock:
+            if offset != self.offset:
+                if offset > self.offset and self.pending_bytes + len(data) <= self.max_pending_bytes:
+                    self.pending[offset] = data
+                    self.pending_bytes += len(data)
+                return
+
+            self.sha256.update(data)
+            self.offset += len(data)
+            while self.offset in self.pending:
+                data = self.pending.pop(self.offset)
+                self.pending_bytes -= len(data)
+                self.sha256.update(data)
+                self.offset += len(data)
+
+    def finish(self, path, total_size):
+        self.pending.clear()
+        self.pending_bytes = 0
+        self.hash_file(path, total_size if total_size is not None else os.path.getsize(path))
+        return self.sha256.hexdigest()
+
+class SegmentedDownload:
+    # The file is split into fixed size chunks that several connections pull in order.
+    # Chunk progress is written to <file>.part.json, so a stopped download carries on where it left off.
+    chunk_size = 8 * 1024 * 1024
+    connections = 4
+    block_size = 64 * 1024
+    chunk_retries = 3
+
+    def __init__(self, url, destination, connections=None, session=None, progress_callback=None, bandwidth_limiter=None):
+        # self.sha256 holds the SHA256 of the finished file, hashed while it was written
+        self.url = url
+        self.destination = destination
+        self.part_path = destination + ".part"
+        self.state_path = destination + ".part.json"
+        self.connections = connections or self.connections
+        self.session = session or self.create_session()
+        # progress_callback(bytes_written, total_size) is called from the connection threads
+        self.progress_callback = progress_callback
+        self.bandwidth_limiter = bandwidth_limiter
+        self.hasher = OrderedHasher()
+        self.sha256 = None
+        self.cancel_event = threading.Event()
+        self.lock = threading.Lock()
+        self.total_size = None
+        self.validator = None
+        self.bytes_written = 0
+        # Part of bytes_written that was already on disk from an earlier attempt
+        self.resumed_bytes = 0
+        self.completed_chunks = set()
+        # Bytes already on disk for chunks that were started but not finished
+        self.partial_chunks = {}
+        self.pending_chunks = []
+        self.errors = []
+
+    def create_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.connections)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def run(self):
+        supports_ranges = self.probe()
+        if not supports_ranges or not self.total_size:
+            self.download_single_stream()
+        else:
+            self.download_chunks()
+
+        self.sha256 = self.hasher.finish(self.part_path, self.total_size)
+        self.finish_file()
+        return self.destination
+
+    def finish_file(self):
+        os.replace(self.part_path, self.destination)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def probe(self):
+        # A one byte range request tells us the size and whether the server can do ranges at all
+        response = self.session.get(self.url, headers={"Range": "bytes=0-0"}, stream=True, timeout=30)
+        try:
+            response.raise_for_status()
+            self.validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code == 206 and "/" in content_range and not content_range.endswith("/*"):
+                self.total_size = int(content_range.rsplit("/", 1)[1])
+                return True
+            content_length = response.headers.get("Content-Length")
+            self.total_size = int(content_length) if content_length else None
+            return False
+        finally:
+            response.close()
+
+    def contiguous_bytes(self):
+        # Bytes from the start of the file that are already on disk without gaps
+        index = 0
+        while index in self.completed_chunks:
+            index += 1
+        start = min(index * self.chunk_size, self.total_size)
+        return min(start + self.partial_chunks.get(index, 0), self.total_size)
+
+    def chunk_range(self, index):
+        start = index * self.chunk_size
+        return start, min(start + self.chunk_size, self.total_size) - 1
+
+    def load_state(self):
+        if not os.path.exists(self.state_path) or not os.path.exists(self.part_path):
+            return False
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as state_file:
+                state = json.load(state_file)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable download state '{self.state_path}': {e}")
+            return False
+
+        same_file = (
+            state.get("url") == self.url
+            and state.get("total_size") == self.total_size
+            and state.get("chunk_size") == self.chunk_size
+            and state.get("validator") == self.validator
+        )
+        if not same_file or os.path.getsize(self.part_path) != self.total_size:
+            print(f"'{self.url}' changed since the last attempt, starting over")
+            return False
+        self.completed_chunks = set(state.get("completed_chunks", []))
+        self.partial_chunks = {int(index): done for index, done in state.get("partial_chunks", {}).items()}
+        return True
+
+    def save_state(self):
+        # Called with self.lock held
+        state = {
+            "url": self.url,
+            "total_size": self.total_size,
+            "chunk_size": self.chunk_size,
+            "validator": self.validator,
+            "completed_chunks": sorted(self.completed_chunks),
+            "partial_chunks": {str(index): done for index, done in list(self.partial_chunks.items()) if done}
+        }
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as state_file:
+            json.dump(state, state_file)
+        os.replace(temp_path, self.state_path)
+
+    def add_progress(self, byte_count):
+        with self.lock:
+            self.bytes_written += byte_count
+            bytes_written = self.bytes_written
+        if self.progress_callback:
+            self.progress_callback(bytes_written, self.total_size)
+
+    def download_chunks(self):
+        resuming = self.load_state()
+        chunk_count = (self.total_size + self.chunk_size - 1) // self.chunk_size
+        self.pending_chunks = [index for index in range(chunk_count) if index not in self.completed_chunks]
+        # pop() takes from the end, keep the lowest chunk there so the file fills front to back
+        self.pending_chunks.reverse()
+
+        if not resuming:
+            self.completed_chunks = set()
+            self.partial_chunks = {}
+            with open(self.part_path, "wb") as part_file:
+                part_file.truncate(self.total_size)
+        with self.lock:
+            self.save_state()
+
+        resumed_bytes = sum(self.chunk_range(index)[1] - self.chunk_range(index)[0] + 1 for index in self.completed_chunks)
+        resumed_bytes += sum(self.partial_chunks.values())
+        if resumed_bytes:
+            print(f"Resuming '{self.url}' at {resumed_bytes} of {self.total_size} bytes")
+            # The hash state of the earlier attempt is gone, catch up on the front of the file that is already there
+            self.hasher.hash_file(self.part_path, self.contiguous_bytes())
+        self.resumed_bytes = resumed_bytes
+        self.add_progress(resumed_bytes)
+
+        threads = [threading.Thread(target=self.connection_worker, daemon=True) for _ in range(min(self.connections, len(self.pending_chunks)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with self.lock:
+            self.save_state()
+        if self.errors:
+            raise DownloadError(str(self.errors[0]))
+        if self.cancelled:
+            raise DownloadCancelled(self.url)
+
+    def connection_worker(self):
+        import requests
+        with open(self.part_path, "r+b") as part_file:
+            while not self.cancelled:
+                with self.lock:
+                    if not self.pending_chunks:
+                        return
+                    index = self.pending_chunks.pop()
+
+                for attempt in range(1, self.chunk_retries + 1):
+                    try:
+                        finished = self.download_chunk(part_file, index)
+                        break
+                    except (requests.exceptions.RequestException, DownloadError) as e:
+                        if attempt == self.chunk_retries:
+                            self.errors.append(e)
+                            self.cancel()
+                            return
+                        print(f"Retrying chunk {index} of '{self.url}': {e}")
+
+                if not finished:
+                    return
+                with self.lock:
+                    self.completed_chunks.add(index)
+                    self.partial_chunks.pop(index, None)
+                    self.save_state()
+
+    def download_chunk(self, part_file, index):
+        # Returns False when the download was cancelled half way through the chunk
+        start, end = self.chunk_range(index)
+        done = self.partial_chunks.get(index, 0)
+        response = self.session.get(self.url, headers={"Range": f"bytes={start + done}-{end}"}, stream=True, timeout=30)
+        with response:
+            if response.status_code != 206:
+                raise DownloadError(f"Server answered {response.status_code} to a range request")
+            part_file.seek(start + done)
+            for block in response.iter_content(self.block_size):
+                if self.bandwidth_limiter:
+                    self.bandwidth_limiter.consume(len(block))
+                if self.cancelled:
+                    return False
+                part_file.write(block)
+                self.hasher.update(start + done, block)
+                done += len(block)
+                self.partial_chunks[index] = done
+                self.add_progress(len(block))
+        if done != end - start + 1:
+            raise DownloadError(f"Chunk {index} ended after {done} of {end - start + 1} bytes")
+        part_file.flush()
+        return True
+
+    def download_single_stream(self):
+        # No range support, nothing to split up and nothing to resume from
+        response = self.session.get(self.url, stream=True, timeout=30)
+        with response:
+            response.raise_for_status()
+            with open(self.part_path, "wb") as part_file:
+                offset = 0
+                for block in response.iter_content(self.block_size):
+                    if self.bandwidth_limiter:
+                        self.bandwidth_limiter.consume(len(block))
+                    if self.cancelled:
+                        raise DownloadCancelled(self.url)
+                    part_file.write(block)
+                    self.hasher.update(offset, block)
+                    offset += len(block)
+                    self.add_progress(len(block))
+
+class BandwidthLimiter:
+    # Token bucket shared by every connection of every download, 0 means no limit
+    def __init__(self, bytes_per_second=0):
+        self.bytes_per_second = bytes_per_second
+        self.allowance = 0.0
+        self.last_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, bytes_per_second):
+        with self.lock:
+            self.bytes_per_second = bytes_per_second
+            self.allowance = 0.0
+            self.last_time = time.monotonic()
+
+    def consume(self, byte_count):
+        while True:
+            with self.lock:
+                rate = self.bytes_per_second
+                if rate <= 0:
+                    return
+                now = time.monotonic()
+                # At most one second worth of bytes can be saved up
+                self.allowance = min(rate, self.allowance + (now - self.last_time) * rate)
+                self.last_time = now
+                if self.allowance >= min(byte_count, rate):
+                    self.allowance -= byte_count
+                    return
+                wait = (min(byte_count, rate) - self.allowance) / rate
+            time.sleep(min(wait, 0.25))
+
+class DownloadJob:
+    def __init__(self, version, url, destination, expected_sha256=None):
+        self.version = version
+        self.url = url
+        self.destination = destination
+        # From the catalog, and the sum of the bytes we actually wrote
+        self.expected_sha256 = expected_sha256
+        self.sha256 = None
+        # Queued, Downloading, Paused, Completed, Failed or Removed
+        self.state = "Queued"
+        self.error = ""
+        self.bytes_written = 0
+        self.total_size = None
+        self.speed = 0.0
+        self.speed_sample = (time.monotonic(), 0)
+        self.download = None
+        self.thread = None
+        # Time spent actually downloading, pauses not included, and the bytes that came over the network in that time
+        self.active_seconds = 0.0
+        self.transferred_bytes = 0
+        # (url, destination) of the full archive while a delta bundle is downloaded instead
+        self.fallback = None
+
+    @property
+    def progress(self):
+        if self.state == "Completed":
+            return 100
+        if not self.total_size:
+            return 0
+        return int(self.bytes_written * 100 / self.total_size)
+
+class DownloadQueue:
+    # Jobs run in list order, at most max_concurrent at a time, all sharing one BandwidthLimiter.
+    # Pausing keeps the .part file, so resuming picks the download up where it stopped.
+    def __init__(self, destination_folder, max_concurrent=2, bandwidth_limit=0, on_change=None, on_progress=None, on_finished=None):
+        self.destination_folder = destination_folder
+        self.max_concurrent = max_concurrent
+        self.bandwidth_limiter = BandwidthLimiter(bandwidth_limit)
+        self.jobs = []
+        self.lock = threading.RLock()
+        self.on_change = on_change
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+
+    def notify_change(self):
+        if self.on_change:
+            self.on_change()
+
+    def add(self, version, url, expected_sha256=None, delta_url=None):
+        with self.lock:
+            for job in self.jobs:
+                if url in (job.url, job.fallback and job.fallback[0]) and job.state not in ("Completed", "Failed"):
+                    return job
+            os.makedirs(self.destination_folder, exist_ok=True)
+            destination = os.path.join(self.destination_folder, url.split("/")[-1])
+            job = DownloadJob(version, url, destination, expected_sha256)
+            if delta_url:
+                job.fallback = (url, destination)
+                job.url, job.destination = delta_url, destination + DELTA_SUFFIX
+            self.jobs.append(job)
+        self.notify_change()
+        self.schedule()
+        return job
+
+    def schedule(self):
+        with self.lock:
+            running = sum(1 for job in self.jobs if job.state == "Downloading")
+            for job in self.jobs:
+                if running >= self.max_concurrent:
+                    break
+                # A paused job whose thread is still winding down is picked up once it has exited
+                if job.state == "Queued" and job.thread is None:
+                    self.start_job(job)
+                    running += 1
+
+    def start_job(self, job):
+        job.state = "Downloading"
+        job.error = ""
+        job.speed_sample = (time.monotonic(), job.bytes_written)
+        job.download = SegmentedDownload(
+            mirror_url(job.url),
+            job.destination,
+            progress_callback=partial(self.job_progress, job),
+            bandwidth_limiter=self.bandwidth_limiter
+        )
+        job.thread = threading.Thread(target=self.run_job, args=(job,), daemon=True)
+        job.thread.start()
+        self.notify_change()
+
+    def run_job(self, job):
+        import requests
+        started = time.monotonic()
+        try:
+            job.download.run()
+            job.sha256 = job.download.sha256
+            job.state = "Completed"
+        except DownloadCancelled:
+            # pause() or remove() already set the state
+            pass
+        except (requests.exceptions.RequestException, DownloadError, OSError) as e:
+            if job.state == "Downloading" and job.fallback:
+                # The mirror has no delta for this pair (or is still building it), the whole archive it is
+                print(f"No delta for '{job.version}' ({e}), downloading the full archive")
+                job.url, job.destination = job.fallback
+                job.fallback = None
+                job.state = "Queued"
+                job.bytes_written = 0
+                job.total_size = None
+            else:
+                job.state = "Failed"
+                job.error = str(e)
+        finally:
+            with self.lock:
+                # A resumed .part counts only what this attempt fetched, the rest came in before a restart
+                job.transferred_bytes += max(job.download.bytes_written - job.download.resumed_bytes, 0)
+                job.download = None
+                job.thread = None
+                job.speed = 0.0
+                job.active_seconds += time.monotonic() - started
+
+        self.notify_change()
+        if job.state in ("Completed", "Failed") and self.on_finished:
+            self.on_finished(job)
+        self.schedule()
+
+    def job_progress(self, job, bytes_written, total_size):
+        job.bytes_written = bytes_written
+        job.total_size = total_size
+        now = time.monotonic()
+        sample_time, sample_bytes = job.speed_sample
+        if now - sample_time >= 1.0:
+            job.speed = (bytes_written - sample_bytes) / (now - sample_time)
+            job.speed_sample = (now, bytes_written)
+        if self.on_progress:
+            self.on_progress(job)
+
+    def pause(self, job):
+        with self.lock:
+            if job.state == "Downloading":
+                job.state = "Paused"
+                job.download.cancel()
+            elif job.state == "Queued":
+                job.state = "Paused"
+        self.notify_change()
+        self.schedule()
+
+    def resume(self, job):
+        with self.lock:
+            if job.state in ("Paused", "Failed"):
+                job.state = "Queued"
+        self.notify_change()
+        self.schedule()
+
+    def move(self, job, offset):
+        with self.lock:
+            index = self.jobs.index(job)
+            new_index = min(max(index + offset, 0), len(self.jobs) - 1)
+            self.jobs.insert(new_index, self.jobs.pop(index))
+        self.notify_change()
+        self.schedule()
+
+    def remove(self, job):
+        with self.lock:
+            if job.state == "Downloading":
+                job.download.cancel()
+            job.state = "Removed"
+            if job in self.jobs:
+                self.jobs.remove(job)
+        self.notify_change()
+        self.schedule()
+
+    def set_max_concurrent(self, max_concurrent):
+        with self.lock:
+            self.max_concurrent = max(1, max_concurrent)
+        self.schedule()
+
+    def set_bandwidth_limit(self, bytes_per_second):
+        self.bandwidth_limiter.set_rate(bytes_per_second)
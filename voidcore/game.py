@@ -0,0 +1,279 @@
+import os
+import time
+import threading
+import subprocess
+import collections
+
+from .saves import SaveBackup, SnapshotStore, SaveProfiles
+from .telemetry import Telemetry
+
+class SessionLog:
+    # One log per game session in game logs/<version>/, rolled over to .1, .2 ... when it gets too big.
+    # Old sessions beyond keep_sessions are deleted when a new one starts.
+    max_bytes = 5 * 1024 * 1024
+    backup_count = 3
+    keep_sessions = 20
+
+    def __init__(self, folder, version):
+        self.folder = os.path.join(folder, version)
+        os.makedirs(self.folder, exist_ok=True)
+        self.prune_sessions()
+        self.path = os.path.join(self.folder, time.strftime("session-%Y%m%d-%H%M%S.log"))
+        self.lock = threading.Lock()
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.size = self.file.tell()
+
+    def prune_sessions(self):
+        sessions = sorted(name for name in os.listdir(self.folder) if name.startswith("session-") and name.endswith(".log"))
+        for name in sessions[:max(len(sessions) - self.keep_sessions + 1, 0)]:
+            for suffix in [""] + [f".{index}" for index in range(1, self.backup_count + 1)]:
+                path = os.path.join(self.folder, name + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def write(self, line):
+        data = line + "\n"
+        with self.lock:
+            if self.file is None:
+                return
+            if self.size + len(data) > self.max_bytes:
+                self.rotate()
+            self.file.write(data)
+            self.size += len(data)
+
+    def rotate(self):
+        self.file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.size = 0
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+class GameProcess:
+    # Starts the game and follows its process tree from a background thread. VotV.exe only starts
+    # VotV-Win64-Shipping.exe, so its children are picked up while the game boots and then waited on
+    # through their process handles until every one of them is gone.
+    # on_started(version, pid) and on_exited(version, returncode, runtime) are called from that thread.
+    game_process_names = {"votv-win64-shipping.exe"}
+    # How long to keep looking for the shipping exe after the launch, and how often
+    child_discovery_seconds = 30
+    child_poll_interval = 0.25
+
+    # Lines waiting for the live view, the oldest are dropped if nobody reads them
+    max_pending_lines = 5000
+
+    def __init__(self, log_folder="game logs", on_started=None, on_exited=None):
+        self.on_started = on_started
+        self.on_exited = on_exited
+        self.finished = threading.Event()
+        self.result = None
+        self.process = None
+        self.tracked = {}
+        self.log_folder = log_folder
+        self.session_log = None
+        self.pending_lines = collections.deque(maxlen=self.max_pending_lines)
+
+    def running(self):
+        return self.process is not None
+
+    def launch(self, version, game_path):
+        if self.running():
+            raise RuntimeError("The game is already running")
+        process = subprocess.Popen(
+            [game_path],
+            cwd=os.path.dirname(game_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            errors="replace"
+        )
+        self.process = process
+        self.finished.clear()
+        self.session_log = SessionLog(self.log_folder, version)
+        # A reader per pipe, so a full stderr never stalls stdout or the game
+        readers = [
+            threading.Thread(target=self.capture_output, args=(process.stdout, ""), daemon=True),
+            threading.Thread(target=self.capture_output, args=(process.stderr, "[stderr] "), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+        threading.Thread(target=self.supervise, args=(version, process, readers), daemon=True).start()
+        return process.pid
+
+    def capture_output(self, stream, prefix):
+        for line in stream:
+            line = f"{time.strftime('%H:%M:%S')} {prefix}{line.rstrip()}"
+            self.session_log.write(line)
+            self.pending_lines.append(line)
+
+    def take_lines(self, limit=1000):
+        # Called from the GUI timer, hands over whatever arrived since the last call
+        lines = []
+        while self.pending_lines and len(lines) < limit:
+            lines.append(self.pending_lines.popleft())
+        return lines
+
+    def discover_children(self):
+        import psutil
+        found_game = False
+        for tracked_process in list(self.tracked.values()):
+            try:
+                for child in tracked_process.children(recursive=True):
+                    if child.pid not in self.tracked:
+                        self.tracked[child.pid] = child
+                    found_game = found_game or child.name().lower() in self.game_process_names
+            except psutil.Error:
+                pass
+        return found_game
+
+    def find_orphaned_game(self):
+        # The launcher exe quit before its child was seen, one look at the process table finds it again
+        import psutil
+        for candidate in psutil.process_iter(attrs=["name"]):
+            if (candidate.info["name"] or "").lower() in self.game_process_names:
+                self.tracked[candidate.pid] = candidate
+                return True
+        return False
+
+    def supervise(self, version, process, readers):
+        import psutil
+        start = time.monotonic()
+        print(f"Game PID: {process.pid}")
+        if self.on_started:
+            self.on_started(version, process.pid)
+        try:
+            self.tracked = {process.pid: psutil.Process(process.pid)}
+        except psutil.NoSuchProcess:
+            self.tracked = {}
+
+        returncode = None
+        deadline = start + self.child_discovery_seconds
+        found_game = False
+        while self.tracked:
+            discovering = not found_game and time.monotonic() < deadline
+            if discovering:
+                found_game = self.discover_children()
+            # Once the game itself is known this blocks on the handles and costs nothing until it exits
+            gone, _ = psutil.wait_procs(list(self.tracked.values()), timeout=self.child_poll_interval if discovering else None)
+            for gone_process in gone:
+                self.tracked.pop(gone_process.pid, None)
+                if gone_process.pid == process.pid:
+                    returncode = gone_process.returncode
+            if gone and self.tracked:
+                found_game = self.discover_children() or found_game
+            if not self.tracked and not found_game and time.monotonic() - start < self.child_discovery_seconds:
+                found_game = self.find_orphaned_game()
+
+        if returncode is None:
+            returncode = process.wait()
+        runtime = time.monotonic() - start
+        for reader in readers:
+            # Children can keep the pipes open, the log is closed either way
+            reader.join(timeout=2)
+        self.session_log.close()
+        self.process = None
+        print(f"Game exited with code {returncode} after {runtime:.0f}s")
+        if self.on_exited:
+            self.on_exited(version, returncode, runtime)
+        self.result = (returncode, runtime)
+        self.finished.set()
+
+    def wait(self):
+        # For callers without an event loop, returns (returncode, runtime) once the whole tree is gone
+        self.finished.wait()
+        return self.result
+
+def default_save_folder():
+    return os.path.join(os.path.expanduser("~"), "AppData", "Local", "VotV", "Saved")
+
+class GameLauncher:
+    # Everything around one play session that is not the game itself: putting the version's saves in
+    # place before it starts, then backing them up, snapshotting them and recording how long it all took.
+    def __init__(self, data_folder="", save_folder=None, telemetry=None, retention=(10, 7, 4)):
+        self.backups_folder = os.path.join(data_folder, "game backups")
+        self.log_folder = os.path.join(data_folder, "game logs")
+        self.save_profiles = SaveProfiles(save_folder or default_save_folder())
+        self.telemetry = telemetry or Telemetry()
+        self.retention = retention
+
+    def backup_folder(self, version):
+        return os.path.join(self.backups_folder, version, "Saved")
+
+    def snapshot_store(self, version):
+        return SnapshotStore(os.path.join(self.backups_folder, version, "snapshots"))
+
+    def prepare(self, version):
+        # One rename puts this version's saves in place, however big they are. Returns the seconds it took.
+        started = time.perf_counter()
+        self.save_profiles.activate(version, seed_folder=self.backup_folder(version))
+        if not os.path.exists(self.save_profiles.save_folder):
+            os.makedirs(self.save_profiles.save_folder)
+        return time.perf_counter() - started
+
+    def backup(self, version):
+        print("Starting backup...")
+        started = time.perf_counter()
+        try:
+            with self.save_profiles.lock:
+                # The live folder may hold another version by now, only back up this version's own saves
+                self.save_profiles.recover()
+                folder = self.save_profiles.saves_folder(version)
+                if folder is None:
+                    raise FileNotFoundError(f"'{version}' has no saves yet, a version gets its own once it is launched from here")
+                stats = SaveBackup(self.backup_folder(version)).backup(folder)
+            print("Backup completed successfully.")
+        except Exception as e:
+            print(f"Error during backup: {str(e)}")
+            # Callers tell a backup that did not run from one that had nothing to copy by this key
+            stats = {"error": str(e)}
+        stats["backup_seconds"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        try:
+            # The snapshot reads the backup, not the live saves, an old backup is not snapshotted again after a failed one
+            if "error" not in stats and os.path.isdir(self.backup_folder(version)):
+                store = self.snapshot_store(version)
+                stats["snapshot_id"], _ = store.create(self.backup_folder(version))
+                store.prune(*self.retention)
+        except Exception as e:
+            print(f"Error during snapshot: {str(e)}")
+        stats["snapshot_seconds"] = time.perf_counter() - started
+        return stats
+
+    def restore(self, version, snapshot_id):
+        # Into the saves the game loads, the profile or the live Saved folder, never just the spare copy
+        with self.save_profiles.lock:
+            self.save_profiles.recover()
+            folder = self.save_profiles.saves_folder(version)
+            if folder is None:
+                os.makedirs(self.save_profiles.profiles_folder, exist_ok=True)
+                folder = self.save_profiles.profile_path(version)
+            self.snapshot_store(version).restore(snapshot_id, folder)
+            self.save_profiles.write_marker(folder, version)
+            # The restored files no longer match what the incremental backup remembers, so it starts over from them
+            backup = SaveBackup(self.backup_folder(version))
+            if os.path.exists(backup.manifest_path):
+                os.remove(backup.manifest_path)
+            backup.backup(folder)
+
+    def finish(self, version, returncode, runtime, launch_prep_seconds):
+        stats = self.backup(version)
+        self.telemetry.record(
+            "session",
+            version=version,
+            returncode=returncode,
+            launch_prep_seconds=launch_prep_seconds,
+            runtime_seconds=runtime,
+            backup_seconds=stats["backup_seconds"],
+            backup_copied_bytes=stats.get("copied_bytes", 0),
+            backup_skipped_bytes=stats.get("skipped_bytes", 0),
+            snapshot_seconds=stats["snapshot_seconds"]
+        )
+        return stats
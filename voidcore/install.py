@@ -0,0 +1,509 @@
+import os
+import json
+import errno
+import shutil
+import hashlib
+import tarfile
+import threading
+import subprocess
+import time
+
+from .download import DELTA_SUFFIX, file_sha256
+
+# Written into every install extracted from a verified archive so a later version can be patched from it,
+# the archive SHA256 ties it to the catalog. Builds patched from a delta do not get one.
+BUILD_MARKER = ".voidlauncher_build.json"
+
+class ExtractionError(Exception):
+    pass
+
+class DeltaError(ExtractionError):
+    pass
+
+def find_zstd():
+    return shutil.which("zstd")
+
+def write_build_marker(install_folder, version, archive_sha256):
+    with open(os.path.join(install_folder, BUILD_MARKER), "w", encoding="utf-8") as marker_file:
+        json.dump({"version": version, "archive_sha256": archive_sha256.lower()}, marker_file)
+
+def read_build_marker(install_folder):
+    try:
+        with open(os.path.join(install_folder, BUILD_MARKER), "r", encoding="utf-8") as marker_file:
+            marker = json.load(marker_file)
+        return marker if marker.get("version") and marker.get("archive_sha256") else None
+    except (OSError, ValueError):
+        return None
+
+def marked_builds(library_folder):
+    # {version: (install folder, archive SHA256)} of the installs that can be the base of a delta
+    builds = {}
+    if os.path.isdir(library_folder):
+        for entry in os.scandir(library_folder):
+            if entry.is_dir() and not entry.name.startswith("."):
+                marker = read_build_marker(entry.path)
+                if marker:
+                    builds[marker["version"]] = (entry.path, marker["archive_sha256"])
+    return builds
+
+def tree_files(folder):
+    # Relative paths of the files a build ships with, the marker and Saved folders are not part of it
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [name for name in dirs if name not in InstallStore.skipped_folders]
+        for file in files:
+            path = os.path.relpath(os.path.join(root, file), folder)
+            if path != BUILD_MARKER:
+                paths.append(path.replace(os.sep, "/"))
+    return sorted(paths)
+
+class ArchiveExtractor:
+    # Unpacks one archive into a hidden folder next to the library and renames it into place,
+    # so the library never sees a half extracted build.
+    seven_zip_candidates = [
+        'C:\\Program Files\\7-Zip\\7z.exe',
+        'C:\\Program Files (x86)\\7-Zip\\7z.exe'
+    ]
+
+    def __init__(self, destination_folder):
+        self.destination_folder = destination_folder
+
+    @classmethod
+    def find_seven_zip(cls):
+        for name in ('7z', '7zz', '7za'):
+            path = shutil.which(name)
+            if path:
+                return path
+        for path in cls.seven_zip_candidates:
+            if os.path.exists(path):
+                return path
+        return None
+
+    @staticmethod
+    def archive_stem(archive_path):
+        name = os.path.basename(archive_path)
+        for suffix in ('.tar.gz', '.tar.xz', '.tar.bz2', '.7z', '.zip', '.tar'):
+            if name.lower().endswith(suffix):
+                return name[:-len(suffix)]
+        return os.path.splitext(name)[0]
+
+    @staticmethod
+    def verify(archive_path, expected_sha256, known_sha256=None):
+        # known_sha256 comes from the download engine, only archives without one are read again
+        actual_sha256 = known_sha256 or file_sha256(archive_path).hexdigest()
+        if actual_sha256.lower() != expected_sha256.lower():
+            raise ExtractionError(f"SHA256 mismatch for '{os.path.basename(archive_path)}': expected {expected_sha256}, got {actual_sha256}. Refusing to extract it.")
+        return actual_sha256
+
+    def extract(self, archive_path, expected_sha256=None, known_sha256=None):
+        if expected_sha256:
+            self.verify(archive_path, expected_sha256, known_sha256)
+        else:
+            print(f"No SHA256 known for '{archive_path}', extracting it unverified")
+        os.makedirs(self.destination_folder, exist_ok=True)
+        stem = self.archive_stem(archive_path)
+        temp_folder = os.path.join(self.destination_folder, f".extracting-{stem}")
+        if os.path.exists(temp_folder):
+            shutil.rmtree(temp_folder)
+        os.makedirs(temp_folder)
+
+        try:
+            self.decode(archive_path, temp_folder)
+
+            # Archives either hold a single build folder or the build files themselves
+            entries = os.listdir(temp_folder)
+            if len(entries) == 1 and os.path.isdir(os.path.join(temp_folder, entries[0])) and entries[0] != "WindowsNoEditor":
+                source_folder, install_name = os.path.join(temp_folder, entries[0]), entries[0]
+            else:
+                source_folder, install_name = temp_folder, stem
+
+            install_folder = os.path.join(self.destination_folder, install_name)
+            self.move_into_place(source_folder, install_folder)
+            return install_folder
+        finally:
+            if os.path.exists(temp_folder):
+                shutil.rmtree(temp_folder, ignore_errors=True)
+
+    def decode(self, archive_path, output_folder):
+        if not archive_path.lower().endswith(".7z"):
+            shutil.unpack_archive(archive_path, output_folder)
+            return
+
+        seven_zip_path = self.find_seven_zip()
+        if seven_zip_path:
+            result = subprocess.run([seven_zip_path, 'x', archive_path, '-o' + output_folder, '-y'], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+            if result.returncode != 0:
+                raise ExtractionError(f"7-Zip failed on '{archive_path}': {result.stderr.strip()}")
+            return
+
+        # No 7-Zip installed (or not on Windows), fall back to the pure Python decoder
+        try:
+            import py7zr
+        except ImportError:
+            raise ExtractionError("7-Zip not found. Please install 7-Zip or the py7zr package to extract 7z archives.")
+        with py7zr.SevenZipFile(archive_path, mode='r') as archive:
+            archive.extractall(path=output_folder)
+
+    def move_into_place(self, source_folder, install_folder):
+        # Swap an older copy of the same build out first, a rename can not replace a non-empty folder
+        replaced_folder = None
+        if os.path.exists(install_folder):
+            replaced_folder = os.path.join(self.destination_folder, f".replaced-{os.path.basename(install_folder)}")
+            if os.path.exists(replaced_folder):
+                shutil.rmtree(replaced_folder)
+            os.replace(install_folder, replaced_folder)
+        os.replace(source_folder, install_folder)
+        if replaced_folder:
+            shutil.rmtree(replaced_folder, ignore_errors=True)
+
+class InstallStore:
+    # Content addressed pool of every file of every installed build, kept in <library>/.store.
+    # Install folders hold hard links (or reflinks) to the pool, so a file shared by many builds is stored once.
+    # Hard links share one inode: a mod or patcher that writes into a build's files in place changes that file
+    # in the pool and in every build linked to it. Reflinks are clones, the pool keeps a clone of its own.
+    # A blob nothing links to anymore has a link count of 1 and is removed by garbage_collect, unless a
+    # reflinked install still lists it in .store/refs.
+    store_folder_name = ".store"
+    # Games write logs and settings here, those must stay private to each build
+    skipped_folders = {"Saved"}
+    ficlone = 0x40049409
+
+    def __init__(self, library_folder, mode="hardlink"):
+        self.library_folder = library_folder
+        self.mode = mode
+        self.objects_folder = os.path.join(library_folder, self.store_folder_name, "objects")
+        self.refs_folder = os.path.join(library_folder, self.store_folder_name, "refs")
+
+    def blob_path(self, digest):
+        return os.path.join(self.objects_folder, digest[:2], digest)
+
+    def link(self, source, destination):
+        # Reflink mode never falls back to a hard link, that would let builds share writes behind the user's back
+        if self.mode != "reflink":
+            os.link(source, destination)
+        elif not self.reflink(source, destination):
+            raise OSError(errno.EOPNOTSUPP, "The library file system can not make reflinks", destination)
+
+    def supports_reflinks(self):
+        # Clones a scratch file inside the pool, only Linux has FICLONE and only some file systems (btrfs, XFS) implement it
+        source = os.path.join(self.objects_folder, ".reflink-test")
+        destination = source + "-clone"
+        if not os.path.isdir(self.library_folder):
+            return False
+        try:
+            os.makedirs(self.objects_folder, exist_ok=True)
+            with open(source, "wb") as source_file:
+                source_file.write(b"voidlauncher")
+            return self.reflink(source, destination)
+        except OSError:
+            return False
+        finally:
+            for path in (source, destination):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def reflink(self, source, destination):
+        # Copy on write clone (btrfs, XFS), so builds never share writes. Returns False where that is not possible.
+        try:
+            import fcntl
+        except ImportError:
+            return False
+        try:
+            with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+                fcntl.ioctl(destination_file.fileno(), self.ficlone, source_file.fileno())
+            return True
+        except OSError:
+            if os.path.exists(destination):
+                os.remove(destination)
+            return False
+
+    def store_file(self, path):
+        # Moves path into the pool, or swaps it for a link if the pool already has the same bytes.
+        # Returns the number of bytes saved.
+        file_stat = os.stat(path)
+        if file_stat.st_nlink > 1:
+            return 0
+        digest = file_sha256(path).hexdigest()
+        blob = self.blob_path(digest)
+        if self.mode == "reflink":
+            self.add_reference(path, digest)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            if self.mode == "reflink":
+                # A clone of its own, writes into the install must not reach the builds cloned from the pool later
+                self.link(path, blob + ".tmp")
+                os.replace(blob + ".tmp", blob)
+            else:
+                os.link(path, blob)
+            return 0
+
+        temp_path = path + ".voidlink"
+        self.link(blob, temp_path)
+        shutil.copystat(path, temp_path)
+        os.replace(temp_path, path)
+        return file_stat.st_size
+
+    def add_reference(self, path, digest):
+        # One list of blobs per install folder, named after it
+        install_name = os.path.relpath(path, self.library_folder).split(os.sep)[0]
+        os.makedirs(self.refs_folder, exist_ok=True)
+        with open(os.path.join(self.refs_folder, install_name), "a", encoding="utf-8") as refs_file:
+            refs_file.write(digest + "\n")
+
+    def referenced_digests(self):
+        # Blobs reflinked installs were cloned from, lists of installs that are gone are dropped
+        digests = set()
+        if os.path.isdir(self.refs_folder):
+            for entry in os.scandir(self.refs_folder):
+                if not os.path.isdir(os.path.join(self.library_folder, entry.name)):
+                    os.remove(entry.path)
+                    continue
+                with open(entry.path, "r", encoding="utf-8") as refs_file:
+                    digests.update(line.strip() for line in refs_file)
+        return digests
+
+    def ingest(self, install_folder):
+        saved_bytes = 0
+        if self.mode == "reflink" and not self.supports_reflinks():
+            print(f"Install store: no reflinks on the file system of '{self.library_folder}', '{os.path.basename(install_folder)}' stays a full copy")
+            return saved_bytes
+        # A build extracted again under the same name starts a new list
+        refs_path = os.path.join(self.refs_folder, os.path.basename(install_folder))
+        if os.path.exists(refs_path):
+            os.remove(refs_path)
+        for root, dirs, files in os.walk(install_folder):
+            dirs[:] = [folder for folder in dirs if folder not in self.skipped_folders]
+            for file in files:
+                path = os.path.join(root, file)
+                if os.path.islink(path):
+                    continue
+                try:
+                    saved_bytes += self.store_file(path)
+                except OSError as e:
+                    print(f"Could not add '{path}' to the install store: {e}")
+        print(f"Install store: '{os.path.basename(install_folder)}' saved {saved_bytes / 1024 / 1024:.1f} MB")
+        return saved_bytes
+
+    def copy_function(self, source, destination):
+        # For shutil.copytree: files the pool already has are linked instead of copied
+        shutil.copy2(source, destination)
+        if self.skipped_folders.isdisjoint(os.path.normpath(destination).split(os.sep)):
+            self.store_file(destination)
+        return destination
+
+    def space_report(self):
+        # Logical size is what the installs would take as full copies, actual size counts every inode once.
+        # Reflinked files share blocks, not inodes, so in reflink mode there is nothing here to measure savings by.
+        logical_bytes = 0
+        actual_bytes = 0
+        seen_inodes = set()
+        for root, dirs, files in os.walk(self.library_folder):
+            in_store = os.path.relpath(root, self.library_folder).split(os.sep)[0] == self.store_folder_name
+            for file in files:
+                try:
+                    file_stat = os.stat(os.path.join(root, file))
+                except OSError:
+                    continue
+                if not in_store:
+                    logical_bytes += file_stat.st_size
+                inode = (file_stat.st_dev, file_stat.st_ino)
+                if inode not in seen_inodes:
+                    seen_inodes.add(inode)
+                    actual_bytes += file_stat.st_size
+        if self.mode == "reflink":
+            return {"mode": self.mode, "logical_bytes": logical_bytes, "actual_bytes": None, "saved_bytes": None}
+        return {
+            "mode": self.mode,
+            "logical_bytes": logical_bytes,
+            "actual_bytes": actual_bytes,
+            "saved_bytes": max(logical_bytes - actual_bytes, 0)
+        }
+
+    def garbage_collect(self):
+        removed_files = 0
+        removed_bytes = 0
+        if not os.path.exists(self.objects_folder):
+            return removed_files, removed_bytes
+        referenced = self.referenced_digests()
+        for root, _, files in os.walk(self.objects_folder):
+            for file in files:
+                blob = os.path.join(root, file)
+                file_stat = os.stat(blob)
+                if file_stat.st_nlink == 1 and file not in referenced:
+                    os.remove(blob)
+                    removed_files += 1
+                    removed_bytes += file_stat.st_size
+        return removed_files, removed_bytes
+
+def verify_archives(archive_folder, expected_sha256s):
+    # expected_sha256s maps archive file names to the SHA256 from the catalog, returns (file, status) pairs
+    results = []
+    if os.path.exists(archive_folder):
+        for file in sorted(os.listdir(archive_folder)):
+            archive_path = os.path.join(archive_folder, file)
+            if file.endswith((".part", ".json", ".tmp", DELTA_SUFFIX)) or not os.path.isfile(archive_path):
+                continue
+            expected_sha256 = expected_sha256s.get(file)
+            if not expected_sha256:
+                results.append((file, "no SHA256 in the catalog"))
+                continue
+            try:
+                ArchiveExtractor.verify(archive_path, expected_sha256)
+                results.append((file, "OK"))
+            except ExtractionError:
+                results.append((file, "MISMATCH"))
+            except OSError as e:
+                results.append((file, f"unreadable: {e}"))
+    return results
+
+class DeltaPatcher:
+    # Builds a version from an installed neighbour plus a delta bundle. The bundle has to be for the archive
+    # SHA256 the catalog lists, and every file it produces is checked against the bundle manifest.
+    # That manifest comes from the mirror too, so the result is only as trustworthy as the mirror. It gets no
+    # build marker and is never the base of another delta.
+    block_size = 1024 * 1024
+
+    def __init__(self, library_folder, store_mode="off"):
+        self.library_folder = library_folder
+        self.store_mode = store_mode
+        if store_mode == "reflink" and not InstallStore(library_folder, store_mode).supports_reflinks():
+            self.store_mode = "off"
+        self.zstd = find_zstd()
+
+    def apply(self, bundle_path, expected_sha256):
+        if not self.zstd:
+            raise DeltaError("zstd not found, a delta can not be applied without it")
+        # A damaged bundle or manifest has to end up as a DeltaError too, that is what makes callers fall back to the full archive
+        try:
+            return self.patch(bundle_path, expected_sha256)
+        except (tarfile.TarError, KeyError, TypeError, AttributeError, ValueError) as e:
+            raise DeltaError(f"'{os.path.basename(bundle_path)}' is not a usable delta bundle: {e!r}")
+
+    def patch(self, bundle_path, expected_sha256):
+        with tarfile.open(bundle_path, "r") as bundle:
+            manifest_file = bundle.extractfile("manifest.json")
+            if manifest_file is None:
+                raise ValueError("manifest.json is not a file")
+            manifest = json.load(manifest_file)
+            target = manifest["to"]
+            if not expected_sha256 or target["archive_sha256"].lower() != expected_sha256.lower():
+                raise DeltaError(f"The delta for '{target['version']}' does not build the archive in the catalog, refusing to apply it")
+            base_folder = None
+            for folder, archive_sha256 in marked_builds(self.library_folder).values():
+                if archive_sha256 == manifest["from"]["archive_sha256"].lower():
+                    base_folder = folder
+            if base_folder is None:
+                raise DeltaError(f"'{manifest['from']['version']}' is not installed anymore, the delta needs it")
+
+            # The manifest comes from over the network, none of its paths may point outside the new install
+            paths = [target["install_name"]] + manifest["dirs"] + [entry["path"] for entry in manifest["files"]]
+            paths += [entry["source"] for entry in manifest["files"] if entry.get("source")]
+            if any(os.path.isabs(path) or ".." in path.replace("\\", "/").split("/") for path in paths):
+                raise DeltaError(f"The delta for '{target['version']}' has paths outside the install folder")
+
+            temp_folder = os.path.join(self.library_folder, f".patching-{target['install_name']}")
+            if os.path.exists(temp_folder):
+                shutil.rmtree(temp_folder)
+            os.makedirs(temp_folder)
+            try:
+                for folder in manifest["dirs"]:
+                    os.makedirs(os.path.join(temp_folder, folder), exist_ok=True)
+                for entry in manifest["files"]:
+                    output_path = os.path.join(temp_folder, entry["path"])
+                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                    if entry["op"] == "copy":
+                        sha256 = self.copy(os.path.join(base_folder, entry["source"]), output_path)
+                    else:
+                        source_path = os.path.join(base_folder, entry["source"]) if entry["op"] == "patch" else None
+                        sha256 = self.decode(bundle.extractfile(entry["data"]), source_path, output_path)
+                    if sha256 != entry["sha256"]:
+                        raise DeltaError(f"'{entry['path']}' came out different from the one in '{target['version']}', the base build was changed")
+                install_folder = os.path.join(self.library_folder, target["install_name"])
+                ArchiveExtractor(self.library_folder).move_into_place(temp_folder, install_folder)
+                return install_folder
+            finally:
+                if os.path.exists(temp_folder):
+                    shutil.rmtree(temp_folder, ignore_errors=True)
+
+    def copy(self, source_path, output_path):
+        # Unchanged files are linked when the install store is on, they would end up as links to the same blob anyway
+        if self.store_mode != "off":
+            InstallStore(self.library_folder, self.store_mode).link(source_path, output_path)
+            return file_sha256(source_path).hexdigest()
+        sha256 = hashlib.sha256()
+        with open(source_path, "rb") as source_file, open(output_path, "wb") as output_file:
+            for block in iter(lambda: source_file.read(self.block_size), b""):
+                sha256.update(block)
+                output_file.write(block)
+        return sha256.hexdigest()
+
+    def decode(self, data, source_path, output_path):
+        # The patch is streamed out of the bundle into zstd and the result hashed on its way to disk
+        command = [self.zstd, "-q", "-d", "-c", "--long=31"]
+        if source_path:
+            command.append(f"--patch-from={source_path}")
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        feed_errors = []
+        feeder = threading.Thread(target=self.feed, args=(data, process.stdin, feed_errors), daemon=True)
+        feeder.start()
+        sha256 = hashlib.sha256()
+        with open(output_path, "wb") as output_file:
+            for block in iter(lambda: process.stdout.read(self.block_size), b""):
+                sha256.update(block)
+                output_file.write(block)
+        feeder.join()
+        if feed_errors:
+            raise feed_errors[0]
+        if process.wait() != 0:
+            raise DeltaError(f"zstd could not apply the patch for '{output_path}'")
+        return sha256.hexdigest()
+
+    def feed(self, data, stdin, errors):
+        # stdin is closed whatever happens, zstd would wait for the rest of a truncated patch forever
+        try:
+            shutil.copyfileobj(data, stdin, self.block_size)
+        except tarfile.TarError as e:
+            errors.append(e)
+        except (BrokenPipeError, OSError):
+            pass
+        finally:
+            try:
+                stdin.close()
+            except OSError:
+                pass
+
+class Installer:
+    # Turns a downloaded archive (or delta bundle) into a library install: verify, extract, delete the archive,
+    # hand the files to the install store and record how long it took
+    def __init__(self, library_folder, store_mode="off", telemetry=None):
+        self.library_folder = library_folder
+        self.store_mode = store_mode
+        self.telemetry = telemetry
+
+    def install(self, version, archive_path, expected_sha256=None, known_sha256=None):
+        started = time.perf_counter()
+        archive_bytes = os.path.getsize(archive_path)
+        delta = archive_path.endswith(DELTA_SUFFIX)
+        if delta:
+            install_folder = DeltaPatcher(self.library_folder, self.store_mode).apply(archive_path, expected_sha256)
+        else:
+            install_folder = ArchiveExtractor(self.library_folder).extract(archive_path, expected_sha256, known_sha256)
+            if expected_sha256 or known_sha256:
+                write_build_marker(install_folder, version, expected_sha256 or known_sha256)
+        extraction_seconds = time.perf_counter() - started
+
+        os.remove(archive_path)
+        print(f"{'Patched' if delta else 'Extracted'} '{archive_path}' to '{install_folder}' and deleted the archive")
+        started = time.perf_counter()
+        if self.store_mode != "off":
+            InstallStore(self.library_folder, self.store_mode).ingest(install_folder)
+        if self.telemetry:
+            self.telemetry.record(
+                "extraction",
+                version=version,
+                archive_bytes=archive_bytes,
+                delta=delta,
+                seconds=extraction_seconds,
+                install_store_seconds=time.perf_counter() - started
+            )
+        return install_folder
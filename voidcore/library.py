@@ -0,0 +1,132 @@
+import os
+import json
+import threading
+
+class LibraryIndex:
+    # Remembers where each install keeps its exe, so the library does not have to be walked on every refresh.
+    # An entry stays valid while the exe and the folders it was found through keep their mtimes.
+    index_file = "library_index.json"
+    exe_name = "votv.exe"
+    # The exe sits at <install>/WindowsNoEditor/VotV.exe, nothing deeper has to be looked at
+    max_depth = 3
+    pruned_folders = {"engine", "saved", "content", "binaries"}
+
+    def __init__(self, path=None):
+        self.path = path or self.index_file
+        self.library_folder = None
+        self.installs = {}
+        self.lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as index_file:
+                data = json.load(index_file)
+            self.library_folder = data.get("library_folder")
+            self.installs = data.get("installs", {})
+        except (OSError, ValueError):
+            self.library_folder = None
+            self.installs = {}
+
+    def save(self):
+        with self.lock:
+            data = {"library_folder": self.library_folder, "installs": self.installs}
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w") as index_file:
+                json.dump(data, index_file)
+            os.replace(temp_path, self.path)
+
+    def names(self):
+        with self.lock:
+            return sorted(name for name, entry in self.installs.items() if entry["exe"])
+
+    def watched_folders(self):
+        # The library folder plus every folder an entry depends on, a change in any of them can add or drop an install
+        with self.lock:
+            if self.library_folder is None:
+                return []
+            folders = {self.library_folder}
+            for entry in self.installs.values():
+                folders.update(entry["folders"])
+            return sorted(folders)
+
+    def lookup(self, name):
+        with self.lock:
+            entry = self.installs.get(name)
+            return entry["exe"] if entry else None
+
+    def refresh(self, library_folder):
+        # One scandir of the library plus a few stats per install, only new or changed installs get scanned
+        with self.lock:
+            if self.library_folder != library_folder:
+                self.library_folder = library_folder
+                self.installs = {}
+            changed = False
+            listed = set()
+            with os.scandir(library_folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+                        continue
+                    listed.add(entry.name)
+                    if entry.name not in self.installs or not self.is_valid(self.installs[entry.name]):
+                        self.installs[entry.name] = self.scan_install(entry.path)
+                        changed = True
+            for name in set(self.installs) - listed:
+                del self.installs[name]
+                changed = True
+            if changed:
+                self.save()
+            return self.names()
+
+    def update_install(self, name):
+        # Rescans a single install, or drops it when its folder is gone. Returns the exe path or None.
+        with self.lock:
+            if self.library_folder is None:
+                return None
+            folder = os.path.join(self.library_folder, name)
+            if os.path.isdir(folder):
+                self.installs[name] = self.scan_install(folder)
+            else:
+                self.installs.pop(name, None)
+            self.save()
+            return self.lookup(name)
+
+    def is_valid(self, entry):
+        try:
+            for folder, mtime in entry["folders"].items():
+                if os.stat(folder).st_mtime_ns != mtime:
+                    return False
+            if entry["exe"]:
+                exe_stat = os.stat(entry["exe"])
+                return exe_stat.st_size == entry["size"] and exe_stat.st_mtime_ns == entry["mtime"]
+            return True
+        except OSError:
+            return False
+
+    def scan_install(self, install_folder):
+        # Breadth first so the shallowest exe wins, and no folder below max_depth is ever listed
+        folders = {}
+        level = [install_folder]
+        for _ in range(self.max_depth):
+            next_level = []
+            for folder in level:
+                try:
+                    folders[folder] = os.stat(folder).st_mtime_ns
+                    with os.scandir(folder) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name.lower() not in self.pruned_folders and not entry.name.startswith("."):
+                                    next_level.append(entry.path)
+                            elif entry.name.lower() == self.exe_name:
+                                exe_stat = entry.stat()
+                                return {
+                                    "exe": entry.path,
+                                    "size": exe_stat.st_size,
+                                    "mtime": exe_stat.st_mtime_ns,
+                                    # Only the folders on the way down matter, a moved or renamed exe changes one of them
+                                    "folders": {path: mtime for path, mtime in folders.items() if entry.path.startswith(path + os.sep)}
+                                }
+                except OSError as e:
+                    print(f"Could not scan '{folder}': {e}")
+            level = next_level
+        return {"exe": None, "size": 0, "mtime": 0, "folders": folders}
@@ -0,0 +1,438 @@
+import os
+import re
+import json
+import time
+import shutil
+import threading
+from urllib.parse import quote, urljoin, urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from .config import UPSTREAM_URL
+from .download import DELTA_SUFFIX, DownloadError, DownloadCancelled, SegmentedDownload
+from .install import ExtractionError, DeltaError
+from .delta import build_delta
+
+# What delta_source asks for, deltas are built here from the mirrored archives of both versions
+DELTA_PATH = "/voidlauncher/delta"
+
+class MirrorDownload(SegmentedDownload):
+    # Readers hold file_lock while they have the part file open, Windows cannot rename a file that is open
+    def __init__(self, url, destination, file_lock, **kwargs):
+        self.file_lock = file_lock
+        super().__init__(url, destination, **kwargs)
+
+    def finish_file(self):
+        with self.file_lock:
+            super().finish_file()
+
+class MirrorPathError(Exception):
+    pass
+
+class ArchiveFill:
+    # One upstream download of an archive that any number of clients read from while it is still arriving.
+    # Chunks are flushed once they are complete, so only completed chunks are handed out before the end.
+    def __init__(self, url, destination):
+        self.destination = destination
+        self.condition = threading.Condition()
+        self.done = False
+        self.error = None
+        self.download = MirrorDownload(url, destination, self.condition, progress_callback=self.progress)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def progress(self, bytes_written, total_size):
+        with self.condition:
+            self.condition.notify_all()
+
+    def run(self):
+        import requests
+        try:
+            self.download.run()
+        except (DownloadError, DownloadCancelled, OSError, requests.exceptions.RequestException) as e:
+            print(f"Mirror download of '{self.download.url}' failed: {e}")
+            self.error = e
+        with self.condition:
+            self.done = True
+            self.condition.notify_all()
+
+    def wait_for_size(self, timeout=60):
+        # None when the upstream could not tell us the size
+        with self.condition:
+            self.condition.wait_for(lambda: self.download.total_size is not None or self.done, timeout)
+            return self.download.total_size if self.error is None else None
+
+    def available(self, offset):
+        # Called with the condition held
+        if self.done:
+            return self.error is None
+        return offset // self.download.chunk_size in self.download.completed_chunks
+
+    def read(self, offset, size):
+        with self.condition:
+            while not self.available(offset):
+                if self.done:
+                    raise DownloadError(f"'{self.download.url}' could not be mirrored: {self.error}")
+                self.condition.wait(1)
+            if not self.done:
+                chunk_end = (offset // self.download.chunk_size + 1) * self.download.chunk_size
+                with open(self.download.part_path, "rb") as part_file:
+                    part_file.seek(offset)
+                    return part_file.read(min(size, chunk_end - offset))
+        with open(self.destination, "rb") as archive_file:
+            archive_file.seek(offset)
+            return archive_file.read(size)
+
+class MirrorCache:
+    # Pages (the releases page, changelogs) are served from disk for page_max_age seconds and then revalidated
+    # with the upstream. Archives never change once released, each one is downloaded from the upstream once.
+    page_max_age = 300
+    archive_extensions = (".7z", ".zip", ".rar")
+    # A delta request waits this long for its build, less than the client timeout. After that it gets a 503
+    # and downloads the full archive, the next client to ask gets the delta.
+    delta_wait = 20
+
+    def __init__(self, folder, upstream_url=UPSTREAM_URL):
+        self.folder = folder
+        self.upstream_url = upstream_url.rstrip("/")
+        self.pages_folder = os.path.join(folder, "pages")
+        self.archives_folder = os.path.join(folder, "archives")
+        self.deltas_folder = os.path.join(folder, "deltas")
+        os.makedirs(self.pages_folder, exist_ok=True)
+        os.makedirs(self.archives_folder, exist_ok=True)
+        os.makedirs(self.deltas_folder, exist_ok=True)
+        self.lock = threading.Lock()
+        self.page_locks = {}
+        self.fills = {}
+        self.delta_builds = {}
+        # Builds that failed are not tried again until the mirror restarts, each try extracts two whole builds
+        self.delta_errors = {}
+        self._session = None
+        self.stats = {
+            "page_hits": 0, "page_fetches": 0, "archive_hits": 0, "archive_fetches": 0,
+            "delta_hits": 0, "delta_builds": 0, "bytes_served": 0
+        }
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def upstream(self, path):
+        # Only ever a URL on the upstream host, a path like "@other-host/" must not turn the mirror into a proxy
+        if not path.startswith("/") or path.startswith("//"):
+            raise MirrorPathError(f"'{path}' is not a path on the upstream")
+        url = urljoin(self.upstream_url + "/", path.lstrip("/"))
+        if urlsplit(url).netloc != urlsplit(self.upstream_url).netloc:
+            raise MirrorPathError(f"'{path}' is not a path on the upstream")
+        return url
+
+    def count(self, stat, amount=1):
+        with self.lock:
+            self.stats[stat] += amount
+
+    def cache_name(self, path):
+        # One flat file per URL, quoting keeps every name inside the cache folder
+        return quote(path, safe="")
+
+    def is_archive(self, path):
+        return urlsplit(path).path.lower().endswith(self.archive_extensions)
+
+    def page(self, path):
+        # Returns (body, meta), a stale copy is better than nothing when the upstream is down
+        import requests
+        page_path = os.path.join(self.pages_folder, self.cache_name(path))
+        with self.lock:
+            page_lock = self.page_locks.setdefault(page_path, threading.Lock())
+        # One upstream request per page however many clients ask for it at the same time
+        with page_lock:
+            meta = self.load_meta(page_path)
+            if meta is not None and time.time() - meta["fetched"] < self.page_max_age:
+                self.count("page_hits")
+            else:
+                try:
+                    meta = self.fetch_page(path, page_path, meta)
+                except requests.exceptions.RequestException as e:
+                    if meta is None:
+                        raise
+                    print(f"Serving the cached copy of '{path}', the upstream failed: {e}")
+            with open(page_path, "rb") as page_file:
+                return page_file.read(), meta
+
+    def load_meta(self, page_path):
+        try:
+            with open(page_path + ".json", "r", encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            return meta if os.path.exists(page_path) else None
+        except (OSError, ValueError):
+            return None
+
+    def fetch_page(self, path, page_path, meta):
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        response = self.session.get(self.upstream(path), headers=headers, timeout=30)
+        self.count("page_fetches")
+        if response.status_code == 304 and meta is not None:
+            meta["fetched"] = time.time()
+        else:
+            response.raise_for_status()
+            # Pages are read whole and never kept open, so replacing them is safe on Windows too
+            temp_path = page_path + ".tmp"
+            with open(temp_path, "wb") as page_file:
+                page_file.write(response.content)
+            os.replace(temp_path, page_path)
+            meta = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "content_type": response.headers.get("Content-Type", "application/octet-stream"),
+                "fetched": time.time()
+            }
+        with open(page_path + ".json.tmp", "w", encoding="utf-8") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(page_path + ".json.tmp", page_path + ".json")
+        return meta
+
+    def archive(self, path):
+        # Returns (path, None) for an archive that is on disk, or (None, fill) for one that is still arriving
+        name = self.cache_name(urlsplit(path).path)
+        archive_path = os.path.join(self.archives_folder, name)
+        with self.lock:
+            fill = self.fills.get(name)
+            if fill is not None and fill.done:
+                # Finished, or failed and worth another try
+                del self.fills[name]
+                fill = None
+            if fill is not None:
+                return None, fill
+            if os.path.exists(archive_path):
+                self.stats["archive_hits"] += 1
+                return archive_path, None
+            # A fill that was interrupted last time carries on from its .part.json
+            fill = ArchiveFill(self.upstream(urlsplit(path).path), archive_path)
+            self.fills[name] = fill
+            self.stats["archive_fetches"] += 1
+            return None, fill
+
+    def delta(self, query):
+        # Returns the bundle path, or None while it is still being built. The first request starts the build.
+        params = {key: values[0] for key, values in parse_qs(query).items() if len(values) == 1}
+        for side in ("from", "to"):
+            self.upstream(params.get(side, ""))
+            if not self.is_archive(params.get(side, "")) or not re.fullmatch(r"[0-9a-f]{64}", params.get(f"{side}_sha256", "")):
+                raise DeltaError("A delta needs the path and SHA256 of both archives")
+        name = f"{params['from_sha256'][:16]}-{params['to_sha256'][:16]}{DELTA_SUFFIX}"
+        bundle_path = os.path.join(self.deltas_folder, name)
+        with self.lock:
+            if os.path.exists(bundle_path):
+                self.stats["delta_hits"] += 1
+                return bundle_path
+            if name in self.delta_errors:
+                raise DeltaError(self.delta_errors[name])
+            build = self.delta_builds.get(name)
+            if build is None:
+                build = threading.Thread(target=self.build_delta, args=(name, bundle_path, params), daemon=True)
+                self.delta_builds[name] = build
+                self.stats["delta_builds"] += 1
+                build.start()
+        build.join(self.delta_wait)
+        if os.path.exists(bundle_path):
+            return bundle_path
+        if name in self.delta_errors:
+            raise DeltaError(self.delta_errors[name])
+        return None
+
+    def build_delta(self, name, bundle_path, params):
+        import requests
+        started = time.perf_counter()
+        try:
+            archive_paths = []
+            for side in ("from", "to"):
+                archive_path, fill = self.archive(params[side])
+                if fill is not None:
+                    fill.thread.join()
+                    if fill.error is not None:
+                        raise DownloadError(f"'{params[side]}' could not be mirrored: {fill.error}")
+                    archive_path = fill.destination
+                archive_paths.append(archive_path)
+            stats = build_delta(
+                archive_paths[0], archive_paths[1], bundle_path,
+                {"version": params.get("from_version", ""), "archive_sha256": params["from_sha256"]},
+                {"version": params.get("to_version", ""), "archive_sha256": params["to_sha256"]}
+            )
+            print(f"Built the delta {params.get('from_version')} -> {params.get('to_version')}: "
+                  f"{stats['bundle_bytes'] / 1024 / 1024:.1f} MB instead of {stats['tree_bytes'] / 1024 / 1024:.1f} MB "
+                  f"in {time.perf_counter() - started:.0f}s")
+        except (ExtractionError, DownloadError, OSError, shutil.ReadError, requests.exceptions.RequestException) as e:
+            print(f"Building the delta {params.get('from_version')} -> {params.get('to_version')} failed: {e}")
+            self.delta_errors[name] = str(e)
+        finally:
+            with self.lock:
+                del self.delta_builds[name]
+
+class MirrorRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    block_size = 1024 * 1024
+
+    def log_request(self, code="-", size="-"):
+        # Every chunk of every download is a request of its own, only failures are worth a line
+        if isinstance(code, int) and code >= 400:
+            super().log_request(code, size)
+
+    def do_GET(self):
+        self.handle_mirror_request(send_body=True)
+
+    def do_HEAD(self):
+        self.handle_mirror_request(send_body=False)
+
+    def handle_mirror_request(self, send_body):
+        import requests
+        cache = self.server.cache
+        self.response_started = False
+        try:
+            if not self.path.startswith("/") or self.path.startswith("//"):
+                raise MirrorPathError(f"'{self.path}' is not a path on the upstream")
+            if urlsplit(self.path).path == DELTA_PATH:
+                self.send_delta(cache, send_body)
+            elif cache.is_archive(self.path):
+                self.send_archive(cache, send_body)
+            else:
+                self.send_page(cache, send_body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except MirrorPathError as e:
+            self.send_error(400, str(e))
+        except DeltaError as e:
+            self.send_error(404, str(e))
+        except (requests.exceptions.RequestException, DownloadError, OSError) as e:
+            if self.response_started:
+                # Half a body was sent already, dropping the connection is the only way to tell the client
+                self.close_connection = True
+                return
+            status = getattr(getattr(e, "response", None), "status_code", None) or 502
+            self.send_error(status, str(e))
+
+    def requested_range(self, total_size):
+        # (start, end) of a single "bytes=" range, None for the whole file, False when it cannot be satisfied
+        header = self.headers.get("Range")
+        if not header or not header.startswith("bytes=") or "," in header:
+            return None
+        first, _, last = header[len("bytes="):].strip().partition("-")
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else total_size - 1
+            else:
+                start = max(total_size - int(last), 0)
+                end = total_size - 1
+        except ValueError:
+            return None
+        if start >= total_size or end < start:
+            return False
+        return start, min(end, total_size - 1)
+
+    def start_response(self, total_size, content_type, etag=None, last_modified=None):
+        # Returns the (start, end) to send, or None when the response is already complete
+        byte_range = self.requested_range(total_size)
+        if byte_range and self.headers.get("If-Range") and self.headers.get("If-Range") != etag:
+            byte_range = None
+        if byte_range is False:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{total_size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        if byte_range is None:
+            start, end = 0, total_size - 1
+            self.send_response(200)
+        else:
+            start, end = byte_range
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{total_size}")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(end - start + 1))
+        if etag:
+            self.send_header("ETag", etag)
+        if last_modified:
+            self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        self.response_started = True
+        return start, end
+
+    def send_page(self, cache, send_body):
+        body, meta = cache.page(self.path)
+        if meta.get("etag") and self.headers.get("If-None-Match") == meta["etag"]:
+            self.send_response(304)
+            self.send_header("ETag", meta["etag"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        byte_range = self.start_response(len(body), meta["content_type"], meta.get("etag"), meta.get("last_modified"))
+        if byte_range and send_body:
+            start, end = byte_range
+            self.wfile.write(body[start:end + 1])
+            cache.count("bytes_served", end - start + 1)
+
+    def send_archive(self, cache, send_body):
+        archive_path, fill = cache.archive(self.path)
+        if fill is None:
+            self.send_file(cache, archive_path, send_body)
+            return
+        total_size = fill.wait_for_size()
+        if total_size is None:
+            raise DownloadError(f"The upstream did not send '{self.path}'")
+        # Archives never change under the same name, the size is enough to tell a resuming client it is the same file
+        byte_range = self.start_response(total_size, "application/octet-stream", f'"{total_size:x}"')
+        if byte_range and send_body:
+            start, end = byte_range
+            self.copy_blocks(cache, start, end, fill.read)
+
+    def send_delta(self, cache, send_body):
+        bundle_path = cache.delta(urlsplit(self.path).query)
+        if bundle_path is None:
+            self.send_response(503)
+            self.send_header("Retry-After", "60")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        # Bundles are named after both archive SHA256s, so they never change under the same name either
+        self.send_file(cache, bundle_path, send_body)
+
+    def send_file(self, cache, path, send_body):
+        total_size = os.path.getsize(path)
+        byte_range = self.start_response(total_size, "application/octet-stream", f'"{total_size:x}"')
+        if byte_range and send_body:
+            start, end = byte_range
+            with open(path, "rb") as file:
+                file.seek(start)
+                self.copy_blocks(cache, start, end, lambda offset, size: file.read(size))
+
+    def copy_blocks(self, cache, start, end, read):
+        offset = start
+        while offset <= end:
+            block = read(offset, min(self.block_size, end - offset + 1))
+            if not block:
+                raise DownloadError(f"'{self.path}' ended at {offset} of {end + 1} bytes")
+            self.wfile.write(block)
+            offset += len(block)
+            cache.count("bytes_served", len(block))
+
+class MirrorServer(ThreadingHTTPServer):
+    # Serves a MirrorCache to the other launchers on the LAN, each client gets its own thread
+    daemon_threads = True
+
+    def __init__(self, cache, host="0.0.0.0", port=8080):
+        self.cache = cache
+        super().__init__((host, port), MirrorRequestHandler)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        print(f"Mirroring {self.cache.upstream_url} on port {self.server_address[1]} from '{self.cache.folder}'")
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,414 @@
+import os
+import json
+import time
+import zlib
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class SaveBackup:
+    # Mirrors a Saved folder into a backup folder, copying only what changed since the last backup.
+    # The manifest keeps size, mtime and a hash per file, files matching it are not read at all.
+    manifest_file = "backup_manifest.json"
+    block_size = 1024 * 1024
+
+    def __init__(self, backup_folder, manifest_path=None):
+        self.backup_folder = backup_folder
+        self.manifest_path = manifest_path or os.path.join(os.path.dirname(backup_folder), self.manifest_file)
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, "r") as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, manifest):
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(temp_path, self.manifest_path)
+
+    def file_hash(self, path):
+        file_hash = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(self.block_size), b""):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    def copy_file(self, source, destination):
+        # Copies through a temp file and hashes on the way, so the source is read once
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        file_hash = hashlib.blake2b(digest_size=16)
+        temp_path = destination + ".tmp"
+        with open(source, "rb") as source_file, open(temp_path, "wb") as destination_file:
+            for block in iter(lambda: source_file.read(self.block_size), b""):
+                file_hash.update(block)
+                destination_file.write(block)
+        shutil.copystat(source, temp_path)
+        os.replace(temp_path, destination)
+        return file_hash.hexdigest()
+
+    def backup(self, save_folder):
+        manifest = self.load_manifest()
+        new_manifest = {}
+        stats = {"copied_files": 0, "copied_bytes": 0, "skipped_files": 0, "skipped_bytes": 0, "deleted_files": 0}
+
+        for root, _, files in os.walk(save_folder):
+            for item in files:
+                source_item = os.path.join(root, item)
+                relative_path = os.path.relpath(source_item, save_folder).replace(os.sep, "/")
+                destination_item = os.path.join(self.backup_folder, relative_path)
+                try:
+                    file_stat = os.stat(source_item)
+                    if file_stat.st_size == 0:
+                        # The game leaves empty files behind while it writes, never let one replace a real backup
+                        print(f"Skipping empty file: {source_item}")
+                        if relative_path in manifest:
+                            new_manifest[relative_path] = manifest[relative_path]
+                        continue
+
+                    entry = manifest.get(relative_path)
+                    backed_up = entry is not None and os.path.exists(destination_item)
+                    if backed_up and entry["size"] == file_stat.st_size and entry["mtime"] == file_stat.st_mtime_ns:
+                        new_manifest[relative_path] = entry
+                        stats["skipped_files"] += 1
+                        stats["skipped_bytes"] += file_stat.st_size
+                        continue
+
+                    if backed_up and entry["size"] == file_stat.st_size:
+                        # Touched but maybe not changed, a hash is cheaper than a copy
+                        file_hash = self.file_hash(source_item)
+                        if file_hash == entry["hash"]:
+                            new_manifest[relative_path] = {"size": file_stat.st_size, "mtime": file_stat.st_mtime_ns, "hash": file_hash}
+                            stats["skipped_files"] += 1
+                            stats["skipped_bytes"] += file_stat.st_size
+                            continue
+
+                    file_hash = self.copy_file(source_item, destination_item)
+                    new_manifest[relative_path] = {"size": file_stat.st_size, "mtime": file_stat.st_mtime_ns, "hash": file_hash}
+                    stats["copied_files"] += 1
+                    stats["copied_bytes"] += file_stat.st_size
+                except OSError as e:
+                    print(f"Error copying file: {source_item} - {str(e)}")
+                    if relative_path in manifest:
+                        new_manifest[relative_path] = manifest[relative_path]
+
+        # Files the game deleted go from the backup as well, anything the manifest never knew about is left alone
+        for relative_path in set(manifest) - set(new_manifest):
+            destination_item = os.path.join(self.backup_folder, relative_path)
+            try:
+                os.remove(destination_item)
+                stats["deleted_files"] += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error deleting file: {destination_item} - {str(e)}")
+                new_manifest[relative_path] = manifest[relative_path]
+
+        self.save_manifest(new_manifest)
+        print(
+            f"Backup: copied {stats['copied_files']} files ({stats['copied_bytes'] / 1024 / 1024:.1f} MB), "
+            f"skipped {stats['skipped_files']} unchanged ({stats['skipped_bytes'] / 1024 / 1024:.1f} MB), "
+            f"deleted {stats['deleted_files']}"
+        )
+        return stats
+
+class SnapshotStore:
+    # History of a save folder. Files are cut into chunks stored once by SHA256 and zlib compressed,
+    # a snapshot is only a small json list of chunk hashes, so unchanged data costs nothing to keep again.
+    chunk_size = 256 * 1024
+    compression_level = 6
+    # hashlib and zlib release the GIL, so these threads really do use several cores
+    workers = os.cpu_count() or 4
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.chunks_folder = os.path.join(folder, "chunks")
+        self.snapshots_folder = os.path.join(folder, "snapshots")
+
+    def chunk_path(self, digest):
+        return os.path.join(self.chunks_folder, digest[:2], digest)
+
+    def store_chunk(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.chunk_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as chunk_file:
+                chunk_file.write(zlib.compress(data, self.compression_level))
+            os.replace(temp_path, path)
+            return digest, len(data)
+        return digest, 0
+
+    def read_chunks(self, path):
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(self.chunk_size), b""):
+                yield block
+
+    def create(self, save_folder):
+        # Files with the size and mtime of the last snapshot reuse its chunk list without being read
+        snapshot_ids = self.snapshot_ids()
+        previous = self.load(snapshot_ids[-1]) if snapshot_ids else {"files": {}}
+        files = {}
+        stats = {"files": 0, "reused_files": 0, "bytes": 0, "new_bytes": 0}
+        # Chunks read but not stored yet, so a multi-GB first snapshot never sits in memory all at once
+        in_flight = threading.BoundedSemaphore(self.workers * 4)
+
+        def submit(executor, data):
+            in_flight.acquire()
+            future = executor.submit(self.store_chunk, data)
+            future.add_done_callback(lambda _: in_flight.release())
+            return future
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            for root, _, names in os.walk(save_folder):
+                for name in names:
+                    path = os.path.join(root, name)
+                    relative_path = os.path.relpath(path, save_folder).replace(os.sep, "/")
+                    try:
+                        file_stat = os.stat(path)
+                    except OSError as e:
+                        print(f"Could not snapshot '{path}': {e}")
+                        continue
+                    stats["files"] += 1
+                    stats["bytes"] += file_stat.st_size
+                    entry = {"size": file_stat.st_size, "mtime": file_stat.st_mtime_ns}
+                    old_entry = previous["files"].get(relative_path)
+                    if old_entry and old_entry["size"] == entry["size"] and old_entry["mtime"] == entry["mtime"]:
+                        files[relative_path] = old_entry
+                        stats["reused_files"] += 1
+                        continue
+                    try:
+                        pending[relative_path] = (entry, [submit(executor, data) for data in self.read_chunks(path)])
+                    except OSError as e:
+                        print(f"Could not snapshot '{path}': {e}")
+            for relative_path, (entry, futures) in pending.items():
+                entry["chunks"] = []
+                for future in futures:
+                    digest, new_bytes = future.result()
+                    entry["chunks"].append(digest)
+                    stats["new_bytes"] += new_bytes
+                files[relative_path] = entry
+
+        created = time.time()
+        snapshot_id = time.strftime("%Y%m%d-%H%M%S", time.localtime(created)) + f"-{int(created * 1000000) % 1000000:06d}"
+        snapshot = {"id": snapshot_id, "created": created, "files": files}
+        os.makedirs(self.snapshots_folder, exist_ok=True)
+        temp_path = os.path.join(self.snapshots_folder, snapshot_id + ".json.tmp")
+        with open(temp_path, "w") as snapshot_file:
+            json.dump(snapshot, snapshot_file)
+        os.replace(temp_path, os.path.join(self.snapshots_folder, snapshot_id + ".json"))
+        print(f"Snapshot {snapshot_id}: {stats['files']} files, {stats['new_bytes'] / 1024 / 1024:.1f} MB of new data")
+        return snapshot_id, stats
+
+    def load(self, snapshot_id):
+        with open(os.path.join(self.snapshots_folder, snapshot_id + ".json"), "r") as snapshot_file:
+            return json.load(snapshot_file)
+
+    def snapshot_ids(self):
+        # Oldest first, the ids sort by time
+        if not os.path.isdir(self.snapshots_folder):
+            return []
+        return sorted(name[:-len(".json")] for name in os.listdir(self.snapshots_folder) if name.endswith(".json"))
+
+    def list(self):
+        snapshots = []
+        for snapshot_id in self.snapshot_ids():
+            try:
+                snapshot = self.load(snapshot_id)
+            except (OSError, ValueError):
+                continue
+            snapshots.append({
+                "id": snapshot["id"],
+                "created": snapshot["created"],
+                "files": len(snapshot["files"]),
+                "size": sum(entry["size"] for entry in snapshot["files"].values())
+            })
+        return snapshots
+
+    def diff(self, old_id, new_id):
+        old_files = self.load(old_id)["files"]
+        new_files = self.load(new_id)["files"]
+        return {
+            "added": sorted(set(new_files) - set(old_files)),
+            "removed": sorted(set(old_files) - set(new_files)),
+            "changed": sorted(path for path in set(old_files) & set(new_files) if old_files[path]["chunks"] != new_files[path]["chunks"])
+        }
+
+    def restore(self, snapshot_id, destination):
+        # Built next to the destination and swapped in, a failed restore leaves the old folder as it was
+        snapshot = self.load(snapshot_id)
+        temp_folder = destination.rstrip("/\\") + ".restoring"
+        old_folder = destination.rstrip("/\\") + ".before-restore"
+        for folder in (temp_folder, old_folder):
+            if os.path.exists(folder):
+                shutil.rmtree(folder)
+
+        def restore_file(item):
+            relative_path, entry = item
+            path = os.path.join(temp_folder, *relative_path.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                for digest in entry["chunks"]:
+                    with open(self.chunk_path(digest), "rb") as chunk_file:
+                        file.write(zlib.decompress(chunk_file.read()))
+            os.utime(path, ns=(entry["mtime"], entry["mtime"]))
+
+        os.makedirs(temp_folder)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(restore_file, snapshot["files"].items()))
+        if os.path.exists(destination):
+            os.replace(destination, old_folder)
+        os.replace(temp_folder, destination)
+        if os.path.exists(old_folder):
+            shutil.rmtree(old_folder)
+        print(f"Restored snapshot {snapshot_id} to '{destination}'")
+
+    def prune(self, keep_last=10, keep_daily=7, keep_weekly=4):
+        # Keeps the newest keep_last snapshots, plus the newest one of each of the last keep_daily days and keep_weekly weeks
+        snapshots = list(reversed(self.list()))
+        keep = {snapshot["id"] for snapshot in snapshots[:keep_last]}
+        for count, period in ((keep_daily, "%Y-%m-%d"), (keep_weekly, "%G-%V")):
+            periods = set()
+            for snapshot in snapshots:
+                key = time.strftime(period, time.localtime(snapshot["created"]))
+                if key not in periods and len(periods) < count:
+                    periods.add(key)
+                    keep.add(snapshot["id"])
+        removed = [snapshot["id"] for snapshot in snapshots if snapshot["id"] not in keep]
+        for snapshot_id in removed:
+            os.remove(os.path.join(self.snapshots_folder, snapshot_id + ".json"))
+        if removed:
+            self.collect_chunks()
+        return removed
+
+    def collect_chunks(self):
+        used = set()
+        for snapshot_id in self.snapshot_ids():
+            for entry in self.load(snapshot_id)["files"].values():
+                used.update(entry["chunks"])
+        removed_bytes = 0
+        for root, _, names in os.walk(self.chunks_folder):
+            for name in names:
+                if name not in used:
+                    path = os.path.join(root, name)
+                    removed_bytes += os.path.getsize(path)
+                    os.remove(path)
+        return removed_bytes
+
+    def disk_usage(self):
+        total = 0
+        for root, _, names in os.walk(self.folder):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in names)
+        return total
+
+class SaveProfiles:
+    # One save folder per version, all kept next to the live Saved folder so switching is a pair of renames
+    # on the same volume instead of moving every file. A journal written before the renames lets recover()
+    # finish or undo a switch that was cut off half way.
+    marker_file = ".voidlauncher_profile"
+    journal_file = "switch_journal.json"
+    # Whatever was in Saved before the launcher managed it
+    default_profile = "default"
+
+    def __init__(self, save_folder):
+        self.save_folder = save_folder.rstrip("/\\")
+        self.profiles_folder = self.save_folder + ".profiles"
+        self.journal_path = os.path.join(self.profiles_folder, self.journal_file)
+        self.lock = threading.RLock()
+
+    def profile_path(self, name):
+        return os.path.join(self.profiles_folder, name)
+
+    def read_marker(self, folder):
+        try:
+            with open(os.path.join(folder, self.marker_file), "r") as marker:
+                return marker.read().strip() or self.default_profile
+        except OSError:
+            return self.default_profile
+
+    def write_marker(self, folder, name):
+        with open(os.path.join(folder, self.marker_file), "w") as marker:
+            marker.write(name)
+
+    def active_profile(self):
+        if not os.path.isdir(self.save_folder):
+            return None
+        return self.read_marker(self.save_folder)
+
+    def create_profile(self, name, seed_folder=None):
+        # A version seen for the first time starts from its old backup, the only copy this ever makes
+        temp_path = self.profile_path(name) + ".creating"
+        if os.path.exists(temp_path):
+            shutil.rmtree(temp_path)
+        if seed_folder and os.path.isdir(seed_folder):
+            shutil.copytree(seed_folder, temp_path)
+        else:
+            os.makedirs(temp_path)
+        self.write_marker(temp_path, name)
+        os.rename(temp_path, self.profile_path(name))
+
+    def check_name(self, name):
+        # The name becomes a folder inside profiles_folder, anything else would move the wrong folder into Saved
+        if name in ("", ".", "..") or "/" in name or "\\" in name:
+            raise ValueError(f"'{name}' can not be used as a save profile name")
+
+    def saves_folder(self, name):
+        # Where the saves of name are right now: the live folder while it is active, its profile otherwise,
+        # None when it has none yet. Call with the lock held, a switch moves the folders.
+        self.check_name(name)
+        if self.active_profile() == name:
+            return self.save_folder
+        return self.profile_path(name) if os.path.isdir(self.profile_path(name)) else None
+
+    def activate(self, name, seed_folder=None):
+        self.check_name(name)
+        with self.lock:
+            self.recover()
+            current = self.active_profile()
+            if current == name:
+                return
+            os.makedirs(self.profiles_folder, exist_ok=True)
+            if not os.path.isdir(self.profile_path(name)):
+                self.create_profile(name, seed_folder)
+
+            with open(self.journal_path, "w") as journal:
+                json.dump({"current": current, "target": name}, journal)
+                journal.flush()
+                os.fsync(journal.fileno())
+
+            if current is not None:
+                self.write_marker(self.save_folder, current)
+                parked_path = self.profile_path(current)
+                if os.path.exists(parked_path):
+                    # Left over from a crash before the journal existed, keep it rather than lose it
+                    os.rename(parked_path, f"{parked_path}.stale-{int(time.time())}")
+                os.rename(self.save_folder, parked_path)
+            os.rename(self.profile_path(name), self.save_folder)
+            os.remove(self.journal_path)
+            print(f"Save profile '{name}' is active, '{current}' parked")
+
+    def recover(self):
+        with self.lock:
+            try:
+                with open(self.journal_path, "r") as journal:
+                    switch = json.load(journal)
+            except FileNotFoundError:
+                return
+            except (OSError, ValueError):
+                switch = {}
+
+            target_path = self.profile_path(switch.get("target") or "")
+            if not os.path.isdir(self.save_folder):
+                # The old profile was parked but the new one never moved in, finish the switch
+                if switch.get("target") and os.path.isdir(target_path):
+                    os.rename(target_path, self.save_folder)
+                elif switch.get("current") and os.path.isdir(self.profile_path(switch["current"])):
+                    os.rename(self.profile_path(switch["current"]), self.save_folder)
+            os.remove(self.journal_path)
+            print(f"Recovered an interrupted save profile switch, '{self.active_profile()}' is active")
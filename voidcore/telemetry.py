@@ -0,0 +1,66 @@
+import json
+import time
+import threading
+import statistics
+
+class Telemetry:
+    # Append only log of how long sessions, downloads and extractions took, one json object per line.
+    # Nothing is ever rewritten, a torn last line from a crash is skipped when reading.
+    telemetry_file = "telemetry.jsonl"
+    _lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = path or self.telemetry_file
+
+    def record(self, kind, **fields):
+        record = {"kind": kind, "time": time.time()}
+        record.update(fields)
+        line = json.dumps(record) + "\n"
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as telemetry_file:
+                telemetry_file.write(line)
+        except OSError as e:
+            print(f"Could not write telemetry: {e}")
+
+    def read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as telemetry_file:
+                for line in telemetry_file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def summary(self):
+        # Per version: playtime, medians of the slow steps and the download speeds in the order they happened
+        versions = {}
+        for record in self.read():
+            version = versions.setdefault(record.get("version", ""), {
+                "sessions": 0, "playtime_seconds": 0.0, "launch_prep": [], "backup": [], "snapshot": [],
+                "extraction": [], "download_mbps": []
+            })
+            if record["kind"] == "session":
+                version["sessions"] += 1
+                version["playtime_seconds"] += record.get("runtime_seconds", 0)
+                version["launch_prep"].append(record.get("launch_prep_seconds", 0))
+                version["backup"].append(record.get("backup_seconds", 0))
+                version["snapshot"].append(record.get("snapshot_seconds", 0))
+            elif record["kind"] == "download" and record.get("seconds"):
+                version["download_mbps"].append(record["bytes"] / record["seconds"] / 1024 / 1024)
+            elif record["kind"] == "extraction":
+                version["extraction"].append(record.get("seconds", 0))
+
+        summary = {}
+        for name, version in versions.items():
+            summary[name] = {
+                "sessions": version["sessions"],
+                "playtime_seconds": version["playtime_seconds"],
+                "median_launch_prep_seconds": statistics.median(version["launch_prep"]) if version["launch_prep"] else None,
+                "median_backup_seconds": statistics.median(version["backup"]) if version["backup"] else None,
+                "median_snapshot_seconds": statistics.median(version["snapshot"]) if version["snapshot"] else None,
+                "median_extraction_seconds": statistics.median(version["extraction"]) if version["extraction"] else None,
+                "download_mbps": version["download_mbps"]
+            }
+        return summary